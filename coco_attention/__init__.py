@@ -1 +1,27 @@
-"""Coco Attention package."""
+"""Coco Attention package.
+
+Services can run alerts in-process through `AlertController`:
+
+    with AlertController.from_config() as controller:
+        handle = controller.alert(["3"])
+        ...
+        handle.stop()  # Restores the lights
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .controller import AlertController, AlertHandle
+
+__all__ = ["AlertController", "AlertHandle"]
+
+
+def __getattr__(name: str):
+    # Resolved on first use so the CLI, which never needs it, starts faster.
+    if name in __all__:
+        from . import controller
+
+        return getattr(controller, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+from .cache import StateCache
+from .config import LastState, LightState
+from .dispatch import (
+    BRIDGE_GROUP_RATE,
+    BRIDGE_LIGHT_RATE,
+    BridgeBudget,
+    CommandDispatcher,
+    DispatchStats,
+)
+from .hue import HueClient
+from .pacing import AdaptivePacer
+from .scheduler import EdgeHook, PulseScheduler, Track
+
+
+URGENT_LIGHT_ID = "3"  # Armoire light
+RED_ALERT = {"on": True, "bri": 254, "hue": 0, "sat": 254}
+# The bridge runs "lselect" (breathe) for about 15 s, so a native alert is
+# refreshed just before it would lapse instead of pulsed edge by edge.
+NATIVE_REFRESH = 14.0
+NATIVE_ALERT = {**RED_ALERT, "alert": "lselect"}
+ALERT_OFF = {"alert": "none"}
+ALERT_MODES = ("pulse", "native")
+SNAPSHOT_MODES = ("file", "scene")
+SNAPSHOT_SCENE_NAME = "coco-attention snapshot"
+PRESETS = {
+    "red": {"on": True, "bri": 254, "hue": 0, "sat": 254},
+    "blue": {"on": True, "bri": 200, "hue": 46920, "sat": 254},
+    "green": {"on": True, "bri": 200, "hue": 25500, "sat": 254},
+    "warm": {"on": True, "bri": 200, "hue": 8000, "sat": 200},
+    "cool": {"on": True, "bri": 200, "hue": 38000, "sat": 150},
+}
+
+
+def pulse_tracks(
+    targets: list[str],
+    period: float,
+    low_bri: int,
+    phases: dict[str, float] | None = None,
+) -> list[Track]:
+    if period <= 0:
+        raise ValueError("period must be greater than 0.")
+    # One full bright-dim cycle takes `period`, as --period documents.
+    half_period = period / 2
+    transition_time = max(1, int(half_period * 10))
+    high = {**RED_ALERT, "transitiontime": transition_time}
+    low = {**RED_ALERT, "bri": low_bri, "transitiontime": transition_time}
+
+    phases = phases or {}
+    return [
+        Track(
+            target=target,
+            events=[(0.0, high), (half_period, low)],
+            cycle=2 * half_period,
+            phase=phases.get(target, 0.0),
+        )
+        for target in targets
+    ]
+
+
+def native_tracks(targets: list[str], refresh: float = NATIVE_REFRESH) -> list[Track]:
+    # The first lselect is sent by start_native, so each track's only event
+    # lands one refresh later and repeats from there.
+    return [
+        Track(target=target, events=[(refresh, NATIVE_ALERT)], cycle=refresh)
+        for target in targets
+    ]
+
+
+def start_native(client: HueClient, targets: list[str]) -> list[str]:
+    """Start the bridge's breathe effect on each target.
+
+    Returns the targets that rejected it (for example plugs and white-only
+    bulbs without "lselect"); those need host-driven pulsing instead.
+    """
+    return [target for target in targets if client.send_checked(target, NATIVE_ALERT)]
+
+
+def alternating_phases(targets: list[str]) -> dict[str, float]:
+    return {target: idx / len(targets) for idx, target in enumerate(targets)}
+
+
+def run_pulse(
+    client: HueClient,
+    tracks: list[Track],
+    stop: threading.Event | None = None,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+    report: Callable[[DispatchStats], None] | None = None,
+    on_edge: EdgeHook | None = None,
+    adaptive: bool = False,
+    per_light_rate: float | None = None,
+    budget: BridgeBudget | None = None,
+) -> DispatchStats:
+    # Pulse edges go through the dispatcher so a short period or many lights
+    # are coalesced to the bridge's budget instead of queueing on the bridge.
+    # Adaptive pacing also slows the pulse when round trips get too long for it.
+    pacer = AdaptivePacer(client.send) if adaptive else None
+    dispatcher = CommandDispatcher(
+        pacer.send if pacer else client.send,
+        light_rate=light_rate,
+        group_rate=group_rate,
+        per_light_rate=per_light_rate,
+        budget=budget,
+    )
+    completed = False
+    try:
+        PulseScheduler(
+            dispatcher.submit,
+            tracks,
+            on_edge=on_edge,
+            stretch=pacer.stretch if pacer else None,
+            blocking=False,
+        ).run(stop=stop)
+        # Only tracks with a finite repeat end without being stopped; their
+        # last frames are the final state and must still land.
+        completed = stop is None or not stop.is_set()
+    finally:
+        # Pending edges are stale once the alert stops; never let them land
+        # after the restore that usually follows.
+        dispatcher.close(flush=completed)
+        if report is not None:
+            report(dispatcher.stats)
+    return dispatcher.stats
+
+
+def run_native(
+    client: HueClient,
+    targets: list[str],
+    period: float,
+    low_bri: int,
+    stop: threading.Event | None = None,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+    report: Callable[[DispatchStats], None] | None = None,
+    on_edge: EdgeHook | None = None,
+    refresh: float = NATIVE_REFRESH,
+    adaptive: bool = False,
+    per_light_rate: float | None = None,
+    budget: BridgeBudget | None = None,
+) -> DispatchStats:
+    """Let the bridge breathe the lights, pulsing from the host only as a fallback."""
+    refused = start_native(client, targets)
+    native = [target for target in targets if target not in refused]
+    tracks = native_tracks(native, refresh)
+    if refused:
+        tracks += pulse_tracks(refused, period, low_bri, alternating_phases(refused))
+    try:
+        return run_pulse(
+            client,
+            tracks,
+            stop=stop,
+            light_rate=light_rate,
+            group_rate=group_rate,
+            report=report,
+            on_edge=on_edge,
+            adaptive=adaptive,
+            per_light_rate=per_light_rate,
+            budget=budget,
+        )
+    finally:
+        # Cancel the breathe now rather than letting it run out its 15 s over
+        # the restored state.
+        for target in native:
+            try:
+                client.send(target, ALERT_OFF)
+            except (RuntimeError, OSError) as exc:
+                # Restore follows and overwrites the light anyway.
+                print(f"Could not cancel the breathe on {target} ({exc}).")
+
+
+def capture_states(
+    client: HueClient, light_ids: list[str], cache: StateCache | None = None
+) -> dict[str, LightState]:
+    # One GET /lights covers every light, so capture cost does not grow with
+    # the number of lights; a fresh cache entry skips even that.
+    states = cache.get(light_ids) if cache is not None else None
+    if states is None:
+        states = client.get_all_light_states(light_ids)
+        if cache is not None:
+            cache.put(states)
+    for light_id, state in states.items():
+        state.light_id = light_id
+    return states
+
+
+def snapshot_scene(client: HueClient, light_ids: list[str]) -> str | None:
+    """Store the lights' exact state (any color mode) as a bridge scene.
+
+    Returns None when the bridge refuses, so callers keep the file snapshot.
+    """
+    try:
+        return client.create_scene(SNAPSHOT_SCENE_NAME, light_ids)
+    except (RuntimeError, OSError) as exc:
+        print(f"Scene snapshot failed ({exc}); using the saved file only.")
+        return None
+
+
+def restore_scene(client: HueClient, scene_id: str) -> bool:
+    """Recall and delete a snapshot scene; False means fall back to the file."""
+    try:
+        client.recall_scene(scene_id)
+    except (RuntimeError, OSError) as exc:
+        print(f"Scene restore failed ({exc}); restoring from the saved file.")
+        return False
+    try:
+        client.delete_scene(scene_id)
+    except (RuntimeError, OSError):
+        pass  # Recyclable, so the bridge cleans it up eventually
+    return True
+
+
+def delete_scenes(client: HueClient, scene_ids: list[str]) -> None:
+    """Delete snapshot scenes the state store no longer refers to."""
+    for scene_id in scene_ids:
+        try:
+            client.delete_scene(scene_id)
+        except (RuntimeError, OSError):
+            pass  # Recyclable, so the bridge cleans it up eventually
+
+
+def restored_states(payloads: dict[str, dict]) -> dict[str, LightState]:
+    fields = set(LightState.__dataclass_fields__)
+    return {
+        light_id: LightState(
+            light_id=light_id,
+            **{key: value for key, value in payload.items() if key in fields},
+        )
+        for light_id, payload in payloads.items()
+    }
+
+
+def restore_payloads(
+    last_state: LastState, default_light_id: str | None = None
+) -> dict[str, dict]:
+    payloads: dict[str, dict] = {}
+    for saved_light_id, state in last_state.lights.items():
+        light_id = state.light_id or saved_light_id or default_light_id
+        payload = {
+            key: value
+            for key, value in state.__dict__.items()
+            if key != "light_id" and value is not None
+        }
+        if light_id and payload:
+            payloads[light_id] = payload
+    return payloads
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+
+from .config import LightState
+from .hue import DEFAULT_TIMEOUT, HueClient
+
+
+DEFAULT_CONCURRENCY = 6
+
+
+class AsyncHueClient:
+    """Asyncio facade over HueClient with bounded concurrent fan-out.
+
+    Requests run on worker threads over the client's keep-alive pool, so the
+    pool is sized to the concurrency limit unless an existing client is shared.
+    """
+
+    def __init__(
+        self,
+        bridge_ip: str = "",
+        username: str = "",
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        client: HueClient | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self._owns_client = client is None
+        self.client = client or HueClient(
+            bridge_ip, username, pool_size=max_concurrency, timeout=timeout
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __aenter__(self) -> AsyncHueClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            self.client.close()
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def get_light_state(self, light_id: str) -> LightState:
+        return await self._call(self.client.get_light_state, light_id)
+
+    async def set_light_state(self, light_id: str, payload: dict) -> None:
+        await self._call(self.client.set_light_state, light_id, payload)
+
+    async def list_lights(self) -> dict[str, str]:
+        return await self._call(self.client.list_lights)
+
+    async def get_many(self, light_ids: list[str]) -> dict[str, LightState]:
+        states = await _gather(
+            [self.get_light_state(light_id) for light_id in light_ids]
+        )
+        return dict(zip(light_ids, states))
+
+    async def set_many(self, payloads: dict[str, dict]) -> None:
+        await _gather(
+            [
+                self.set_light_state(light_id, payload)
+                for light_id, payload in payloads.items()
+            ]
+        )
+
+
+async def _gather(coros: list) -> list:
+    # Let every request finish before surfacing the first failure so no
+    # request is left running against the bridge after we return.
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+def get_many(
+    client: HueClient, light_ids: list[str], max_concurrency: int = DEFAULT_CONCURRENCY
+) -> dict[str, LightState]:
+    async def run() -> dict[str, LightState]:
+        async with AsyncHueClient(client=client, max_concurrency=max_concurrency) as ac:
+            return await ac.get_many(light_ids)
+
+    return asyncio.run(run())
+
+
+def set_many(
+    client: HueClient,
+    payloads: dict[str, dict],
+    max_concurrency: int = DEFAULT_CONCURRENCY,
+) -> None:
+    async def run() -> None:
+        async with AsyncHueClient(client=client, max_concurrency=max_concurrency) as ac:
+            await ac.set_many(payloads)
+
+    asyncio.run(run())
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable
+
+from .alert import PRESETS, capture_states, restore_payloads
+from .config import StateStore
+from .delta import StateTracker
+from .dispatch import BRIDGE_GROUP_RATE, BRIDGE_LIGHT_RATE, TokenBucket
+from .hue import (
+    DEFAULT_POOL_SIZE,
+    GROUP_PREFIX,
+    HueClient,
+    group_target,
+    is_group_target,
+)
+
+
+COMMANDS = ("set", "preset", "snapshot", "restore", "sleep")
+
+
+class BatchRunner:
+    """Run JSON Lines light commands through one warm client.
+
+    set and preset commands are pipelined: each one is sent as soon as the
+    rate limit allows, and it only waits for earlier commands on the same
+    target. A group command waits for everything in flight, and everything
+    waits for an in-flight group command, because a group overlaps its
+    member lights. snapshot and restore wait for all earlier commands.
+    sleep only delays the commands that come after it. Result lines are
+    written in input order.
+    """
+
+    def __init__(
+        self,
+        client: HueClient,
+        store: StateStore,
+        default_light_id: str,
+        default_group_id: str | None = None,
+        light_rate: float = BRIDGE_LIGHT_RATE,
+        group_rate: float = BRIDGE_GROUP_RATE,
+        depth: int = DEFAULT_POOL_SIZE,  # Requests in flight; one per pooled connection
+        write: Callable[[str], None] = print,
+    ) -> None:
+        if depth < 1:
+            raise ValueError("depth must be at least 1.")
+        self.client = client
+        self.sender = StateTracker(client)
+        self.store = store
+        self.default_light_id = default_light_id
+        self.default_group_id = default_group_id
+        self.write = write
+        self.failed = 0
+        self._light_bucket = TokenBucket(light_rate)
+        self._group_bucket = TokenBucket(group_rate)
+        self._pool = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="batch")
+        self._inflight: dict[str, Future] = {}  # Newest request per target
+        self._inflight_lock = threading.Lock()
+        self._results: deque[tuple[dict, list[Future]]] = deque()
+
+    def run(self, lines: Iterable[str]) -> int:
+        """Run every command and return how many failed."""
+        try:
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    self.submit(line, number)
+        finally:
+            self._drain()
+            self._pool.shutdown(wait=True)
+        return self.failed
+
+    def submit(self, line: str, number: int) -> None:
+        result: dict = {"line": number}
+        try:
+            command = json.loads(line)
+            if not isinstance(command, dict):
+                raise ValueError("a command must be a JSON object.")
+            if "id" in command:
+                result["id"] = command["id"]
+            name = command.get("cmd")
+            if name not in COMMANDS:
+                raise ValueError(f"Unknown command: {name!r}")
+            result["cmd"] = name
+            futures = getattr(self, f"_{name}")(command, result)
+        except Exception as exc:  # noqa: BLE001 - reported on the result line
+            result.update(ok=False, error=str(exc))
+            futures = []
+        self._results.append((result, futures))
+        self._emit(block=False)
+
+    def _targets(self, command: dict) -> list[str]:
+        if "group" in command:
+            group_id = command["group"] or self.default_group_id
+            if not group_id:
+                raise ValueError("No group configured.")
+            return [group_target(str(group_id))]
+        if "lights" in command:
+            return [str(light_id) for light_id in command["lights"]]
+        return [str(command.get("light") or self.default_light_id)]
+
+    def _set(self, command: dict, result: dict) -> list[Future]:
+        payload = command.get("state")
+        if not isinstance(payload, dict) or not payload:
+            raise ValueError('set needs a non-empty "state" object.')
+        return [self._send(target, payload) for target in self._targets(command)]
+
+    def _preset(self, command: dict, result: dict) -> list[Future]:
+        preset = command.get("preset")
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preset: {preset!r}")
+        return [
+            self._send(target, PRESETS[preset]) for target in self._targets(command)
+        ]
+
+    def _snapshot(self, command: dict, result: dict) -> list[Future]:
+        self._drain()
+        light_ids = []
+        for target in self._targets(command):
+            if is_group_target(target):
+                light_ids += self.client.get_group_lights(target[len(GROUP_PREFIX) :])
+            else:
+                light_ids.append(target)
+        states = capture_states(self.client, light_ids)
+        self.sender.remember(states)
+        result.update(ok=True, frame=self.store.push(states))
+        return []
+
+    def _restore(self, command: dict, result: dict) -> list[Future]:
+        self._drain()
+        frame = command.get("frame")
+        last_state = self.store.pop(None if frame is None else int(frame))
+        if not last_state.lights:
+            raise ValueError("No saved state found.")
+        payloads = restore_payloads(last_state, default_light_id=self.default_light_id)
+        futures = [
+            self._send(light_id, payload) for light_id, payload in payloads.items()
+        ]
+        result["restored"] = sorted(payloads)
+        return futures
+
+    def _sleep(self, command: dict, result: dict) -> list[Future]:
+        seconds = float(command.get("seconds", 0))
+        if seconds < 0:
+            raise ValueError("seconds must not be negative.")
+        time.sleep(seconds)
+        result["ok"] = True
+        return []
+
+    def _send(self, target: str, payload: dict) -> Future:
+        group = is_group_target(target)
+        with self._inflight_lock:
+            blockers = [
+                future
+                for key, future in self._inflight.items()
+                if group or key == target or is_group_target(key)
+            ]
+        wait(blockers)
+        bucket = self._group_bucket if group else self._light_bucket
+        time.sleep(bucket.delay())
+        bucket.take()
+        future = self._pool.submit(self.sender.send, target, payload)
+        with self._inflight_lock:
+            self._inflight[target] = future
+        future.add_done_callback(lambda done: self._settle(target, done))
+        return future
+
+    def _settle(self, target: str, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(target) is future:
+                del self._inflight[target]
+
+    def _drain(self) -> None:
+        with self._inflight_lock:
+            pending = list(self._inflight.values())
+        wait(pending)
+        self._emit(block=True)
+
+    def _emit(self, block: bool) -> None:
+        while self._results:
+            result, futures = self._results[0]
+            if not block and not all(future.done() for future in futures):
+                return
+            self._results.popleft()
+            errors = [str(exc) for exc in map(Future.exception, futures) if exc]
+            if errors:
+                result.update(ok=False, error="; ".join(errors))
+            result.setdefault("ok", True)
+            if not result["ok"]:
+                self.failed += 1
+            self.write(json.dumps(result))
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import bisect
+import contextlib
+import io
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .alert import alternating_phases, pulse_tracks, run_pulse
+from .async_hue import set_many
+from .config import Config, LastState, LightState, last_state_path, save_config
+from .config import save_last_state
+from .dispatch import BRIDGE_GROUP_RATE, BRIDGE_LIGHT_RATE
+from .hue import HueClient
+from .mockbridge import MockBridge, MockBridgeOptions
+from .stats import summarize
+
+
+def _package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("coco-attention")
+    except Exception:  # noqa: BLE001 - running from a source tree
+        return "unknown"
+
+
+def bench_cold_start(runs: int = 5) -> dict:
+    """Wall time of ``python -m coco_attention --help`` in a fresh interpreter."""
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "coco_attention", "--help"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+
+def bench_set_throughput(bridge: MockBridge, commands: int = 200) -> dict:
+    light_ids = list(bridge.lights)
+    latencies = []
+    with HueClient(bridge.address, bridge.username) as client:
+        started = time.perf_counter()
+        for idx in range(commands):
+            sent = time.perf_counter()
+            client.set_light_state(light_ids[idx % len(light_ids)], {"bri": idx % 254})
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - started
+        reused = client.stats.reused
+
+    payloads = {light_id: {"bri": 1} for light_id in light_ids}
+    with HueClient(bridge.address, bridge.username) as client:
+        fan_started = time.perf_counter()
+        set_many(client, payloads)
+        fan_elapsed = time.perf_counter() - fan_started
+    return {
+        "commands": commands,
+        "commands_per_second": commands / elapsed,
+        "latency": summarize(latencies),
+        "connections_reused": reused,
+        "set_many_seconds": fan_elapsed,
+        "set_many_lights": len(payloads),
+    }
+
+
+def bench_restore(bridge: MockBridge, runs: int = 5) -> dict:
+    from .cli import cmd_restore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp) / "config.json"
+        save_config(
+            config_path,
+            Config(bridge_ip=bridge.address, username=bridge.username, light_id="1"),
+        )
+        state = LastState(
+            lights={
+                light_id: LightState(light_id=light_id, on=True, bri=50, hue=1, sat=1)
+                for light_id in bridge.lights
+            }
+        )
+        args = argparse.Namespace(config=str(config_path), non_interactive=True)
+        durations = []
+        for _ in range(runs):
+            save_last_state(last_state_path(config_path), state)
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                cmd_restore(args)
+            durations.append(time.perf_counter() - started)
+    return {"lights": len(bridge.lights), "seconds": summarize(durations)}
+
+
+def _arrival_lateness(
+    scheduled: dict[str, list[float]], log: list[tuple[float, str, dict]]
+) -> list[float]:
+    lateness = []
+    for arrived, target, _payload in log:
+        edges = scheduled.get(target)
+        if not edges:
+            continue
+        pos = bisect.bisect_right(edges, arrived)
+        if pos:
+            lateness.append(arrived - edges[pos - 1])
+    return lateness
+
+
+def bench_pulse(
+    bridge: MockBridge,
+    period: float = 2.0,
+    duration: float = 5.0,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+) -> dict:
+    """Compare requested pulse edges with when they fired and reached the bridge."""
+    targets = list(bridge.lights)
+    scheduled: dict[str, list[float]] = defaultdict(list)
+    fired_late: list[float] = []
+
+    def on_edge(target: str, due: float, fired: float) -> None:
+        scheduled[target].append(due)
+        fired_late.append(fired - due)
+
+    stop = threading.Event()
+    timer = threading.Timer(duration, stop.set)
+    bridge.log.clear()
+    with HueClient(bridge.address, bridge.username) as client:
+        timer.start()
+        stats = run_pulse(
+            client,
+            pulse_tracks(targets, period, 80, alternating_phases(targets)),
+            stop=stop,
+            light_rate=light_rate,
+            group_rate=group_rate,
+            on_edge=on_edge,
+        )
+    timer.cancel()
+    arrivals = _arrival_lateness(scheduled, list(bridge.log))
+    return {
+        "lights": len(targets),
+        "period": period,
+        "duration": duration,
+        "edges": len(fired_late),
+        "sent": stats.sent,
+        "merged": stats.merged,
+        "dropped": stats.dropped,
+        "errors": stats.errors,
+        "fire_lateness": summarize(fired_late),
+        "arrival_lateness": summarize(arrivals),
+    }
+
+
+def run_benchmarks(
+    lights: int = 10,
+    commands: int = 200,
+    latency: float = 0.0,
+    period: float = 2.0,
+    duration: float = 5.0,
+    cold_runs: int = 5,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+) -> dict:
+    options = MockBridgeOptions(latency=latency, record=True)
+    results: dict = {}
+    if cold_runs > 0:
+        results["cold_start"] = bench_cold_start(cold_runs)
+    with MockBridge(lights=lights, options=options) as bridge:
+        results["set_light_state"] = bench_set_throughput(bridge, commands)
+        results["restore"] = bench_restore(bridge)
+        if duration > 0:
+            results["pulse"] = bench_pulse(
+                bridge, period=period, duration=duration, light_rate=light_rate
+            )
+    return {
+        "version": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "lights": lights,
+            "commands": commands,
+            "mock_latency": latency,
+            "period": period,
+            "duration": duration,
+            "cold_runs": cold_runs,
+            "light_rate": light_rate,
+        },
+        "results": results,
+    }
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable
+
+from .config import DEFAULT_STATE_TTL, LightState
+
+
+def state_cache_path(config_path: Path) -> Path:
+    return config_path.with_name("state_cache.json")
+
+
+class StateCache:
+    """Short-lived cache of bridge light states, in memory and optionally on disk.
+
+    Entries carry wall-clock timestamps so back-to-back CLI processes can share
+    the on-disk copy. Anything that changes a light must invalidate or
+    overwrite its entry.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        ttl: float = DEFAULT_STATE_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: dict[str, tuple[float, LightState]] | None = None
+
+    def _load(self) -> dict[str, tuple[float, LightState]]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path is not None:
+                try:
+                    data = json.loads(self.path.read_text())
+                except (OSError, ValueError):
+                    data = {}
+                for light_id, entry in data.items():
+                    try:
+                        state = LightState(**entry["state"])
+                        self._entries[light_id] = (float(entry["at"]), state)
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        return self._entries
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        entries = self._load()
+        data = {
+            light_id: {"at": at, "state": asdict(state)}
+            for light_id, (at, state) in entries.items()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def get(self, light_ids: list[str]) -> dict[str, LightState] | None:
+        """Return states for every requested light, or None if any is stale."""
+        if self.ttl <= 0:
+            return None
+        entries = self._load()
+        now = self.clock()
+        states = {}
+        for light_id in light_ids:
+            entry = entries.get(light_id)
+            if entry is None or not 0 <= now - entry[0] <= self.ttl:
+                return None
+            states[light_id] = LightState(**asdict(entry[1]))
+        return states
+
+    def put(self, states: dict[str, LightState]) -> None:
+        entries = self._load()
+        now = self.clock()
+        for light_id, state in states.items():
+            entries[light_id] = (now, LightState(**asdict(state)))
+        self._save()
+
+    def invalidate(self, light_ids: list[str] | None = None) -> None:
+        entries = self._load()
+        stale = list(entries) if light_ids is None else light_ids
+        removed = [entries.pop(light_id, None) for light_id in stale]
+        if any(entry is not None for entry in removed):
+            self._save()
@@ -1,33 +1,63 @@
 from __future__ import annotations
 
 import argparse
-import socket
-import time
+import dataclasses
+import functools
+import sys
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import requests
-
+# Only modules that are cheap to import, or that every command needs, are
+# imported here. The rest are imported by the commands that use them, so
+# `--help`, `config` or `restore` never load the daemon, the mock bridge,
+# discovery or requests.
+from .cache import StateCache, state_cache_path
 from .config import (
     DEFAULT_CONFIG_PATH,
+    DEFAULT_STATE_TTL,
+    DEFAULT_TRANSPORT,
+    MAIN_BRIDGE,
+    BridgeConfig,
     Config,
     LastState,
+    StateStore,
     load_config,
-    load_last_state,
     save_config,
-    save_last_state,
     last_state_path,
 )
-from .hue import HueClient, discover_bridges
-
+from .alert import (
+    ALERT_MODES,
+    PRESETS,
+    SNAPSHOT_MODES,
+    URGENT_LIGHT_ID,
+    alternating_phases,
+    capture_states,
+    delete_scenes,
+    pulse_tracks,
+    restore_payloads,
+    restore_scene,
+    restored_states,
+    run_native,
+    run_pulse,
+    snapshot_scene,
+)
+from .delta import StateTracker
+from .dispatch import (
+    BRIDGE_GROUP_RATE,
+    BRIDGE_LIGHT_RATE,
+    BridgeBudget,
+    DispatchStats,
+    send_all,
+)
+from .effects import EFFECTS, Effect, compile_effect, describe_plan, load_effect
+from .hue import TRANSPORTS, HueClient, group_target
+from .metrics import Metrics
+from .scheduler import EdgeHook
 
-RED_ALERT = {"on": True, "bri": 254, "hue": 0, "sat": 254}
-PRESETS = {
-    "red": {"on": True, "bri": 254, "hue": 0, "sat": 254},
-    "blue": {"on": True, "bri": 200, "hue": 46920, "sat": 254},
-    "green": {"on": True, "bri": 200, "hue": 25500, "sat": 254},
-    "warm": {"on": True, "bri": 200, "hue": 8000, "sat": 200},
-    "cool": {"on": True, "bri": 200, "hue": 38000, "sat": 150},
-}
+if TYPE_CHECKING:
+    from .entertainment import EntertainmentStream
+    from .fleet import FleetMember
 
 
 def _config_path_from_args(args: argparse.Namespace) -> Path:
@@ -42,10 +72,18 @@ def cmd_register(args: argparse.Namespace) -> None:
 
 def cmd_config(args: argparse.Namespace) -> None:
     config_path = _config_path_from_args(args)
+    state_ttl = args.state_ttl
+    if state_ttl is None:
+        state_ttl = _saved_state_ttl(config_path)
     cfg = Config(
         bridge_ip=args.bridge_ip,
         username=args.username,
         light_id=args.light_id,
+        group_id=args.group_id,
+        state_ttl=state_ttl,
+        transport=args.transport or _saved_transport(config_path),
+        bridges=_saved_bridges(config_path),
+        light_sets=dict(args.light_set or []) or _saved_light_sets(config_path),
     )
     save_config(config_path, cfg)
     print(f"Saved config to {config_path}")
@@ -69,10 +107,14 @@ def _setup_config(
     bridge_ip: str | None = None,
     username: str | None = None,
     light_id: str | None = None,
+    group_id: str | None = None,
     non_interactive: bool = False,
+    refresh_discovery: bool = False,
 ) -> Config:
     if not bridge_ip:
-        bridges = discover_bridges()
+        from .discovery import discover
+
+        bridges = discover(config_path, refresh=refresh_discovery)
         if not bridges:
             raise SystemExit("No Hue bridges found on the network.")
         if len(bridges) == 1:
@@ -122,12 +164,53 @@ def _setup_config(
             idx = _prompt_choice("Choose a light to control:", labels)
             light_id = light_ids[idx]
 
-    cfg = Config(bridge_ip=bridge_ip, username=username, light_id=light_id)
+    if not group_id and not non_interactive:
+        groups = client.list_groups()
+        if groups:
+            group_ids = list(groups.keys())
+            labels = ["No group"] + [
+                f"{gid}: {groups[gid]['name']} ({groups[gid]['type']})"
+                for gid in group_ids
+            ]
+            idx = _prompt_choice("Choose a room or zone for --group alerts:", labels)
+            group_id = group_ids[idx - 1] if idx else None
+
+    cfg = Config(
+        bridge_ip=bridge_ip,
+        username=username,
+        light_id=light_id,
+        group_id=group_id,
+        state_ttl=_saved_state_ttl(config_path),
+        transport=_saved_transport(config_path),
+        bridges=_saved_bridges(config_path),
+        light_sets=_saved_light_sets(config_path),
+    )
     save_config(config_path, cfg)
     print(f"Saved config to {config_path}")
     return cfg
 
 
+def _saved_bridges(config_path: Path) -> dict[str, BridgeConfig]:
+    # Re-running config or setup replaces the main bridge, not the others.
+    return load_config(config_path).bridges if config_path.exists() else {}
+
+
+def _saved_light_sets(config_path: Path) -> dict[str, list[str]]:
+    return load_config(config_path).light_sets if config_path.exists() else {}
+
+
+def _saved_transport(config_path: Path) -> str:
+    if not config_path.exists():
+        return DEFAULT_TRANSPORT
+    return load_config(config_path).transport
+
+
+def _saved_state_ttl(config_path: Path) -> float:
+    if not config_path.exists():
+        return DEFAULT_STATE_TTL
+    return load_config(config_path).state_ttl
+
+
 def _ensure_config(config_path: Path, non_interactive: bool = False) -> Config:
     if config_path.exists():
         return load_config(config_path)
@@ -139,67 +222,466 @@ def _ensure_config(config_path: Path, non_interactive: bool = False) -> Config:
     return _setup_config(config_path)
 
 
-def cmd_list_lights(args: argparse.Namespace) -> None:
+def _client_from_args(args: argparse.Namespace) -> HueClient:
     if args.bridge_ip and args.username:
-        client = HueClient(args.bridge_ip, args.username)
-    else:
-        config_path = _config_path_from_args(args)
-        if not config_path.exists():
-            raise SystemExit("No config found. Run setup first.")
-        cfg = load_config(config_path)
-        client = HueClient(cfg.bridge_ip, cfg.username)
+        return HueClient(args.bridge_ip, args.username)
+    config_path = _config_path_from_args(args)
+    if not config_path.exists():
+        raise SystemExit("No config found. Run setup first.")
+    cfg = load_config(config_path)
+    return HueClient(cfg.bridge_ip, cfg.username, transport=cfg.transport)
+
 
+def cmd_list_lights(args: argparse.Namespace) -> None:
+    client = _client_from_args(args)
     lights = client.list_lights()
     for light_id, name in lights.items():
         print(f"{light_id}\t{name}")
 
 
+def cmd_list_groups(args: argparse.Namespace) -> None:
+    client = _client_from_args(args)
+    groups = client.list_groups()
+    for group_id, info in groups.items():
+        members = ",".join(info["lights"])
+        print(f"{group_id}\t{info['type']}\t{info['name']}\t{members}")
+
+
+def _resolve_group(args: argparse.Namespace, cfg: Config) -> str | None:
+    if args.group is None:
+        return None
+    group_id = args.group or cfg.group_id
+    if not group_id:
+        raise SystemExit("No group configured. Pass --group <ID> or run setup.")
+    return group_id
+
+
+def _state_store(config_path: Path) -> StateStore:
+    return StateStore(last_state_path(config_path))
+
+
+def _state_cache(config_path: Path, cfg: Config) -> StateCache:
+    return StateCache(state_cache_path(config_path), ttl=cfg.state_ttl)
+
+
 def cmd_alert(args: argparse.Namespace) -> None:
     config_path = _config_path_from_args(args)
     cfg = _ensure_config(config_path, non_interactive=args.non_interactive)
-    client = HueClient(cfg.bridge_ip, cfg.username)
+    metrics = _metrics(args)
+    if getattr(args, "light_set", None):
+        try:
+            _fleet_alert(args, config_path, cfg, metrics)
+        finally:
+            _write_metrics(args, metrics)
+        return
+    client = HueClient(
+        cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+    )
 
-    lights_ids = [cfg.light_id]
+    group_id = _resolve_group(args, cfg)
+    if group_id:
+        # One group action drives every member light; snapshot the members so
+        # restore can put each one back individually.
+        lights_ids = [group_target(group_id)]
+        captured_ids = client.get_group_lights(group_id)
+    else:
+        lights_ids = [cfg.light_id]
+        if args.urgent:
+            lights_ids.append(URGENT_LIGHT_ID)
+        captured_ids = lights_ids
     state = LastState(lights={})
+    cache = _state_cache(config_path, cfg)
 
-    if args.urgent:
-        lights_ids.append("3")  # Armoire light
-
-    for light_id in lights_ids:
-        state.lights[light_id] = client.get_light_state(light_id)
-        state.lights[light_id].light_id = light_id
+    state.lights.update(capture_states(client, captured_ids, cache))
+    state.scene_id = _scene_snapshot(args, client, captured_ids)
     print(state)
-    save_last_state(last_state_path(config_path), state)
+    frame = _state_store(config_path).push(state.lights, state.scene_id)
+    cache.invalidate(captured_ids)
 
+    budget = BridgeBudget(args.light_rate, args.group_rate)
     try:
-        _pulse_alert(client, lights_ids, period=args.period, low_bri=args.low_bri)
+        # Spread targets evenly over the cycle so urgent alerts alternate.
+        phases = alternating_phases(lights_ids)
+        _pulse_alert(
+            StateTracker(client, state.lights),
+            lights_ids,
+            period=args.period,
+            low_bri=args.low_bri,
+            phases=phases,
+            light_rate=args.light_rate,
+            group_rate=args.group_rate,
+            mode=args.mode,
+            on_edge=metrics.record_edge if metrics else None,
+            adaptive=args.adaptive,
+            per_light_rate=getattr(args, "per_light_rate", None),
+            budget=budget,
+        )
     except KeyboardInterrupt:
-        cmd_restore(args)
+        _restore(config_path, cfg, frame, metrics, budget)
         print("Alert stopped and light restored.")
+    finally:
+        client.close()
+        _write_metrics(args, metrics)
+
+
+def cmd_effect(args: argparse.Namespace) -> None:
+    light_ids = [light_id for light_id in (args.light_ids or "").split(",") if light_id]
+    try:
+        effect = load_effect(args.effect)
+        if args.loops is not None:
+            effect = dataclasses.replace(effect, loops=args.loops)
+        # Compiling checks the whole effect, so a bad one fails before any
+        # request is made.
+        plan = compile_effect(effect, light_ids or ["1"])
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+    if args.check:
+        print(describe_plan(plan, args.light_rate, args.group_rate))
+        return
+
+    config_path = _config_path_from_args(args)
+    cfg = _ensure_config(config_path, non_interactive=args.non_interactive)
+    metrics = _metrics(args)
+    client = HueClient(
+        cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+    )
+    group_id = _resolve_group(args, cfg)
+    if group_id:
+        targets = [group_target(group_id)]
+        captured_ids = client.get_group_lights(group_id)
+    else:
+        targets = light_ids or [cfg.light_id]
+        captured_ids = targets
+    stream = None
+    if args.stream:
+        try:
+            stream = _open_stream(client, cfg, group_id, captured_ids, args)
+        except (RuntimeError, ValueError) as exc:
+            client.close()
+            raise SystemExit(str(exc))
+    else:
+        plan = compile_effect(effect, targets)
+        if not plan.fits(args.light_rate, args.group_rate):
+            print(
+                f"Warning: {effect.name} needs {plan.light_rate:.1f} light and "
+                f"{plan.group_rate:.1f} group commands/s; frames will be merged."
+            )
+
+    cache = _state_cache(config_path, cfg)
+    states = capture_states(client, captured_ids, cache)
+    scene_id = _scene_snapshot(args, client, captured_ids)
+    frame = _state_store(config_path).push(states, scene_id)
+    cache.invalidate(captured_ids)
+    budget = BridgeBudget(args.light_rate, args.group_rate)
+    try:
+        if stream is not None:
+            _stream_effect(client, stream, group_id, effect, captured_ids)
+        else:
+            run_pulse(
+                StateTracker(client, states),
+                plan.tracks,
+                report=_print_pulse_stats,
+                on_edge=metrics.record_edge if metrics else None,
+                per_light_rate=args.per_light_rate,
+                budget=budget,
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    try:
+        _restore(config_path, cfg, frame, metrics, budget)
+    finally:
+        _write_metrics(args, metrics)
+
+
+def _open_stream(
+    client: HueClient,
+    cfg: Config,
+    group_id: str | None,
+    light_ids: list[str],
+    args: argparse.Namespace,
+) -> EntertainmentStream:
+    from .entertainment import (
+        DEFAULT_FRAME_RATE,
+        DEFAULT_STREAM_PORT,
+        EntertainmentStream,
+        UdpTransport,
+    )
+
+    if not group_id:
+        raise ValueError("--stream needs an Entertainment group; pass --group.")
+    # The stream goes to the bridge's own address, without any HTTP port.
+    host = cfg.bridge_ip.rsplit(":", 1)[0]
+    stream = EntertainmentStream(
+        UdpTransport(host, args.stream_port or DEFAULT_STREAM_PORT),
+        light_ids,
+        frame_rate=args.frame_rate or DEFAULT_FRAME_RATE,
+    )
+    try:
+        client.set_stream_active(group_id, True)
+    except RuntimeError:
+        stream.close()
+        raise
+    return stream
+
+
+def _stream_effect(
+    client: HueClient,
+    stream: EntertainmentStream,
+    group_id: str,
+    effect: Effect,
+    light_ids: list[str],
+) -> None:
+    from .entertainment import effect_length, effect_renderer
+
+    try:
+        stats = stream.run(
+            effect_renderer(effect, light_ids),
+            duration=effect_length(effect, light_ids),
+        )
+    finally:
+        stream.close()
+        # Hand the lights back to REST so the restore can reach them.
+        client.set_stream_active(group_id, False)
+    print(
+        f"Streamed {stats.frames} frames ({stats.skipped} skipped, "
+        f"{stats.errors} failed)."
+    )
 
 
 def cmd_restore(args: argparse.Namespace) -> None:
     config_path = _config_path_from_args(args)
     cfg = _ensure_config(config_path, non_interactive=args.non_interactive)
-    state_path = last_state_path(config_path)
-    if not state_path.exists():
-        raise SystemExit("No saved state found. Run alert or set first.")
+    metrics = _metrics(args)
+    try:
+        if getattr(args, "light_set", None):
+            _fleet_restore(config_path, cfg, args.light_set, metrics)
+            return
+        if not last_state_path(config_path).exists():
+            raise SystemExit("No saved state found. Run alert or set first.")
+        _restore(config_path, cfg, metrics=metrics)
+    finally:
+        _write_metrics(args, metrics)
+
 
-    last_state = load_last_state(state_path)
+def _restore(
+    config_path: Path,
+    cfg: Config,
+    frame: int | None = None,
+    metrics: Metrics | None = None,
+    budget: BridgeBudget | None = None,
+) -> None:
+    """Unwind one snapshot frame (the newest by default) and apply what it returns.
+
+    Pass the budget the alert pulsed under, so the restore shares its rate.
+    """
+    last_state = _state_store(config_path).pop(frame)
+    if last_state.orphaned_scenes:
+        with HueClient(
+            cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+        ) as client:
+            delete_scenes(client, last_state.orphaned_scenes)
     if not last_state.lights:
+        if frame is None:
+            raise SystemExit("No saved state found. Run alert or set first.")
+        # A later alert on the same lights now owns our snapshot.
+        print("A newer alert holds these lights; it will restore them.")
+        return
+    payloads = restore_payloads(last_state, default_light_id=cfg.light_id)
+    cache = _state_cache(config_path, cfg)
+
+    if last_state.scene_id:
+        # One recall puts every light back exactly, whatever its color mode.
+        with HueClient(
+            cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+        ) as client:
+            restored = restore_scene(client, last_state.scene_id)
+        if restored:
+            cache.invalidate(list(payloads))
+            print("Light state restored.")
+            return
+
+    with HueClient(
+        cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+    ) as client:
+        # Send the whole snapshot: the cache only holds what we last wrote,
+        # and the lights may have been changed by hand since.
+        send_all(client.send, payloads, budget=budget)
+    cache.put(restored_states(payloads))
+    print("Light state restored.")
+
+
+def _fleet(
+    config_path: Path,
+    cfg: Config,
+    light_set: str,
+    metrics: Metrics | None = None,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+) -> list[FleetMember]:
+    from . import fleet
+
+    try:
+        return fleet.fleet_members(
+            config_path, cfg, light_set, metrics, light_rate, group_rate
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+
+def _fleet_results(results: dict, action: str) -> dict:
+    """Print each bridge that failed and return the ones that succeeded."""
+    succeeded = {}
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            print(f"Bridge {name}: {action} failed: {result}")
+        else:
+            succeeded[name] = result
+    return succeeded
+
+
+def _fleet_alert(
+    args: argparse.Namespace,
+    config_path: Path,
+    cfg: Config,
+    metrics: Metrics | None = None,
+) -> None:
+    from . import fleet
+
+    if args.period <= 0:
+        raise SystemExit("--period must be greater than 0.")
+    members = _fleet(
+        config_path, cfg, args.light_set, metrics, args.light_rate, args.group_rate
+    )
+    try:
+        frames = _fleet_results(
+            fleet.fan_out(
+                members, functools.partial(fleet.capture, snapshot=args.snapshot)
+            ),
+            "snapshot",
+        )
+        alerting = [member for member in members if member.name in frames]
+        if not alerting:
+            raise SystemExit("No bridge could be reached.")
+        stop = threading.Event()
+        run = functools.partial(
+            fleet.pulse,
+            period=args.period,
+            low_bri=args.low_bri,
+            stop=stop,
+            mode=args.mode,
+            on_edge=metrics.record_edge if metrics else None,
+            adaptive=args.adaptive,
+            per_light_rate=getattr(args, "per_light_rate", None),
+        )
+        try:
+            _fleet_results(fleet.fan_out(alerting, run, stop=stop), "alert")
+        except KeyboardInterrupt:
+            pass
+        _fleet_results(
+            fleet.fan_out(
+                alerting, lambda member: fleet.restore(member, frames[member.name])
+            ),
+            "restore",
+        )
+        print("Alert stopped and lights restored.")
+    finally:
+        for member in members:
+            member.close()
+
+
+def _fleet_set(
+    args: argparse.Namespace,
+    config_path: Path,
+    cfg: Config,
+    payload: dict,
+    metrics: Metrics | None = None,
+) -> None:
+    from . import fleet
+
+    members = _fleet(config_path, cfg, args.light_set, metrics)
+    try:
+        captured = _fleet_results(
+            fleet.fan_out(
+                members, functools.partial(fleet.capture, snapshot=args.snapshot)
+            ),
+            "snapshot",
+        )
+        updated = _fleet_results(
+            fleet.fan_out(
+                [member for member in members if member.name in captured],
+                functools.partial(fleet.set_state, payload=payload),
+            ),
+            "set",
+        )
+    finally:
+        for member in members:
+            member.close()
+    for name, light_ids in sorted(updated.items()):
+        print(f"Bridge {name}: {len(light_ids)} lights updated.")
+
+
+def _fleet_restore(
+    config_path: Path, cfg: Config, light_set: str, metrics: Metrics | None = None
+) -> None:
+    from . import fleet
+
+    members = _fleet(config_path, cfg, light_set, metrics)
+    try:
+        restored = _fleet_results(fleet.fan_out(members, fleet.restore), "restore")
+    finally:
+        for member in members:
+            member.close()
+    if not any(restored.values()):
         raise SystemExit("No saved state found. Run alert or set first.")
-    client = HueClient(cfg.bridge_ip, cfg.username)
-    for saved_light_id, state in last_state.lights.items():
-        light_id = state.light_id or saved_light_id or cfg.light_id
-        payload = {
-            key: value
-            for key, value in state.__dict__.items()
-            if key != "light_id" and value is not None
+    for name, light_ids in sorted(restored.items()):
+        if light_ids:
+            print(f"Bridge {name}: {len(light_ids)} lights restored.")
+
+
+def _parse_light_set(value: str) -> tuple[str, list[str]]:
+    name, sep, ids = value.partition("=")
+    light_ids = [light_id.strip() for light_id in ids.split(",") if light_id.strip()]
+    if not sep or not name or not light_ids:
+        raise argparse.ArgumentTypeError(f"expected NAME=ID,ID,..., got {value!r}")
+    return name, light_ids
+
+
+def cmd_bridge(args: argparse.Namespace) -> None:
+    config_path = _config_path_from_args(args)
+    if not config_path.exists():
+        raise SystemExit("No config found. Run setup first.")
+    cfg = load_config(config_path)
+    if args.bridge_command == "list":
+        bridges = {
+            MAIN_BRIDGE: BridgeConfig(cfg.bridge_ip, cfg.username, cfg.light_sets),
+            **cfg.bridges,
         }
-        if not payload:
-            continue
-        client.set_light_state(light_id, payload)
-    print("Light state restored.")
+        for name, bridge in sorted(bridges.items()):
+            sets = " ".join(
+                f"{set_name}={','.join(light_ids)}"
+                for set_name, light_ids in sorted(bridge.light_sets.items())
+            )
+            print(f"{name}\t{bridge.bridge_ip}\t{sets}")
+        return
+    if args.name == MAIN_BRIDGE:
+        raise SystemExit(
+            f"{MAIN_BRIDGE!r} is the bridge from setup; "
+            "use config --light-set to name its lights."
+        )
+    if args.bridge_command == "remove":
+        if cfg.bridges.pop(args.name, None) is None:
+            raise SystemExit(f"No bridge named {args.name!r}.")
+    else:
+        cfg.bridges[args.name] = BridgeConfig(
+            bridge_ip=args.bridge_ip,
+            username=args.username,
+            light_sets=dict(args.light_set or []),
+        )
+    save_config(config_path, cfg)
+    print(f"Saved config to {config_path}")
 
 
 def cmd_setup(args: argparse.Namespace) -> None:
@@ -209,20 +691,13 @@ def cmd_setup(args: argparse.Namespace) -> None:
         bridge_ip=args.bridge_ip,
         username=args.username,
         light_id=args.light_id,
+        group_id=args.group_id,
         non_interactive=args.non_interactive,
+        refresh_discovery=args.refresh,
     )
 
 
-def cmd_set(args: argparse.Namespace) -> None:
-    config_path = _config_path_from_args(args)
-    cfg = _ensure_config(config_path, non_interactive=args.non_interactive)
-    client = HueClient(cfg.bridge_ip, cfg.username)
-    light_id = args.light_id or cfg.light_id
-
-    state = client.get_light_state(light_id)
-    state.light_id = light_id
-    save_last_state(last_state_path(config_path), LastState(lights={light_id: state}))
-
+def _set_payload(args: argparse.Namespace) -> dict:
     payload: dict = {}
     if args.preset:
         payload.update(PRESETS[args.preset])
@@ -237,92 +712,366 @@ def cmd_set(args: argparse.Namespace) -> None:
 
     if not payload:
         raise SystemExit("No state provided. Use --on/--off, --bri, --hue, or --sat.")
+    return payload
+
+
+def cmd_set(args: argparse.Namespace) -> None:
+    config_path = _config_path_from_args(args)
+    cfg = _ensure_config(config_path, non_interactive=args.non_interactive)
+    payload = _set_payload(args)
+    metrics = _metrics(args)
+    try:
+        if getattr(args, "light_set", None):
+            _fleet_set(args, config_path, cfg, payload, metrics)
+        else:
+            _set_state(args, config_path, cfg, payload, metrics)
+    finally:
+        _write_metrics(args, metrics)
+
 
-    client.set_light_state(light_id, payload)
+def _set_state(
+    args: argparse.Namespace,
+    config_path: Path,
+    cfg: Config,
+    payload: dict,
+    metrics: Metrics | None = None,
+) -> None:
+    client = HueClient(
+        cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+    )
+    group_id = _resolve_group(args, cfg)
+    light_id = args.light_id or cfg.light_id
+
+    captured_ids = client.get_group_lights(group_id) if group_id else [light_id]
+    cache = _state_cache(config_path, cfg)
+    states = capture_states(client, captured_ids, cache)
+    _state_store(config_path).push(states, _scene_snapshot(args, client, captured_ids))
+    cache.invalidate(captured_ids)
+
+    sender = StateTracker(client, states)
+    if group_id:
+        sender.set_group_action(group_id, payload)
+        print(f"Group {group_id} updated.")
+        return
+    sender.set_light_state(light_id, payload)
     print(f"Light {light_id} updated.")
 
 
+def cmd_batch(args: argparse.Namespace) -> None:
+    from .batch import BatchRunner
+
+    config_path = _config_path_from_args(args)
+    cfg = _ensure_config(config_path, non_interactive=True)
+    lines = sys.stdin if args.input == "-" else open(args.input)
+    metrics = _metrics(args)
+    with (
+        HueClient(
+            cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+        ) as client,
+        lines,
+    ):
+        runner = BatchRunner(
+            client,
+            _state_store(config_path),
+            default_light_id=cfg.light_id,
+            default_group_id=cfg.group_id,
+            light_rate=args.light_rate,
+            group_rate=args.group_rate,
+            write=functools.partial(print, flush=True),
+        )
+        try:
+            failed = runner.run(lines)
+        finally:
+            _write_metrics(args, metrics)
+    if failed:
+        raise SystemExit(f"{failed} commands failed.")
+
+
 def _pulse_alert(
-    client: HueClient, light_ids: list[str], period: float, low_bri: int
+    client: HueClient,
+    light_ids: list[str],
+    period: float,
+    low_bri: int,
+    phases: dict[str, float] | None = None,
+    stop: threading.Event | None = None,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+    mode: str = "pulse",
+    on_edge: EdgeHook | None = None,
+    adaptive: bool = False,
+    per_light_rate: float | None = None,
+    budget: BridgeBudget | None = None,
 ) -> None:
     if period <= 0:
         raise SystemExit("--period must be greater than 0.")
-    half_period = period / 8
-    transition_time = max(1, int(half_period * 10))
-    high = {**RED_ALERT, "transitiontime": transition_time}
-    low = {**RED_ALERT, "bri": low_bri, "transitiontime": transition_time}
+    if mode == "native":
+        run_native(
+            client,
+            light_ids,
+            period,
+            low_bri,
+            stop=stop,
+            light_rate=light_rate,
+            group_rate=group_rate,
+            report=_print_pulse_stats,
+            on_edge=on_edge,
+            adaptive=adaptive,
+            per_light_rate=per_light_rate,
+            budget=budget,
+        )
+        return
+    tracks = pulse_tracks(light_ids, period, low_bri, phases)
+    run_pulse(
+        client,
+        tracks,
+        stop=stop,
+        light_rate=light_rate,
+        group_rate=group_rate,
+        report=_print_pulse_stats,
+        on_edge=on_edge,
+        adaptive=adaptive,
+        per_light_rate=per_light_rate,
+        budget=budget,
+    )
 
-    def pulse_once(light_id: str) -> None:
-        client.set_light_state(light_id, high)
-        time.sleep(half_period)
-        client.set_light_state(light_id, low)
-        time.sleep(half_period)
 
-    while True:
-        for light_id in light_ids:
-            pulse_once(light_id)
+def _metrics(args: argparse.Namespace) -> Metrics | None:
+    return Metrics() if getattr(args, "metrics_file", None) else None
 
 
-def _check_tcp(ip: str, port: int = 80, timeout: float = 2.0) -> str:
-    try:
-        with socket.create_connection((ip, port), timeout=timeout):
-            return "reachable"
-    except OSError as exc:
-        return f"unreachable ({exc})"
+def _write_metrics(args: argparse.Namespace, metrics: Metrics | None) -> None:
+    if metrics is not None:
+        metrics.write(Path(args.metrics_file))
+        print(f"Saved metrics to {args.metrics_file}")
+
+
+def _scene_snapshot(
+    args: argparse.Namespace, client: HueClient, light_ids: list[str]
+) -> str | None:
+    if getattr(args, "snapshot", "file") != "scene":
+        return None
+    return snapshot_scene(client, light_ids)
 
 
-def _check_http(ip: str, timeout: float = 2.0) -> str:
+def _print_pulse_stats(stats: DispatchStats) -> None:
+    print(
+        f"Pulse commands: {stats.sent} sent, {stats.merged} merged, "
+        f"{stats.dropped} dropped, {stats.errors} failed."
+    )
+
+
+def cmd_daemon(args: argparse.Namespace) -> None:
+    config_path = _config_path_from_args(args)
+    cfg = _ensure_config(config_path, non_interactive=True)
+    from .daemon import (
+        DEFAULT_DAEMON_HOST,
+        DEFAULT_DEBOUNCE,
+        DEFAULT_DAEMON_PORT,
+        AlertDaemon,
+        check_local_host,
+        daemon_info_path,
+        serve,
+    )
+    from .mirror import StateMirror
+
+    host = args.host or DEFAULT_DAEMON_HOST
+    try:
+        check_local_host(host)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    metrics = Metrics()
+    # The event stream needs HTTPS and streamed reads, which only requests has.
+    transport = "requests" if args.mirror else cfg.transport
+    client = HueClient(
+        cfg.bridge_ip, cfg.username, metrics=metrics, transport=transport
+    )
+    mirror = None
+    if args.mirror:
+        mirror = StateMirror(client, verify=args.bridge_ca or False)
+        mirror.start()
+    daemon = AlertDaemon(
+        config_path,
+        cfg,
+        client=client,
+        light_rate=args.light_rate,
+        group_rate=args.group_rate,
+        mirror=mirror,
+        metrics=metrics,
+        debounce=DEFAULT_DEBOUNCE if args.debounce is None else args.debounce,
+    )
+    server = serve(
+        daemon,
+        host=host,
+        port=DEFAULT_DAEMON_PORT if args.port is None else args.port,
+    )
+    host, port = server.server_address[:2]
+    print(f"Daemon listening on http://{host}:{port}")
     try:
-        resp = requests.get(f"http://{ip}/api/config", timeout=timeout)
-        return f"http {resp.status_code}"
-    except requests.RequestException as exc:
-        return f"http error ({exc})"
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        daemon_info_path(config_path).unlink(missing_ok=True)
+        print("Daemon stopped.")
+
+
+def cmd_trigger(args: argparse.Namespace) -> None:
+    from .daemon import send_command
+
+    params: dict = {}
+    if args.action == "alert":
+        params = {
+            "period": args.period,
+            "low_bri": args.low_bri,
+            "urgent": args.urgent,
+            "group": args.group,
+            "mode": args.mode,
+            "adaptive": args.adaptive,
+            "priority": args.priority,
+            "key": args.key,
+        }
+    elif args.action == "restore" and args.key:
+        params = {"key": args.key}
+    elif args.action == "set":
+        params = {
+            "light_id": args.light_id,
+            "group": args.group,
+            "payload": _set_payload(args),
+        }
+
+    config_path = _config_path_from_args(args)
+    try:
+        result = send_command(config_path, args.action, params)
+    except RuntimeError as exc:
+        raise SystemExit(f"Daemon error: {exc}")
+    if result is None:
+        print("No daemon running; running locally.")
+        {"alert": cmd_alert, "restore": cmd_restore, "set": cmd_set}[args.action](args)
+        return
+    if result.get("pending"):
+        print(f"Daemon: {args.action} sent; it did not answer in time.")
+        return
+    print(f"Daemon: {args.action} ok.")
+
+
+def cmd_mock_bridge(args: argparse.Namespace) -> None:
+    from .mockbridge import DEFAULT_USERNAME, MockBridge, MockBridgeOptions
+
+    options = MockBridgeOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        light_rate=args.light_rate,
+        group_rate=args.group_rate,
+        drop_rate=args.drop_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    username = args.username or DEFAULT_USERNAME
+    bridge = MockBridge(lights=args.lights, username=username, options=options)
+    print(
+        f"Mock bridge on http://{args.host}:{args.port} "
+        f"(username {username}, {args.lights} lights)"
+    )
+    try:
+        bridge.serve_forever(host=args.host, port=args.port)
+    except KeyboardInterrupt:
+        print(f"Mock bridge stopped. {bridge.stats}")
+
+
+def cmd_bench(args: argparse.Namespace) -> None:
+    import json
+
+    from .bench import run_benchmarks
+
+    report = run_benchmarks(
+        lights=args.lights,
+        commands=args.commands,
+        latency=args.latency,
+        period=args.period,
+        duration=args.duration,
+        cold_runs=args.cold_runs,
+        light_rate=args.light_rate,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+        print(f"Saved benchmark results to {args.output}")
+    else:
+        print(text)
+
+
+def _diagnose_bridge(
+    bridge: dict, host_ip: str | None, samples: int, cfg: Config | None
+) -> list[str]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .diagnose import check_http, check_tcp, format_summary, sample_bridge
+
+    ip = bridge.get("internalipaddress", "")
+    bridge_id = bridge.get("id", "unknown")
+    lines = [f"- Bridge {bridge_id} at {ip}"]
+    if not ip:
+        lines.append("  tcp: unknown (missing IP)")
+        return lines
+    if host_ip:
+        if _same_subnet(host_ip, ip):
+            lines.append("  subnet: same")
+        else:
+            lines.append("  subnet: different")
+    transport = cfg.transport if cfg is not None else DEFAULT_TRANSPORT
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        tcp = pool.submit(check_tcp, ip)
+        http = pool.submit(check_http, ip, transport=transport)
+        lines.append(f"  tcp: {tcp.result()}")
+        lines.append(f"  http: {http.result()}")
+    if samples > 0:
+        known = cfg is not None and cfg.bridge_ip == ip
+        results = sample_bridge(
+            ip,
+            samples,
+            username=cfg.username if known else None,
+            light_id=cfg.light_id if known else None,
+            transport=transport,
+        )
+        for name, summary in results.items():
+            lines.append(format_summary(name, summary))
+    return lines
 
 
 def cmd_diagnose(args: argparse.Namespace) -> None:
-    local_ip = _local_ip()
-    if local_ip:
-        print(f"Local IP: {local_ip}")
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .discovery import discover, local_ip
+
+    host_ip = local_ip()
+    if host_ip:
+        print(f"Local IP: {host_ip}")
     else:
         print("Local IP: unknown")
 
+    config_path = _config_path_from_args(args)
     print("Discovering Hue bridges...")
-    try:
-        bridges = discover_bridges()
-    except requests.RequestException as exc:
-        raise SystemExit(f"Discovery failed: {exc}")
+    bridges = discover(config_path, refresh=args.refresh)
 
     if not bridges:
         raise SystemExit("No Hue bridges found via discovery.")
 
-    for bridge in bridges:
-        ip = bridge.get("internalipaddress", "")
-        bridge_id = bridge.get("id", "unknown")
-        print(f"- Bridge {bridge_id} at {ip}")
-        if not ip:
-            print("  tcp: unknown (missing IP)")
-            continue
-        if local_ip:
-            if _same_subnet(local_ip, ip):
-                print("  subnet: same")
-            else:
-                print("  subnet: different")
-        print(f"  tcp: {_check_tcp(ip)}")
-        print(f"  http: {_check_http(ip)}")
+    cfg = load_config(config_path) if config_path.exists() else None
+    # Probe every bridge at once so one dead bridge costs one timeout in total.
+    with ThreadPoolExecutor(max_workers=len(bridges)) as pool:
+        reports = [
+            pool.submit(_diagnose_bridge, bridge, host_ip, args.samples, cfg)
+            for bridge in bridges
+        ]
+        for report in reports:
+            print("\n".join(report.result()))
 
     print("If tcp is unreachable, your device cannot reach the bridge on the LAN.")
     print("Common causes: guest Wi-Fi, AP isolation, different subnet, or VPN.")
 
 
-def _local_ip() -> str | None:
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.connect(("8.8.8.8", 80))
-            return sock.getsockname()[0]
-    except OSError:
-        return None
-
-
 def _same_subnet(ip_a: str, ip_b: str) -> bool:
     parts_a = ip_a.split(".")
     parts_b = ip_b.split(".")
@@ -331,6 +1080,144 @@ def _same_subnet(ip_a: str, ip_b: str) -> bool:
     return parts_a[:3] == parts_b[:3]
 
 
+def _add_non_interactive_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="Fail instead of prompting when config is missing",
+    )
+
+
+def _add_alert_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--period",
+        type=float,
+        default=2.0,
+        help="Seconds per pulse cycle (default: 2.0)",
+    )
+    parser.add_argument(
+        "--low-bri",
+        type=int,
+        default=80,
+        help="Low brightness level during pulse (default: 80)",
+    )
+    parser.add_argument(
+        "--urgent",
+        action="store_true",
+        help="Alternate between the red PC light and the armoire light",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=ALERT_MODES,
+        default="pulse",
+        help="pulse: drive each edge from this host; native: let the bridge "
+        "breathe the lights, refreshed every ~15 s (default: pulse)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Time bridge round trips and slow the pulse down when they "
+        "would make commands queue up",
+    )
+
+
+def _add_rate_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--light-rate",
+        type=float,
+        default=BRIDGE_LIGHT_RATE,
+        help="Max light commands per second to the bridge (default: 10)",
+    )
+    parser.add_argument(
+        "--group-rate",
+        type=float,
+        default=BRIDGE_GROUP_RATE,
+        help="Max group commands per second to the bridge (default: 1)",
+    )
+
+
+def _add_per_light_rate_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--per-light-rate",
+        type=float,
+        help="Max commands per second to any one light or group, within the "
+        "bridge budget (default: no extra limit)",
+    )
+
+
+def _add_set_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--light-id", help="Light ID to control (defaults to config)")
+    parser.add_argument(
+        "--preset",
+        choices=sorted(PRESETS.keys()),
+        help="Apply a color preset",
+    )
+    parser.add_argument(
+        "--on",
+        dest="on",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Turn the light on",
+    )
+    parser.add_argument(
+        "--off",
+        dest="on",
+        action="store_const",
+        const=False,
+        default=None,
+        help="Turn the light off",
+    )
+    parser.add_argument("--bri", type=int, help="Brightness 1-254")
+    parser.add_argument("--hue", type=int, help="Hue 0-65535")
+    parser.add_argument("--sat", type=int, help="Saturation 0-254")
+
+
+def _add_refresh_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached discovery results and search the network again",
+    )
+
+
+def _add_snapshot_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--snapshot",
+        choices=SNAPSHOT_MODES,
+        default="file",
+        help="scene: also save the lights as a temporary bridge scene, restored "
+        "exactly (xy/ct too) with one command (default: file)",
+    )
+
+
+def _add_group_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--group",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="ID",
+        help="Target a room or zone with one group command (defaults to config)",
+    )
+
+
+def _add_metrics_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Write request and pulse timing metrics to this JSON file on exit",
+    )
+
+
+def _add_light_set_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--light-set",
+        metavar="NAME",
+        help="Target this named light set on every configured bridge, in parallel",
+    )
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="coco-attention",
@@ -351,6 +1238,27 @@ def build_parser() -> argparse.ArgumentParser:
     p_config.add_argument("--bridge-ip", required=True)
     p_config.add_argument("--username", required=True)
     p_config.add_argument("--light-id", required=True)
+    p_config.add_argument("--group-id", help="Room or zone ID for --group alerts")
+    p_config.add_argument(
+        "--state-ttl",
+        type=float,
+        help="Seconds a captured light state is reused; 0 disables "
+        "(default: keep the saved one, else 2.0)",
+    )
+    p_config.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        help="HTTP stack for bridge requests; http uses only the standard "
+        "library (default: keep the saved one, else requests)",
+    )
+    p_config.add_argument(
+        "--light-set",
+        action="append",
+        type=_parse_light_set,
+        metavar="NAME=ID,ID",
+        help="Named set of light IDs on this bridge, for --light-set commands "
+        "(repeatable; default: keep the saved ones)",
+    )
     p_config.set_defaults(func=cmd_config)
 
     p_setup = sub.add_parser(
@@ -360,14 +1268,24 @@ def build_parser() -> argparse.ArgumentParser:
     p_setup.add_argument("--bridge-ip")
     p_setup.add_argument("--username")
     p_setup.add_argument("--light-id")
+    p_setup.add_argument("--group-id")
     p_setup.add_argument(
         "--non-interactive",
         action="store_true",
         help="Fail instead of prompting; requires explicit values",
     )
+    _add_refresh_argument(p_setup)
     p_setup.set_defaults(func=cmd_setup)
 
     p_diag = sub.add_parser("diagnose", help="Check Hue bridge reachability")
+    p_diag.add_argument(
+        "--samples",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Time N TCP, HTTP and light-command round trips and report percentiles",
+    )
+    _add_refresh_argument(p_diag)
     p_diag.set_defaults(func=cmd_diagnose)
 
     p_lights = sub.add_parser("list-lights", help="List light IDs and names")
@@ -375,71 +1293,225 @@ def build_parser() -> argparse.ArgumentParser:
     p_lights.add_argument("--username")
     p_lights.set_defaults(func=cmd_list_lights)
 
+    p_groups = sub.add_parser("list-groups", help="List room and zone IDs")
+    p_groups.add_argument("--bridge-ip")
+    p_groups.add_argument("--username")
+    p_groups.set_defaults(func=cmd_list_groups)
+
+    p_bridge = sub.add_parser(
+        "bridge", help="Manage extra bridges and their named light sets"
+    )
+    bridge_sub = p_bridge.add_subparsers(dest="bridge_command", required=True)
+    p_bridge_add = bridge_sub.add_parser("add", help="Add or replace a bridge")
+    p_bridge_add.add_argument("name")
+    p_bridge_add.add_argument("--bridge-ip", required=True)
+    p_bridge_add.add_argument("--username", required=True)
+    p_bridge_add.add_argument(
+        "--light-set",
+        action="append",
+        type=_parse_light_set,
+        metavar="NAME=ID,ID",
+        help="Named set of light IDs on this bridge (repeatable)",
+    )
+    p_bridge_remove = bridge_sub.add_parser("remove", help="Forget a bridge")
+    p_bridge_remove.add_argument("name")
+    bridge_sub.add_parser("list", help="List bridges and their light sets")
+    p_bridge.set_defaults(func=cmd_bridge)
+
     p_alert = sub.add_parser("alert", help="Set the light to red")
-    p_alert.add_argument(
-        "--period",
-        type=float,
-        default=2.0,
-        help="Seconds per pulse cycle (default: 2.0)",
+    _add_alert_arguments(p_alert)
+    _add_rate_arguments(p_alert)
+    _add_per_light_rate_argument(p_alert)
+    _add_group_argument(p_alert)
+    _add_light_set_argument(p_alert)
+    _add_metrics_argument(p_alert)
+    _add_snapshot_argument(p_alert)
+    _add_non_interactive_argument(p_alert)
+    p_alert.set_defaults(func=cmd_alert)
+
+    p_effect = sub.add_parser(
+        "effect", help="Play a built-in or JSON-defined light effect"
     )
-    p_alert.add_argument(
-        "--low-bri",
-        type=int,
-        default=80,
-        help="Low brightness level during pulse (default: 80)",
+    p_effect.add_argument(
+        "effect",
+        help=f"Effect name ({', '.join(sorted(EFFECTS))}) or path to a JSON file",
     )
-    p_alert.add_argument(
-        "--non-interactive",
+    p_effect.add_argument(
+        "--light-ids", help="Comma-separated light IDs (defaults to config)"
+    )
+    p_effect.add_argument(
+        "--loops", type=int, help="Cycles to play before restoring (default: effect's)"
+    )
+    p_effect.add_argument(
+        "--check",
         action="store_true",
-        help="Fail instead of prompting when config is missing",
+        help="Print the compiled timeline and command rate, then exit",
     )
-    p_alert.add_argument(
-        "--urgent",
+    p_effect.add_argument(
+        "--stream",
         action="store_true",
-        help="Alternate between the red PC light and the armoire light",
+        help="Send frames over the Entertainment UDP stream to the --group "
+        "Entertainment area instead of REST commands (plain UDP: a real "
+        "bridge also needs DTLS)",
     )
-    p_alert.set_defaults(func=cmd_alert)
+    p_effect.add_argument(
+        "--frame-rate",
+        type=float,
+        help="Frames per second with --stream, up to 50 (default: 25)",
+    )
+    p_effect.add_argument(
+        "--stream-port",
+        type=int,
+        help="Bridge UDP port for --stream (default: 2100)",
+    )
+    _add_rate_arguments(p_effect)
+    _add_per_light_rate_argument(p_effect)
+    _add_group_argument(p_effect)
+    _add_snapshot_argument(p_effect)
+    _add_metrics_argument(p_effect)
+    _add_non_interactive_argument(p_effect)
+    p_effect.set_defaults(func=cmd_effect)
 
     p_restore = sub.add_parser("restore", help="Restore the last captured state")
-    p_restore.add_argument(
-        "--non-interactive",
-        action="store_true",
-        help="Fail instead of prompting when config is missing",
-    )
+    _add_light_set_argument(p_restore)
+    _add_metrics_argument(p_restore)
+    _add_non_interactive_argument(p_restore)
     p_restore.set_defaults(func=cmd_restore)
 
     p_set = sub.add_parser("set", help="Set any light state and save previous state")
-    p_set.add_argument("--light-id", help="Light ID to control (defaults to config)")
-    p_set.add_argument(
-        "--preset",
-        choices=sorted(PRESETS.keys()),
-        help="Apply a color preset",
+    _add_set_arguments(p_set)
+    _add_group_argument(p_set)
+    _add_light_set_argument(p_set)
+    _add_metrics_argument(p_set)
+    _add_snapshot_argument(p_set)
+    _add_non_interactive_argument(p_set)
+    p_set.set_defaults(func=cmd_set)
+
+    p_batch = sub.add_parser(
+        "batch", help="Run JSON Lines commands from a file or stdin in one process"
     )
-    p_set.add_argument(
-        "--on",
-        dest="on",
-        action="store_const",
-        const=True,
-        default=None,
-        help="Turn the light on",
+    p_batch.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="File of commands, one JSON object per line (default: stdin)",
     )
-    p_set.add_argument(
-        "--off",
-        dest="on",
-        action="store_const",
-        const=False,
-        default=None,
-        help="Turn the light off",
+    _add_rate_arguments(p_batch)
+    _add_metrics_argument(p_batch)
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_daemon = sub.add_parser(
+        "daemon", help="Keep a warm bridge connection and accept triggers"
     )
-    p_set.add_argument("--bri", type=int, help="Brightness 1-254")
-    p_set.add_argument("--hue", type=int, help="Hue 0-65535")
-    p_set.add_argument("--sat", type=int, help="Saturation 0-254")
-    p_set.add_argument(
-        "--non-interactive",
+    # Defaults live in daemon.py, which is only imported to run the daemon.
+    p_daemon.add_argument(
+        "--host",
+        help="Loopback address to listen on (default: 127.0.0.1); the daemon "
+        "has no authentication, so other hosts are refused",
+    )
+    p_daemon.add_argument("--port", type=int, help="Port to listen on (default: 47841)")
+    p_daemon.add_argument(
+        "--mirror",
         action="store_true",
-        help="Fail instead of prompting when config is missing",
+        help="Track light state from the bridge event stream instead of polling",
     )
-    p_set.set_defaults(func=cmd_set)
+    p_daemon.add_argument(
+        "--bridge-ca",
+        metavar="PATH",
+        help="CA bundle to check the bridge certificate with for --mirror "
+        "(default: accept its self-signed certificate)",
+    )
+    p_daemon.add_argument(
+        "--debounce",
+        type=float,
+        help="Seconds to gather alert triggers before re-arbitrating (default: 0.25)",
+    )
+    _add_rate_arguments(p_daemon)
+    p_daemon.set_defaults(func=cmd_daemon)
+
+    p_mock = sub.add_parser(
+        "mock-bridge", help="Run a local fake Hue bridge for testing and benchmarks"
+    )
+    p_mock.add_argument("--host", default="127.0.0.1")
+    p_mock.add_argument("--port", type=int, default=8080)
+    p_mock.add_argument("--lights", type=int, default=3)
+    p_mock.add_argument("--username", help="Username to accept (default: mockuser)")
+    p_mock.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every request"
+    )
+    p_mock.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random delay up to N seconds"
+    )
+    p_mock.add_argument(
+        "--light-rate", type=float, help="Light commands/s before replying 429"
+    )
+    p_mock.add_argument(
+        "--group-rate", type=float, help="Group commands/s before replying 429"
+    )
+    p_mock.add_argument(
+        "--drop-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered by dropping the connection",
+    )
+    p_mock.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with HTTP 500",
+    )
+    p_mock.add_argument("--seed", type=int, help="Random seed for fault injection")
+    p_mock.set_defaults(func=cmd_mock_bridge)
+
+    p_bench = sub.add_parser(
+        "bench", help="Benchmark alert, set and restore against a mock bridge"
+    )
+    p_bench.add_argument("--lights", type=int, default=10)
+    p_bench.add_argument(
+        "--commands", type=int, default=200, help="set_light_state calls to time"
+    )
+    p_bench.add_argument(
+        "--latency", type=float, default=0.0, help="Mock bridge latency per request"
+    )
+    p_bench.add_argument("--period", type=float, default=2.0)
+    p_bench.add_argument(
+        "--duration",
+        type=float,
+        default=5.0,
+        help="Seconds of pulsing to measure (0 skips)",
+    )
+    p_bench.add_argument(
+        "--cold-runs", type=int, default=5, help="CLI cold starts to time (0 skips)"
+    )
+    p_bench.add_argument(
+        "--light-rate", type=float, default=BRIDGE_LIGHT_RATE, help="Pulse rate limit"
+    )
+    p_bench.add_argument("--output", help="Write the JSON report to this file")
+    p_bench.set_defaults(func=cmd_bench)
+
+    p_trigger = sub.add_parser(
+        "trigger",
+        help="Forward alert/restore/set to a running daemon (runs locally otherwise)",
+    )
+    p_trigger.add_argument("action", choices=["alert", "restore", "set"])
+    _add_alert_arguments(p_trigger)
+    _add_rate_arguments(p_trigger)
+    _add_set_arguments(p_trigger)
+    _add_group_argument(p_trigger)
+    p_trigger.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="Alerts with a higher priority take over lights from lower ones "
+        "(default: 0)",
+    )
+    p_trigger.add_argument(
+        "--key",
+        help="Name for this alert: repeats with the same key are merged, and "
+        "`trigger restore --key` ends only this alert",
+    )
+    _add_non_interactive_argument(p_trigger)
+    p_trigger.set_defaults(func=cmd_trigger)
 
     return parser
 
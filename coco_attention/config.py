@@ -1,12 +1,32 @@
 from __future__ import annotations
 
+import contextlib
 import json
-from dataclasses import dataclass, asdict
+import os
+import time
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
 
 
 DEFAULT_CONFIG_PATH = Path.home() / ".config" / "coco_attention" / "config.json"
+DEFAULT_STATE_TTL = 2.0  # Seconds a captured light state may be reused
+MAX_STATE_DEPTH = 16  # Snapshots kept per light; middle ones are folded
+DEFAULT_TRANSPORT = "requests"  # HueClient HTTP stack; "http" is stdlib-only
+MAIN_BRIDGE = "main"  # Fleet name of the bridge at Config.bridge_ip
+
+
+@dataclass
+class BridgeConfig:
+    bridge_ip: str
+    username: str
+    light_sets: dict[str, list[str]] = field(default_factory=dict)  # Name -> light IDs
 
 
 @dataclass
@@ -14,11 +34,24 @@ class Config:
     bridge_ip: str
     username: str
     light_id: str
+    group_id: Optional[str] = None
+    state_ttl: float = DEFAULT_STATE_TTL
+    transport: str = DEFAULT_TRANSPORT
+    bridges: dict[str, BridgeConfig] = field(
+        default_factory=dict
+    )  # Extra bridges by name
+    light_sets: dict[str, list[str]] = field(
+        default_factory=dict
+    )  # Named light sets on the main bridge
 
 
 @dataclass
 class LastState:
     lights: dict[str, LightState]  # Mapping of light IDs to their last known state
+    scene_id: Optional[str] = None  # Bridge scene holding the same snapshot, if any
+    orphaned_scenes: list[str] = field(
+        default_factory=list
+    )  # Snapshot scenes no frame refers to any more; callers delete them
 
 
 @dataclass
@@ -36,30 +69,84 @@ def load_config(path: Path) -> Config:
         bridge_ip=data["bridge_ip"],
         username=data["username"],
         light_id=str(data["light_id"]),
+        group_id=_optional_str(data.get("group_id")),
+        state_ttl=float(data.get("state_ttl", DEFAULT_STATE_TTL)),
+        transport=str(data.get("transport", DEFAULT_TRANSPORT)),
+        bridges={
+            str(name): BridgeConfig(
+                bridge_ip=bridge["bridge_ip"],
+                username=bridge["username"],
+                light_sets={
+                    str(set_name): [str(light_id) for light_id in light_ids]
+                    for set_name, light_ids in bridge.get("light_sets", {}).items()
+                },
+            )
+            for name, bridge in data.get("bridges", {}).items()
+        },
+        light_sets={
+            str(set_name): [str(light_id) for light_id in light_ids]
+            for set_name, light_ids in data.get("light_sets", {}).items()
+        },
     )
 
 
 def save_config(path: Path, config: Config) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(
-            {
-                "bridge_ip": config.bridge_ip,
-                "username": config.username,
-                "light_id": config.light_id,
-            },
-            indent=2,
-        )
-    )
+    data = {
+        "bridge_ip": config.bridge_ip,
+        "username": config.username,
+        "light_id": config.light_id,
+    }
+    if config.group_id is not None:
+        data["group_id"] = config.group_id
+    if config.state_ttl != DEFAULT_STATE_TTL:
+        data["state_ttl"] = config.state_ttl
+    if config.transport != DEFAULT_TRANSPORT:
+        data["transport"] = config.transport
+    if config.bridges:
+        data["bridges"] = {
+            name: asdict(bridge) for name, bridge in sorted(config.bridges.items())
+        }
+    if config.light_sets:
+        data["light_sets"] = config.light_sets
+    path.write_text(json.dumps(data, indent=2))
+
+
+def _optional_str(value: object) -> Optional[str]:
+    return None if value is None else str(value)
 
 
 def last_state_path(config_path: Path) -> Path:
     return config_path.with_name("last_state.json")
 
 
-def save_last_state(path: Path, state: LastState) -> None:
+def bridge_state_path(config_path: Path, bridge_name: str) -> Path:
+    return config_path.with_name(f"last_state.{bridge_name}.json")
+
+
+def _write_json_atomic(path: Path, data: object) -> None:
+    # Readers see either the old file or the new one, never a partial write.
+    import tempfile  # Only writers need it; keeps CLI start-up lean
+
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(asdict(state), indent=2))
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w") as handle:
+            json.dump(data, handle, indent=2)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def save_last_state(path: Path, state: LastState) -> None:
+    data = asdict(state)
+    if state.scene_id is None:
+        del data["scene_id"]
+    if not state.orphaned_scenes:
+        del data["orphaned_scenes"]
+    _write_json_atomic(path, data)
 
 
 def load_last_state(path: Path) -> LastState:
@@ -70,6 +157,188 @@ def load_last_state(path: Path) -> LastState:
             if light_data.get("light_id") is None:
                 light_data["light_id"] = light_id
             lights[light_id] = LightState(**light_data)
-        return LastState(lights=lights)
+        return LastState(
+            lights=lights,
+            scene_id=data.get("scene_id"),
+            orphaned_scenes=list(data.get("orphaned_scenes", [])),
+        )
     light_id = data.get("light_id")
     return LastState(lights={light_id or "": LightState(**data)})
+
+
+def _try_lock(handle) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path, timeout: float) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+") as handle:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(handle):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for {path}.")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            _unlock(handle)
+
+
+class StateStore:
+    """last_state.json shared safely by concurrent CLI runs and the daemon.
+
+    Every capture is pushed as a numbered frame onto a per-light stack, so
+    nested or overlapping alerts unwind in order. Popping the newest frame
+    returns its states for restoring. Popping a frame that is buried under a
+    later one (an outer alert ending first) restores nothing. Instead its
+    states are passed up to the frame above, which captured them mid-alert,
+    so they are the ones eventually restored.
+
+    Folding a frame at MAX_STATE_DEPTH or popping a buried one drops its
+    snapshot scene. Such scene ids are kept under "orphaned_scenes" and handed
+    out by the next pop, so the caller can delete them from the bridge.
+
+    Writes hold an exclusive lock on a sidecar file and replace the state file
+    atomically. Reads take no lock. The top-level "lights" key keeps the
+    newest state per light so load_last_state still reads the file.
+    """
+
+    def __init__(self, path: Path, timeout: float = 5.0) -> None:
+        self.path = path
+        self.lock_path = path.with_name(f"{path.name}.lock")
+        self.timeout = timeout
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {"next_frame": 1, "stacks": {}}
+        if "stacks" in data:
+            return data
+        # A plain LastState file becomes one frame.
+        legacy = load_last_state(self.path)
+        return {
+            "next_frame": 2,
+            "stacks": {
+                light_id: [{"frame": 1, "state": asdict(state), "scene_id": None}]
+                for light_id, state in legacy.lights.items()
+            },
+        }
+
+    def _write(self, data: dict) -> None:
+        stacks = {
+            light_id: stack for light_id, stack in data["stacks"].items() if stack
+        }
+        data["stacks"] = stacks
+        data["lights"] = {
+            light_id: stack[-1]["state"] for light_id, stack in stacks.items()
+        }
+        _write_json_atomic(self.path, data)
+
+    @staticmethod
+    def _scene_ids(data: dict) -> set[str]:
+        return {
+            entry["scene_id"]
+            for stack in data["stacks"].values()
+            for entry in stack
+            if entry["scene_id"]
+        }
+
+    def peek(self) -> LastState:
+        """The newest saved state of every light."""
+        stacks = self._read()["stacks"]
+        return LastState(
+            lights={
+                light_id: LightState(**stack[-1]["state"])
+                for light_id, stack in stacks.items()
+                if stack
+            }
+        )
+
+    def depth(self, light_id: str) -> int:
+        return len(self._read()["stacks"].get(light_id, []))
+
+    def push(self, states: dict[str, LightState], scene_id: str | None = None) -> int:
+        """Save a capture as a new frame and return the frame number."""
+        with _file_lock(self.lock_path, self.timeout):
+            data = self._read()
+            before = self._scene_ids(data)
+            frame = data["next_frame"]
+            data["next_frame"] = frame + 1
+            for light_id, state in states.items():
+                entry = {
+                    "frame": frame,
+                    "state": asdict(
+                        LightState(**{**asdict(state), "light_id": light_id})
+                    ),
+                    "scene_id": scene_id,
+                }
+                stack = data["stacks"].setdefault(light_id, [])
+                stack.append(entry)
+                if len(stack) > MAX_STATE_DEPTH:
+                    # Fold the oldest middle frame into the one above, as if
+                    # its alert had ended, so the bottom frame (the state from
+                    # before any alert) is never lost.
+                    folded = stack.pop(1)
+                    stack[1]["state"] = folded["state"]
+                    stack[1]["scene_id"] = None
+            orphaned = before - self._scene_ids(data)
+            if orphaned:
+                data["orphaned_scenes"] = data.get("orphaned_scenes", []) + sorted(
+                    orphaned
+                )
+            self._write(data)
+        return frame
+
+    def pop(self, frame: int | None = None) -> LastState:
+        """Remove a frame (the newest if None) and return what to restore now."""
+        with _file_lock(self.lock_path, self.timeout):
+            data = self._read()
+            before = self._scene_ids(data)
+            stacks = data["stacks"]
+            if frame is None:
+                frame = max(
+                    (stack[-1]["frame"] for stack in stacks.values() if stack),
+                    default=None,
+                )
+            restore: dict[str, LightState] = {}
+            scenes = set()
+            buried = False
+            for light_id, stack in stacks.items():
+                for pos, entry in enumerate(stack):
+                    if entry["frame"] != frame:
+                        continue
+                    if pos == len(stack) - 1:
+                        restore[light_id] = LightState(**entry["state"])
+                        scenes.add(entry["scene_id"])
+                    else:
+                        # The frame above captured this light mid-alert; it
+                        # must unwind to what this frame saved instead.
+                        stack[pos + 1]["state"] = entry["state"]
+                        stack[pos + 1]["scene_id"] = None
+                        buried = True
+                    del stack[pos]
+                    break
+            # A scene also covers the buried lights, so only use it when the
+            # whole frame is being restored.
+            scene_id = scenes.pop() if len(scenes) == 1 and not buried else None
+            orphaned = data.pop("orphaned_scenes", [])
+            orphaned += sorted(before - self._scene_ids(data) - {scene_id})
+            if frame is not None or orphaned:
+                self._write(data)
+        return LastState(lights=restore, scene_id=scene_id, orphaned_scenes=orphaned)
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from .alert import (
+    ALERT_MODES,
+    SNAPSHOT_MODES,
+    alternating_phases,
+    capture_states,
+    delete_scenes,
+    pulse_tracks,
+    restore_payloads,
+    restore_scene,
+    restored_states,
+    run_native,
+    run_pulse,
+    snapshot_scene,
+)
+from .cache import StateCache, state_cache_path
+from .config import DEFAULT_CONFIG_PATH, StateStore, last_state_path, load_config
+from .delta import StateTracker
+from .dispatch import BRIDGE_GROUP_RATE, BRIDGE_LIGHT_RATE, BridgeBudget, send_all
+from .hue import HueClient, group_target
+from .metrics import Metrics
+from .scheduler import EdgeHook
+
+if TYPE_CHECKING:
+    from .mirror import StateMirror
+
+
+class AlertHandle:
+    """One running alert. stop() ends it and puts its lights back.
+
+    Also a context manager (sync and async) that stops on exit. Inside a
+    coroutine use stop_async(), which restores on a worker thread.
+    """
+
+    def __init__(
+        self,
+        controller: AlertController,
+        targets: list[str],
+        light_ids: list[str],
+        frame: int | None,
+        stop_event: threading.Event,
+    ) -> None:
+        self.controller = controller
+        self.targets = targets
+        self.light_ids = light_ids  # Lights captured for restore
+        self.frame = frame  # StateStore frame; None when nothing was captured
+        self.error: BaseException | None = None
+        self._stop_event = stop_event
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self._stop_lock = threading.Lock()
+
+    def __enter__(self) -> AlertHandle:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    async def __aenter__(self) -> AlertHandle:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop_async()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the alert ends by itself or is stopped; False on timeout."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def stop(self, restore: bool = True, timeout: float | None = None) -> list[str]:
+        """Stop pulsing and, unless restore is False, restore the captured lights.
+
+        Returns the lights restored. Only the first call does anything, so
+        it is safe to call from several places.
+        """
+        with self._stop_lock:
+            if self._stopped:
+                return []
+            self._stopped = True
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.controller._forget(self)
+        if not restore or self.frame is None:
+            return []
+        return self.controller._restore(self.frame)
+
+    async def stop_async(self, restore: bool = True) -> list[str]:
+        return await asyncio.to_thread(self.stop, restore)
+
+    def _run(self, run: Callable[[], object]) -> None:
+        try:
+            run()
+        except Exception as exc:  # noqa: BLE001 - reported through .error
+            self.error = exc
+
+
+class AlertController:
+    """Start alerts from Python without blocking, over one shared HueClient.
+
+    Every alert pulses on its own background thread, while all of them share
+    the client's connection pool, one StateTracker and one BridgeBudget.
+    Restores are sent under the same budget, so together they stay within
+    the bridge's command rate. Captures go onto the same StateStore stack as the CLI, so overlapping
+    alerts restore in order. Closing the controller (or leaving its `with`
+    block) stops every running alert and restores its lights.
+    """
+
+    def __init__(
+        self,
+        client: HueClient,
+        store: StateStore,
+        cache: StateCache | StateMirror | None = None,
+        default_light_id: str | None = None,
+        light_rate: float = BRIDGE_LIGHT_RATE,
+        group_rate: float = BRIDGE_GROUP_RATE,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.client = client
+        self.sender = StateTracker(client)
+        self.store = store
+        self.cache: StateCache | StateMirror = cache or StateCache()
+        self.default_light_id = default_light_id
+        self.budget = BridgeBudget(light_rate, group_rate)
+        self.metrics = metrics
+        self._owns_client = False
+        self._lock = threading.Lock()
+        self._handles: list[AlertHandle] = []
+
+    @classmethod
+    def from_config(
+        cls, config_path: Path = DEFAULT_CONFIG_PATH, metrics: Metrics | None = None
+    ) -> AlertController:
+        """A controller for the saved bridge, sharing the CLI's state files."""
+        cfg = load_config(config_path)
+        client = HueClient(
+            cfg.bridge_ip, cfg.username, metrics=metrics, transport=cfg.transport
+        )
+        controller = cls(
+            client,
+            StateStore(last_state_path(config_path)),
+            cache=StateCache(state_cache_path(config_path), ttl=cfg.state_ttl),
+            default_light_id=cfg.light_id,
+            metrics=metrics,
+        )
+        controller._owns_client = True
+        return controller
+
+    def __enter__(self) -> AlertController:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> AlertController:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.to_thread(self.close)
+
+    @property
+    def alerts(self) -> list[AlertHandle]:
+        with self._lock:
+            return list(self._handles)
+
+    def alert(
+        self,
+        light_ids: list[str] | None = None,
+        group_id: str | None = None,
+        period: float = 2.0,
+        low_bri: int = 80,
+        mode: str = "pulse",
+        snapshot: str | None = "file",
+        adaptive: bool = False,
+        on_edge: EdgeHook | None = None,
+    ) -> AlertHandle:
+        """Capture the lights, start pulsing them in the background and return.
+
+        snapshot is "file", "scene" (also save a bridge scene) or None to
+        skip capturing, when the caller restores the lights itself.
+        """
+        if period <= 0:
+            raise ValueError("period must be greater than 0.")
+        if mode not in ALERT_MODES:
+            raise ValueError(f"Unknown alert mode: {mode}")
+        if snapshot is not None and snapshot not in SNAPSHOT_MODES:
+            raise ValueError(f"Unknown snapshot mode: {snapshot}")
+        if group_id:
+            targets = [group_target(group_id)]
+            captured = self.client.get_group_lights(group_id)
+        else:
+            targets = list(light_ids or [])
+            if not targets and self.default_light_id:
+                targets = [self.default_light_id]
+            if not targets:
+                raise ValueError("No lights to alert.")
+            captured = targets
+
+        frame = None
+        if snapshot is not None:
+            states = capture_states(self.client, captured, self.cache)
+            self.sender.remember(states)
+            scene_id = None
+            if snapshot == "scene":
+                scene_id = snapshot_scene(self.client, captured)
+            frame = self.store.push(states, scene_id)
+            self.cache.invalidate(captured)
+
+        stop = threading.Event()
+        handle = AlertHandle(self, targets, list(captured), frame, stop)
+        on_edge = on_edge or (self.metrics.record_edge if self.metrics else None)
+        if mode == "native":
+
+            def run() -> object:
+                return run_native(
+                    self.sender,
+                    targets,
+                    period,
+                    low_bri,
+                    stop=stop,
+                    budget=self.budget,
+                    on_edge=on_edge,
+                    adaptive=adaptive,
+                )
+
+        else:
+            tracks = pulse_tracks(targets, period, low_bri, alternating_phases(targets))
+
+            def run() -> object:
+                return run_pulse(
+                    self.sender,
+                    tracks,
+                    stop=stop,
+                    budget=self.budget,
+                    on_edge=on_edge,
+                    adaptive=adaptive,
+                )
+
+        handle._thread = threading.Thread(
+            target=handle._run, args=(run,), name="alert", daemon=True
+        )
+        with self._lock:
+            self._handles.append(handle)
+        handle._thread.start()
+        return handle
+
+    async def alert_async(self, *args, **kwargs) -> AlertHandle:
+        """alert() for coroutines: the capture runs on a worker thread."""
+        return await asyncio.to_thread(self.alert, *args, **kwargs)
+
+    def stop_all(self, restore: bool = True) -> list[str]:
+        """Stop every running alert, newest first, so snapshots unwind in order."""
+        restored: list[str] = []
+        for handle in reversed(self.alerts):
+            restored += handle.stop(restore)
+        return restored
+
+    def close(self) -> None:
+        self.stop_all()
+        if self._owns_client:
+            self.client.close()
+
+    def _forget(self, handle: AlertHandle) -> None:
+        with self._lock:
+            if handle in self._handles:
+                self._handles.remove(handle)
+
+    def _restore(self, frame: int) -> list[str]:
+        last_state = self.store.pop(frame)
+        delete_scenes(self.client, last_state.orphaned_scenes)
+        # Empty when a newer alert on the same lights now holds this snapshot.
+        if not last_state.lights:
+            return []
+        payloads = restore_payloads(last_state)
+        if last_state.scene_id and restore_scene(self.client, last_state.scene_id):
+            self.sender.forget(list(payloads))
+            self.cache.invalidate(list(payloads))
+        else:
+            # The light may have been changed by hand; send the whole snapshot.
+            self.sender.forget(list(payloads))
+            send_all(self.sender.send, payloads, budget=self.budget)
+            self.cache.put(restored_states(payloads))
+        return sorted(payloads)
@@ -0,0 +1,570 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dataclasses import dataclass
+from pathlib import Path
+
+from .alert import (
+    ALERT_MODES,
+    URGENT_LIGHT_ID,
+    capture_states,
+    delete_scenes,
+    restore_payloads,
+    restore_scene,
+    restored_states,
+)
+from .cache import StateCache, state_cache_path
+from .controller import AlertController, AlertHandle
+from .config import (
+    Config,
+    LastState,
+    LightState,
+    StateStore,
+    last_state_path,
+)
+from .dispatch import BRIDGE_GROUP_RATE, BRIDGE_LIGHT_RATE, send_all
+from .hue import HueClient, group_target
+from .metrics import Metrics
+from .mirror import StateMirror
+
+
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 47841
+ACTIONS = ("alert", "restore", "set")
+# Alert requests arriving this soon after the last re-arbitration wait and are
+# applied together, so a storm of triggers restarts the pulses at most once
+# per window. The first request of a quiet spell is applied at once.
+DEFAULT_DEBOUNCE = 0.25
+
+
+@dataclass
+class AlertRequest:
+    """One distinct alert asked of the daemon; repeats of it are merged in."""
+
+    key: str
+    priority: int
+    targets: list[str]
+    captured: list[str]  # Lights behind the targets, for snapshot and restore
+    period: float
+    low_bri: int
+    mode: str
+    adaptive: bool
+    seq: int  # Arrival order; the older request wins a priority tie
+    named: bool = False  # Key chosen by the caller, who can release it by name
+    count: int = 1
+
+    def pulse(self) -> tuple:
+        return (self.period, self.low_bri, self.mode, self.adaptive)
+
+
+def request_key(params: dict) -> str:
+    """Requests with the same key are duplicates. Callers may name their own."""
+    if params.get("key"):
+        return str(params["key"])
+    fields = ("light_id", "group", "urgent", "period", "low_bri", "mode", "adaptive")
+    return json.dumps({name: params.get(name) for name in fields}, sort_keys=True)
+
+
+def daemon_info_path(config_path: Path) -> Path:
+    return config_path.with_name("daemon.json")
+
+
+class AlertDaemon:
+    """Warm, long-lived owner of a HueClient that runs alerts on request.
+
+    Alert requests are deduplicated by key and re-arbitrated at most once per
+    debounce window. Each light is pulsed only by the highest-priority request
+    that covers it; the others wait and take over when it is released. Lights
+    that share pulse settings share one pulse, so bridge load depends on the
+    lights and settings in play, not on how many requests arrived.
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        cfg: Config,
+        client: HueClient | None = None,
+        light_rate: float = BRIDGE_LIGHT_RATE,
+        group_rate: float = BRIDGE_GROUP_RATE,
+        mirror: StateMirror | None = None,
+        metrics: Metrics | None = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ) -> None:
+        self.config_path = config_path
+        self.cfg = cfg
+        # Pass the same Metrics to a supplied client to have its requests counted.
+        self.metrics = metrics or Metrics()
+        self.client = client or HueClient(
+            cfg.bridge_ip, cfg.username, metrics=self.metrics, transport=cfg.transport
+        )
+        self.mirror = mirror
+        self.cache: StateCache | StateMirror = mirror or StateCache(
+            state_cache_path(config_path), ttl=cfg.state_ttl
+        )
+        if mirror is not None:
+            mirror.subscribe(self._on_light_change)
+        self.store = StateStore(last_state_path(config_path))
+        # The controller runs the pulses; the daemon keeps the snapshot, so a
+        # new alert can take over lights without re-reading them.
+        self.controller = AlertController(
+            self.client,
+            self.store,
+            cache=self.cache,
+            default_light_id=cfg.light_id,
+            light_rate=light_rate,
+            group_rate=group_rate,
+            metrics=self.metrics,
+        )
+        # Commands go through the tracker so pulses and restores only carry
+        # the attributes that actually change.
+        self.sender = self.controller.sender
+        self.last_error: str | None = None
+        self.overridden: set[str] = set()
+        self._alert_started = 0.0
+        self._grace = 0.0
+        self._lock = threading.RLock()
+        self._snapshot: dict[str, LightState] = {}
+        self._frames: list[int] = []  # StateStore frames holding _snapshot
+        self.debounce = debounce
+        self._requests: dict[str, AlertRequest] = {}
+        self._seq = 0
+        # Running pulses by (pulse settings, targets).
+        self._handles: dict[tuple, AlertHandle] = {}
+        self._applied = float("-inf")
+        self._timer: threading.Timer | None = None
+
+    def handle(self, action: str, params: dict) -> dict:
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        return getattr(self, action)(params)
+
+    def status(self) -> dict:
+        with self._lock:
+            handles = list(self._handles.values())
+            for handle in handles:
+                if handle.error is not None:
+                    self.last_error = str(handle.error)
+            return {
+                "alerting": any(handle.running for handle in handles),
+                "targets": sorted(
+                    target for handle in handles for target in handle.targets
+                ),
+                "snapshot": sorted(self._snapshot),
+                "last_error": self.last_error,
+                "overridden": sorted(self.overridden),
+                "requests": [
+                    {
+                        "key": request.key,
+                        "priority": request.priority,
+                        "targets": request.targets,
+                        "count": request.count,
+                    }
+                    for request in self._ranked()
+                ],
+            }
+
+    def _group_id(self, params: dict) -> str | None:
+        group = params.get("group")
+        if group is None:
+            return None
+        group_id = group or self.cfg.group_id
+        if not group_id:
+            raise ValueError("No group configured.")
+        return str(group_id)
+
+    def _remember(self, light_ids: list[str]) -> None:
+        # Lights already under an alert keep their pre-alert snapshot; only
+        # newly targeted lights are read from the bridge.
+        missing = [light_id for light_id in light_ids if light_id not in self._snapshot]
+        if missing:
+            captured = capture_states(self.client, missing, self.cache)
+            self._snapshot.update(captured)
+            self.sender.remember(captured)
+            self.cache.invalidate(missing)
+            self._frames.append(self.store.push(captured))
+
+    def _stop_alert(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._requests = {}
+        self._stop_pulses(list(self._handles))
+
+    def _stop_pulses(self, keys: list[tuple]) -> None:
+        for key in keys:
+            handle = self._handles.pop(key)
+            # The daemon restores from its own snapshot, not the handle's.
+            handle.stop(restore=False)
+            if handle.error is not None:
+                self.last_error = str(handle.error)
+
+    def alert(self, params: dict) -> dict:
+        period = float(params.get("period", 2.0))
+        low_bri = int(params.get("low_bri", 80))
+        mode = str(params.get("mode") or "pulse")
+        priority = int(params.get("priority") or 0)
+        if period <= 0:
+            raise ValueError("period must be greater than 0.")
+        if mode not in ALERT_MODES:
+            raise ValueError(f"Unknown alert mode: {mode}")
+        key = request_key(params)
+        with self._lock:
+            existing = self._requests.get(key)
+            if existing is not None and not params.get("key"):
+                # A duplicate: count it, but touch neither bridge nor pulses
+                # unless it raises the priority.
+                existing.count += 1
+                if priority > existing.priority:
+                    existing.priority = priority
+                    self._schedule_apply()
+                return self._accepted(existing)
+            group_id = self._group_id(params)
+            if group_id:
+                targets = [group_target(group_id)]
+                captured = self.client.get_group_lights(group_id)
+            else:
+                targets = [str(params.get("light_id") or self.cfg.light_id)]
+                if params.get("urgent"):
+                    targets.append(URGENT_LIGHT_ID)
+                captured = targets
+            if not self._requests:
+                self.last_error = None
+                self.overridden.clear()
+            self._seq += 1
+            request = AlertRequest(
+                key=key,
+                priority=priority,
+                targets=targets,
+                captured=captured,
+                period=period,
+                low_bri=low_bri,
+                mode=mode,
+                adaptive=bool(params.get("adaptive")),
+                seq=self._seq,
+                named=bool(params.get("key")),
+            )
+            if existing is not None:
+                # A named request was sent again: it keeps its place in line.
+                request.seq = existing.seq
+                request.count = existing.count + 1
+                request.priority = max(priority, existing.priority)
+            self._requests[key] = request
+            self._schedule_apply()
+            return self._accepted(request)
+
+    def _accepted(self, request: AlertRequest) -> dict:
+        result = {"ok": True, "targets": request.targets, "merged": request.count - 1}
+        if request.named:
+            result["key"] = request.key
+        return result
+
+    def _ranked(self) -> list[AlertRequest]:
+        return sorted(
+            self._requests.values(),
+            key=lambda request: (-request.priority, request.seq),
+        )
+
+    def _schedule_apply(self) -> None:
+        if self._timer is not None:
+            return  # The pending re-arbitration will see this request too
+        wait = self._applied + self.debounce - time.monotonic()
+        if wait <= 0:
+            self._apply()
+            return
+        self._timer = threading.Timer(wait, self._apply_pending)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            if self._timer is None:
+                return  # Cancelled by a restore
+            self._timer = None
+            try:
+                self._apply()
+            except Exception as exc:  # noqa: BLE001 - reported through status
+                self.last_error = str(exc)
+
+    def _apply(self) -> None:
+        """Give every target to its best request and bring the pulses in line."""
+        self._applied = time.monotonic()
+        # Lights, not targets, are arbitrated: a group and one of its member
+        # lights are the same bulb.
+        ranked = self._ranked()
+        owners: dict[str, AlertRequest] = {}
+        for request in ranked:
+            for light_id in request.captured:
+                owners.setdefault(light_id, request)
+        plan: dict[tuple, list[str]] = {}
+        for request in ranked:
+            owned = [light for light in request.captured if owners[light] is request]
+            if not owned:
+                continue
+            # One group command while the request holds the whole group;
+            # otherwise only the lights it still owns.
+            targets = request.targets if len(owned) == len(request.captured) else owned
+            plan.setdefault(request.pulse(), []).extend(targets)
+        wanted = {(pulse, tuple(targets)) for pulse, targets in plan.items()}
+        self._stop_pulses([key for key in self._handles if key not in wanted])
+
+        covered = {
+            light for request in self._requests.values() for light in request.captured
+        }
+        self._release([light for light in self._snapshot if light not in covered])
+        self._remember(sorted(covered))
+
+        started = False
+        for key in wanted - set(self._handles):
+            (period, low_bri, mode, adaptive), targets = key
+            self._handles[key] = self.controller.alert(
+                list(targets),
+                period=period,
+                low_bri=low_bri,
+                mode=mode,
+                snapshot=None,
+                adaptive=adaptive,
+            )
+            started = True
+        if started:
+            self._alert_started = time.monotonic()
+            # Our own first edges recolour the lights; only later colour
+            # changes can be someone else's.
+            self._grace = max(
+                1.0, max(request.period for request in self._requests.values())
+            )
+
+    def _release(self, light_ids: list[str]) -> None:
+        """Put back lights no request covers any more, while others still alert."""
+        if not light_ids or not self._requests:
+            return  # A full restore handles the last request
+        payloads = restore_payloads(
+            LastState(
+                lights={
+                    light_id: self._snapshot.pop(light_id) for light_id in light_ids
+                }
+            )
+        )
+        # The tracker may think a field is already set when someone changed it
+        # by hand, so send the whole snapshot, within the budget the remaining
+        # pulses are still using.
+        self.sender.forget(list(payloads))
+        send_all(self.sender.send, payloads, budget=self.controller.budget)
+        self.cache.put(restored_states(payloads))
+
+    def _on_light_change(self, light_id: str, changes: dict, state) -> None:
+        with self._lock:
+            if not self._handles or light_id not in self._snapshot:
+                return
+            in_grace = time.monotonic() - self._alert_started < self._grace
+            if changes.get("on") is False or (changes.get("color") and not in_grace):
+                # Someone changed the light by hand; restoring it would undo
+                # their change, so drop it from the restore snapshot.
+                del self._snapshot[light_id]
+                self.overridden.add(light_id)
+                self.sender.forget([light_id])
+                print(f"Light {light_id} changed by hand during the alert.")
+
+    def restore(self, params: dict | None = None) -> dict:
+        key = (params or {}).get("key")
+        with self._lock:
+            if key:
+                if key not in self._requests:
+                    raise ValueError(f"No alert with key {key!r}.")
+                del self._requests[key]
+                if self._requests:
+                    # Waiting requests take over its lights; the rest go back.
+                    before = set(self._snapshot)
+                    self._apply()
+                    return {
+                        "ok": True,
+                        "restored": sorted(before - set(self._snapshot)),
+                    }
+            self._stop_alert()
+            if self._frames:
+                unwound: set[str] = set()
+                for frame in reversed(self._frames):
+                    popped = self.store.pop(frame)
+                    unwound.update(popped.lights)
+                    delete_scenes(self.client, popped.orphaned_scenes)
+                # The snapshot holds each light's newest pre-alert state, even
+                # after a release and re-capture. Lights changed by hand were
+                # dropped from it, and lights a newer CLI alert holds are not
+                # unwound; both are left as they are.
+                last_state = LastState(
+                    lights={
+                        light_id: state
+                        for light_id, state in self._snapshot.items()
+                        if light_id in unwound
+                    }
+                )
+                self._frames = []
+            else:
+                last_state = self.store.pop()
+                delete_scenes(self.client, last_state.orphaned_scenes)
+                if not last_state.lights:
+                    raise ValueError("No saved state found.")
+            payloads = restore_payloads(last_state, default_light_id=self.cfg.light_id)
+            if last_state.scene_id and restore_scene(self.client, last_state.scene_id):
+                self.sender.forget()
+                self.cache.invalidate(list(payloads))
+            else:
+                # Send the whole snapshot, not what the tracker thinks differs.
+                self.sender.forget(list(payloads))
+                send_all(self.sender.send, payloads, budget=self.controller.budget)
+                self.cache.put(restored_states(payloads))
+            self._snapshot = {}
+        return {"ok": True, "restored": sorted(payloads)}
+
+    def set(self, params: dict) -> dict:
+        payload = params.get("payload") or {}
+        if not payload:
+            raise ValueError("No state provided.")
+        with self._lock:
+            group_id = self._group_id(params)
+            if group_id:
+                captured = self.client.get_group_lights(group_id)
+            else:
+                light_id = str(params.get("light_id") or self.cfg.light_id)
+                captured = [light_id]
+            if not self._requests:
+                # Outside an alert `set` starts a fresh undo point, as the CLI does.
+                self._snapshot = {}
+                self._frames = []
+            self._remember(captured)
+            if group_id:
+                self.sender.set_group_action(group_id, payload)
+                return {"ok": True, "group": group_id}
+            self.sender.set_light_state(light_id, payload)
+        return {"ok": True, "light": light_id}
+
+    def close(self, restore: bool = True) -> None:
+        with self._lock:
+            alerting = bool(self._requests or self._handles)
+            self._stop_alert()
+        if restore and alerting and self._snapshot:
+            self.restore()
+        if self.mirror is not None:
+            self.mirror.stop()
+        self.client.close()
+
+
+class _DaemonHandler(BaseHTTPRequestHandler):
+    server: _DaemonServer
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip("/")
+        if path == "/status":
+            self._reply(200, {"ok": True, **self.server.daemon.status()})
+        elif path == "/metrics":
+            data = self.server.daemon.metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._reply(404, {"ok": False, "error": "not found"})
+
+    def do_POST(self) -> None:
+        action = self.path.strip("/")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            self._reply(200, self.server.daemon.handle(action, params))
+        except (ValueError, KeyError) as exc:
+            self._reply(400, {"ok": False, "error": str(exc)})
+        except Exception as exc:  # noqa: BLE001 - bridge failures go to the client
+            self._reply(502, {"ok": False, "error": str(exc)})
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], daemon: AlertDaemon) -> None:
+        self.daemon = daemon
+        super().__init__(address, _DaemonHandler)
+
+
+def check_local_host(host: str) -> None:
+    """Refuse addresses other hosts could reach: the endpoint has no auth."""
+    if host == "localhost":
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(
+            f"The daemon only listens on a loopback address, not {host!r}: "
+            "anyone who can reach it can start alerts and set lights."
+        )
+
+
+def serve(
+    daemon: AlertDaemon,
+    host: str = DEFAULT_DAEMON_HOST,
+    port: int = DEFAULT_DAEMON_PORT,
+) -> ThreadingHTTPServer:
+    check_local_host(host)
+    server = _DaemonServer((host, port), daemon)
+    bound_host, bound_port = server.server_address[:2]
+    info_path = daemon_info_path(daemon.config_path)
+    info_path.parent.mkdir(parents=True, exist_ok=True)
+    info_path.write_text(
+        json.dumps({"host": bound_host, "port": bound_port, "pid": os.getpid()})
+    )
+    return server
+
+
+def send_command(
+    config_path: Path, action: str, params: dict | None = None, timeout: float = 10.0
+) -> dict | None:
+    """Forward an action to a running daemon; None when no daemon answers.
+
+    A reply that times out after the request went through still counts as
+    handled: the daemon has the action, so running it locally would repeat
+    it. The result then only holds {"ok": True, "pending": True}.
+    """
+    info_path = daemon_info_path(config_path)
+    try:
+        info = json.loads(info_path.read_text())
+    except (OSError, ValueError):
+        return None
+    url = f"http://{info['host']}:{info['port']}/{action}"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(params or {}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        body = json.loads(exc.read() or b"{}")
+        raise RuntimeError(body.get("error") or f"daemon returned {exc.code}")
+    except urllib.error.URLError:
+        # Raised while connecting or sending, so the daemon never saw it.
+        return None
+    # socket.timeout is only an alias of TimeoutError from Python 3.10 on.
+    except (socket.timeout, TimeoutError):
+        return {"ok": True, "pending": True}
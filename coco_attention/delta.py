@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from .config import LightState
+from .hue import HueClient, group_target, is_group_target
+
+
+# Actions rather than state: the bridge acts on them every time they are sent.
+ALWAYS_SENT = ("alert",)
+# Only meaningful alongside a change, never worth a request on their own.
+MODIFIERS = ("transitiontime",)
+_UNKNOWN = object()
+
+
+@dataclass
+class DeltaStats:
+    sent: int = 0
+    skipped: int = 0
+    fields_saved: int = 0
+
+
+def _known_fields(state: LightState) -> dict:
+    return {
+        key: value
+        for key, value in state.__dict__.items()
+        if key != "light_id" and value is not None
+    }
+
+
+class StateTracker:
+    """HueClient front that sends only the attributes a target does not already have.
+
+    It remembers the last state sent to (or read from) each light or group.
+    Commands are trimmed to the fields that differ and dropped entirely when
+    nothing would change. A light command makes group entries stale, and a
+    group command makes light entries stale, so those are forgotten. Anything
+    not overridden here is passed through to the wrapped client.
+    """
+
+    def __init__(
+        self, client: HueClient, known: dict[str, LightState] | None = None
+    ) -> None:
+        self.client = client
+        self.stats = DeltaStats()
+        self._lock = threading.Lock()
+        self._known: dict[str, dict] = {}
+        if known:
+            self.remember(known)
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def remember(self, states: dict[str, LightState]) -> None:
+        with self._lock:
+            for light_id, state in states.items():
+                self._known[state.light_id or light_id] = _known_fields(state)
+
+    def forget(self, targets: list[str] | None = None) -> None:
+        with self._lock:
+            if targets is None:
+                self._known.clear()
+            for target in targets or []:
+                self._known.pop(target, None)
+
+    def delta(self, target: str, payload: dict) -> dict:
+        with self._lock:
+            known = self._known.get(target, {})
+            changed = {
+                key: value
+                for key, value in payload.items()
+                if key in ALWAYS_SENT
+                or (key not in MODIFIERS and known.get(key, _UNKNOWN) != value)
+            }
+        if changed:
+            changed.update({key: payload[key] for key in MODIFIERS if key in payload})
+        return changed
+
+    def _sent(self, target: str, delta: dict) -> None:
+        state = {
+            key: value
+            for key, value in delta.items()
+            if key not in ALWAYS_SENT and key not in MODIFIERS
+        }
+        with self._lock:
+            group = is_group_target(target)
+            for other in list(self._known):
+                if other != target and is_group_target(other) != group:
+                    del self._known[other]
+            self._known.setdefault(target, {}).update(state)
+
+    def send(self, target: str, payload: dict, timeout: float | None = None) -> bool:
+        """Send what differs; False means nothing did and no request was made."""
+        delta = self.delta(target, payload)
+        with self._lock:
+            self.stats.fields_saved += len(payload) - len(delta)
+            if not delta:
+                self.stats.skipped += 1
+                return False
+            self.stats.sent += 1
+        try:
+            self.client.send(target, delta, timeout)
+        except Exception:
+            # The bridge may have applied part of it; assume nothing.
+            self.forget([target])
+            raise
+        self._sent(target, delta)
+        return True
+
+    def set_light_state(
+        self, light_id: str, payload: dict, timeout: float | None = None
+    ) -> None:
+        self.send(light_id, payload, timeout)
+
+    def set_group_action(
+        self, group_id: str, payload: dict, timeout: float | None = None
+    ) -> None:
+        self.send(group_target(group_id), payload, timeout)
+
+    def send_checked(
+        self, target: str, payload: dict, timeout: float | None = None
+    ) -> list[str]:
+        # Rejected attributes leave the target in an unknown mix of old and new.
+        self.forget([target])
+        errors = self.client.send_checked(target, payload, timeout)
+        self._sent(target, {})
+        return errors
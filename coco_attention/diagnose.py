@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import socket
+import time
+from typing import Callable
+
+from .config import DEFAULT_TRANSPORT
+from .hue import HueClient
+from .stats import summarize
+
+
+def check_tcp(ip: str, port: int = 80, timeout: float = 2.0) -> str:
+    try:
+        with socket.create_connection((ip, port), timeout=timeout):
+            return "reachable"
+    except OSError as exc:
+        return f"unreachable ({exc})"
+
+
+def check_http(
+    ip: str, timeout: float = 2.0, transport: str = DEFAULT_TRANSPORT
+) -> str:
+    try:
+        with HueClient(ip, "", pool_size=1, transport=transport) as client:
+            resp = client.session.get(f"http://{ip}/api/config", timeout=timeout)
+        return f"http {resp.status_code}"
+    except OSError as exc:  # Both transports' request errors are OSErrors
+        return f"http error ({exc})"
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def _sample(func: Callable[[], object], samples: int) -> dict:
+    durations: list[float] = []
+    failures = 0
+    for _ in range(samples):
+        try:
+            durations.append(_timed(func))
+        except (OSError, RuntimeError):
+            failures += 1
+    return {**summarize(durations), "failures": failures}
+
+
+def sample_bridge(
+    ip: str,
+    samples: int,
+    username: str | None = None,
+    light_id: str | None = None,
+    timeout: float = 2.0,
+    port: int = 80,
+    transport: str = DEFAULT_TRANSPORT,
+) -> dict[str, dict]:
+    """Time TCP connect, /api/config and (when credentials are known) a
+    harmless authenticated light command, ``samples`` times each.
+
+    The command re-sends the light's current `on` value, so it changes
+    nothing, not even a running alert or native breathe.
+    """
+
+    host = ip if port == 80 else f"{ip}:{port}"
+
+    def connect() -> None:
+        socket.create_connection((ip, port), timeout=timeout).close()
+
+    results = {"tcp": _sample(connect, samples)}
+    with HueClient(
+        host, username or "", pool_size=1, timeout=timeout, transport=transport
+    ) as client:
+
+        def config() -> None:
+            client.session.get(
+                f"http://{host}/api/config", timeout=timeout
+            ).raise_for_status()
+
+        results["http"] = _sample(config, samples)
+        if username and light_id:
+            try:
+                on = client.get_light_state(light_id).on
+            except (OSError, RuntimeError):
+                on = None
+            if on is not None:
+                results["command"] = _sample(
+                    lambda: client.set_light_state(light_id, {"on": on}), samples
+                )
+    return results
+
+
+def format_summary(name: str, summary: dict) -> str:
+    if not summary.get("count"):
+        return f"  {name}: no successful samples ({summary['failures']} failed)"
+    ms = {key: summary[key] * 1000 for key in ("p50", "p95", "p99", "max")}
+    line = (
+        f"  {name}: p50 {ms['p50']:.1f} ms, p95 {ms['p95']:.1f} ms, "
+        f"p99 {ms['p99']:.1f} ms, max {ms['max']:.1f} ms"
+    )
+    if summary["failures"]:
+        line += f" ({summary['failures']} failed)"
+    return line
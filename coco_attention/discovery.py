@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+
+DISCOVERY_TTL = 24 * 60 * 60.0
+MDNS_ADDR = ("224.0.0.251", 5353)
+MDNS_SERVICE = "_hue._tcp.local"
+SSDP_ADDR = ("239.255.255.250", 1900)
+SSDP_SEARCH = (
+    "M-SEARCH * HTTP/1.1\r\n"
+    "HOST: 239.255.255.250:1900\r\n"
+    'MAN: "ssdp:discover"\r\n'
+    "MX: 1\r\n"
+    "ST: upnp:rootdevice\r\n"
+    "\r\n"
+).encode()
+PROBE_TIMEOUT = 0.6
+PROBE_WORKERS = 64
+
+
+def discovery_cache_path(config_path: Path) -> Path:
+    return config_path.with_name("discovery.json")
+
+
+def _bridge(ip: str, bridge_id: str | None = None) -> dict:
+    return {"id": bridge_id or "unknown", "internalipaddress": ip}
+
+
+def _merge(*results: list[dict]) -> list[dict]:
+    merged: dict[str, dict] = {}
+    for bridges in results:
+        for bridge in bridges:
+            ip = bridge.get("internalipaddress", "")
+            if not ip:
+                continue
+            known = merged.get(ip)
+            if known is None or known.get("id") == "unknown":
+                merged[ip] = bridge
+    return list(merged.values())
+
+
+def local_ip() -> str | None:
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            # No packet is sent; this only asks the kernel for the outbound route.
+            sock.connect(("8.8.8.8", 80))
+            return sock.getsockname()[0]
+    except OSError:
+        pass
+    try:
+        ip = socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return None
+    return None if ip.startswith("127.") else ip
+
+
+def mdns_query(service: str = MDNS_SERVICE) -> bytes:
+    header = struct.pack("!HHHHHH", 0, 0, 1, 0, 0, 0)
+    name = b"".join(
+        bytes([len(label)]) + label.encode() for label in service.split(".")
+    )
+    return header + name + b"\x00" + struct.pack("!HH", 12, 1)  # PTR, IN
+
+
+def _bridge_id_from_packet(packet: bytes) -> str | None:
+    marker = packet.find(b"bridgeid=")
+    if marker < 0:
+        return None
+    start = marker + len(b"bridgeid=")
+    end = start
+    while end < len(packet) and chr(packet[end]).isalnum():
+        end += 1
+    return packet[start:end].decode().upper() or None
+
+
+def _collect(
+    sock: socket.socket, timeout: float, parse: Callable[[bytes, str], dict | None]
+) -> list[dict]:
+    bridges: list[dict] = []
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return bridges
+        sock.settimeout(remaining)
+        try:
+            packet, (ip, _port) = sock.recvfrom(9000)
+        except OSError:
+            return bridges
+        bridge = parse(packet, ip)
+        if bridge is not None:
+            bridges.append(bridge)
+
+
+def _parse_mdns(packet: bytes, ip: str) -> dict | None:
+    if len(packet) < 12 or not packet[2] & 0x80:  # responses only
+        return None
+    if b"_hue" not in packet:
+        return None
+    return _bridge(ip, _bridge_id_from_packet(packet))
+
+
+def discover_mdns(timeout: float = 1.0) -> list[dict]:
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+            sock.sendto(mdns_query(), MDNS_ADDR)
+            return _collect(sock, timeout, _parse_mdns)
+    except OSError:
+        return []
+
+
+def parse_ssdp(packet: bytes, ip: str) -> dict | None:
+    text = packet.decode(errors="replace")
+    headers = {}
+    for line in text.split("\r\n")[1:]:
+        key, sep, value = line.partition(":")
+        if sep:
+            headers[key.strip().lower()] = value.strip()
+    bridge_id = headers.get("hue-bridgeid")
+    if bridge_id is None and "IpBridge" not in headers.get("server", ""):
+        return None
+    return _bridge(ip, bridge_id)
+
+
+def discover_ssdp(timeout: float = 1.0) -> list[dict]:
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            sock.sendto(SSDP_SEARCH, SSDP_ADDR)
+            return _collect(sock, timeout, parse_ssdp)
+    except OSError:
+        return []
+
+
+def probe_bridge(
+    ip: str, port: int = 80, timeout: float = PROBE_TIMEOUT
+) -> dict | None:
+    conn = http.client.HTTPConnection(ip, port, timeout=timeout)
+    try:
+        conn.request("GET", "/api/config")
+        resp = conn.getresponse()
+        if resp.status != 200:
+            return None
+        data = json.loads(resp.read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    if not isinstance(data, dict) or "bridgeid" not in data:
+        return None
+    return _bridge(ip, str(data["bridgeid"]))
+
+
+def subnet_hosts(ip: str) -> list[str]:
+    network = ipaddress.ip_network(f"{ip}/24", strict=False)
+    return [str(host) for host in network.hosts() if str(host) != ip]
+
+
+def probe_hosts(
+    hosts: list[str], port: int = 80, timeout: float = PROBE_TIMEOUT
+) -> list[dict]:
+    if not hosts:
+        return []
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(hosts))) as pool:
+        results = pool.map(lambda host: probe_bridge(host, port, timeout), hosts)
+        return [bridge for bridge in results if bridge is not None]
+
+
+def discover_local(timeout: float = 1.0, probe: bool = True) -> list[dict]:
+    """Find bridges on the LAN without internet access.
+
+    mDNS and SSDP run side by side; the /24 sweep only runs when neither
+    answered, since it is the slowest and noisiest option.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        mdns = pool.submit(discover_mdns, timeout)
+        ssdp = pool.submit(discover_ssdp, timeout)
+        bridges = _merge(mdns.result(), ssdp.result())
+    if bridges or not probe:
+        return bridges
+    ip = local_ip()
+    return probe_hosts(subnet_hosts(ip)) if ip else []
+
+
+def load_discovery_cache(path: Path, ttl: float = DISCOVERY_TTL) -> list[dict] | None:
+    try:
+        data = json.loads(path.read_text())
+        age = time.time() - float(data["at"])
+        bridges = data["bridges"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not 0 <= age <= ttl or not isinstance(bridges, list) or not bridges:
+        return None
+    return bridges
+
+
+def save_discovery_cache(path: Path, bridges: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp_path.write_text(json.dumps({"at": time.time(), "bridges": bridges}, indent=2))
+    os.replace(tmp_path, path)
+
+
+def discover(
+    config_path: Path | None = None,
+    ttl: float = DISCOVERY_TTL,
+    refresh: bool = False,
+    cloud: bool = True,
+) -> list[dict]:
+    """Cached discovery: cache file, then LAN (mDNS/SSDP/probe), then the cloud."""
+    cache_path = discovery_cache_path(config_path) if config_path else None
+    if cache_path is not None and not refresh:
+        cached = load_discovery_cache(cache_path, ttl)
+        if cached:
+            return cached
+
+    bridges = discover_local()
+    if not bridges and cloud:
+        from .hue import discover_bridges
+
+        try:
+            bridges = discover_bridges()
+        except Exception:  # noqa: BLE001 - offline networks are expected here
+            bridges = []
+    if bridges and cache_path is not None:
+        save_discovery_cache(cache_path, bridges)
+    return bridges
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .hue import is_group_target
+from .scheduler import MAX_CONSECUTIVE_ERRORS
+
+
+# Philips' guidance for the v1 API: ~10 light commands/s, ~1 group command/s.
+BRIDGE_LIGHT_RATE = 10.0
+BRIDGE_GROUP_RATE = 1.0
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 when one is available now)."""
+        self._refill()
+        return max(0.0, (1.0 - self._tokens) / self.rate)
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1.0
+
+
+class BridgeBudget:
+    """One bridge's light and group budgets, shared by all its dispatchers.
+
+    Alerts that run side by side each have their own dispatcher; giving them
+    the same budget keeps their combined rate within what the bridge allows.
+    """
+
+    def __init__(
+        self,
+        light_rate: float = BRIDGE_LIGHT_RATE,
+        group_rate: float = BRIDGE_GROUP_RATE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.light_bucket = TokenBucket(light_rate, clock=clock)
+        self.group_bucket = TokenBucket(group_rate, clock=clock)
+        self.lock = threading.Lock()
+
+
+@dataclass
+class DispatchStats:
+    submitted: int = 0
+    sent: int = 0
+    merged: int = 0
+    dropped: int = 0
+    errors: int = 0
+    last_error: BaseException | None = field(default=None, repr=False)
+
+
+class CommandDispatcher:
+    """Rate-limited, coalescing queue in front of a HueClient-style sender.
+
+    At most one command per target is pending; a newer submit for the same
+    target is merged into it so only the latest state reaches the bridge.
+    A background thread drains the queue within the bridge-wide light and
+    group budgets and an optional per-light budget (--per-light-rate), which
+    keeps one busy light from taking the whole bridge budget. Pass a shared
+    BridgeBudget instead of rates when other dispatchers use the same bridge.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], None],
+        light_rate: float = BRIDGE_LIGHT_RATE,
+        group_rate: float = BRIDGE_GROUP_RATE,
+        per_light_rate: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        budget: BridgeBudget | None = None,
+    ) -> None:
+        self.send = send
+        self.clock = clock
+        self.per_light_rate = per_light_rate
+        self.budget = budget or BridgeBudget(light_rate, group_rate, clock=clock)
+        self.stats = DispatchStats()
+        self._target_buckets: dict[str, TokenBucket] = {}
+        self._pending: OrderedDict[str, dict] = OrderedDict()
+        self._consecutive_errors = 0
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="hue-dispatch", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> CommandDispatcher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, target: str, payload: dict) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("dispatcher is closed.")
+            if (
+                self._consecutive_errors >= MAX_CONSECUTIVE_ERRORS
+                and self.stats.last_error is not None
+            ):
+                raise self.stats.last_error
+            self.stats.submitted += 1
+            if target in self._pending:
+                self._pending[target] = {**self._pending[target], **payload}
+                self.stats.merged += 1
+            else:
+                self._pending[target] = dict(payload)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, flush: bool = True, timeout: float | None = None) -> None:
+        if flush:
+            self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self.stats.dropped += len(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _buckets_for(self, target: str) -> list[TokenBucket]:
+        budget = self.budget
+        buckets = [
+            budget.group_bucket if is_group_target(target) else budget.light_bucket
+        ]
+        if self.per_light_rate:
+            bucket = self._target_buckets.get(target)
+            if bucket is None:
+                bucket = TokenBucket(self.per_light_rate, clock=self.clock)
+                self._target_buckets[target] = bucket
+            buckets.append(bucket)
+        return buckets
+
+    def _next_ready(self) -> tuple[str, dict] | float:
+        """Pop the oldest sendable command, or return how long to wait."""
+        wait = None
+        with self.budget.lock:
+            for target, payload in list(self._pending.items()):
+                buckets = self._buckets_for(target)
+                delay = max(bucket.delay() for bucket in buckets)
+                if delay <= 0:
+                    for bucket in buckets:
+                        bucket.take()
+                    del self._pending[target]
+                    return target, payload
+                wait = delay if wait is None else min(wait, delay)
+        return wait if wait is not None else -1.0
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    ready = self._next_ready()
+                    if isinstance(ready, tuple):
+                        self._busy = True
+                        break
+                    self._cond.wait(None if ready < 0 else ready)
+            target, payload = ready
+            try:
+                self.send(target, payload)
+            except Exception as exc:  # noqa: BLE001 - surfaced via submit()
+                with self._cond:
+                    self.stats.errors += 1
+                    self.stats.last_error = exc
+                    self._consecutive_errors += 1
+            else:
+                with self._cond:
+                    self.stats.sent += 1
+                    self._consecutive_errors = 0
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+def send_all(
+    send: Callable[[str, dict], None],
+    commands: dict[str, dict],
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+    budget: BridgeBudget | None = None,
+) -> DispatchStats:
+    """Send one command per target within the bridge budget and wait for all.
+
+    For one-off writes such as a restore. Pass the budget a pulse used so the
+    restore right after it does not go past the bridge rate. Every command is
+    tried before the last failure, if any, is raised.
+    """
+    dispatcher = CommandDispatcher(
+        send, light_rate=light_rate, group_rate=group_rate, budget=budget
+    )
+    try:
+        for target, payload in commands.items():
+            dispatcher.submit(target, payload)
+    finally:
+        dispatcher.close()
+    if dispatcher.stats.last_error is not None:
+        raise dispatcher.stats.last_error
+    return dispatcher.stats
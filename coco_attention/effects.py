@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .alert import RED_ALERT
+from .dispatch import BRIDGE_GROUP_RATE, BRIDGE_LIGHT_RATE
+from .hue import is_group_target
+from .scheduler import Track
+
+
+EASINGS = {
+    "step": None,
+    "linear": lambda f: f,
+    "ease-in": lambda f: f * f,
+    "ease-out": lambda f: 1 - (1 - f) * (1 - f),
+    "ease-in-out": lambda f: 2 * f * f if f < 0.5 else 1 - 2 * (1 - f) * (1 - f),
+}
+# The bridge only interpolates linearly, so curved easings are approximated
+# with this many linear transitions per keyframe.
+EASE_SEGMENTS = 3
+NUMERIC_FIELDS = ("bri", "hue", "sat", "ct")
+
+
+@dataclass
+class Keyframe:
+    at: float  # Seconds into the cycle at which the light reaches `state`
+    state: dict
+    ease: str = "linear"  # How the light gets there from the previous keyframe
+
+
+@dataclass
+class Effect:
+    name: str
+    duration: float  # Seconds per cycle
+    keyframes: list[Keyframe]
+    loops: int | None = None  # None repeats until stopped
+    stagger: float | None = 0.0  # Cycle fraction between targets; None spreads evenly
+
+    def __post_init__(self) -> None:
+        if self.duration <= 0:
+            raise ValueError("duration must be greater than 0.")
+        if not self.keyframes:
+            raise ValueError("an effect needs at least one keyframe.")
+        if self.loops is not None and self.loops < 1:
+            raise ValueError("loops must be at least 1.")
+        for keyframe in self.keyframes:
+            if not 0 <= keyframe.at < self.duration:
+                raise ValueError(
+                    f"keyframe at {keyframe.at}s is outside the {self.duration}s cycle."
+                )
+            if keyframe.ease not in EASINGS:
+                raise ValueError(f"Unknown easing: {keyframe.ease}")
+        self.keyframes = sorted(self.keyframes, key=lambda keyframe: keyframe.at)
+
+
+@dataclass
+class EffectPlan:
+    effect: Effect
+    tracks: list[Track]
+    light_rate: float  # Light commands per second the effect needs
+    group_rate: float  # Group commands per second the effect needs
+    timeline: list[tuple[float, dict]] = field(default_factory=list)
+
+    def fits(
+        self,
+        light_budget: float = BRIDGE_LIGHT_RATE,
+        group_budget: float = BRIDGE_GROUP_RATE,
+    ) -> bool:
+        return self.light_rate <= light_budget and self.group_rate <= group_budget
+
+
+def _deciseconds(seconds: float) -> int:
+    return max(0, round(seconds * 10))
+
+
+def _blend(start: dict, end: dict, fraction: float) -> dict:
+    state = dict(end)
+    for key in NUMERIC_FIELDS:
+        if key in start and key in end:
+            state[key] = round(start[key] + (end[key] - start[key]) * fraction)
+    return state
+
+
+def compile_timeline(effect: Effect) -> list[tuple[float, dict]]:
+    """Turn keyframes into the (offset, payload) commands one target needs.
+
+    Each keyframe's command is sent when the previous keyframe is reached,
+    with a transitiontime covering the gap, so the bridge does the fade. Step
+    keyframes are sent at their own time with no transition, and commands
+    due at the same offset are merged.
+    """
+    states = []
+    state: dict = {}
+    for keyframe in effect.keyframes:
+        state = {**state, **keyframe.state}
+        states.append(state)
+
+    commands: dict[float, dict] = {}
+    count = len(effect.keyframes)
+    for idx, keyframe in enumerate(effect.keyframes):
+        target = states[idx]
+        previous = effect.keyframes[idx - 1]
+        gap = (keyframe.at - previous.at) % effect.duration or effect.duration
+        ease = EASINGS[keyframe.ease]
+        if ease is None or count == 1:
+            steps = [(keyframe.at, {**target, "transitiontime": 0})]
+        else:
+            start = previous.at
+            if previous.ease == "step":
+                # Let the step land before fading away from it.
+                delay = min(0.1, gap / 2)
+                start, gap = start + delay, gap - delay
+            segments = 1 if keyframe.ease == "linear" else EASE_SEGMENTS
+            span = gap / segments
+            steps = [
+                (
+                    (start + span * segment) % effect.duration,
+                    {
+                        **_blend(
+                            states[idx - 1], target, ease((segment + 1) / segments)
+                        ),
+                        "transitiontime": _deciseconds(span),
+                    },
+                )
+                for segment in range(segments)
+            ]
+        for offset, payload in steps:
+            offset = round(offset, 3)
+            commands[offset] = {**commands.get(offset, {}), **payload}
+    return sorted(commands.items())
+
+
+def compile_effect(effect: Effect, targets: list[str]) -> EffectPlan:
+    if not targets:
+        raise ValueError("at least one target is required.")
+    timeline = compile_timeline(effect)
+    stagger = 1 / len(targets) if effect.stagger is None else effect.stagger
+    tracks = [
+        Track(
+            target=target,
+            events=list(timeline),
+            cycle=effect.duration,
+            phase=idx * stagger,
+            repeat=effect.loops,
+        )
+        for idx, target in enumerate(targets)
+    ]
+    per_target = len(timeline) / effect.duration
+    groups = sum(1 for target in targets if is_group_target(target))
+    return EffectPlan(
+        effect=effect,
+        tracks=tracks,
+        light_rate=per_target * (len(targets) - groups),
+        group_rate=per_target * groups,
+        timeline=timeline,
+    )
+
+
+def describe_plan(
+    plan: EffectPlan,
+    light_budget: float = BRIDGE_LIGHT_RATE,
+    group_budget: float = BRIDGE_GROUP_RATE,
+) -> str:
+    effect = plan.effect
+    loops = "forever" if effect.loops is None else f"{effect.loops} times"
+    lines = [
+        f"{effect.name}: {len(plan.timeline)} commands per {effect.duration:g}s "
+        f"cycle, {len(plan.tracks)} targets, repeats {loops}.",
+        f"Needs {plan.light_rate:.2f} light commands/s (budget {light_budget:g}) "
+        f"and {plan.group_rate:.2f} group commands/s (budget {group_budget:g}).",
+    ]
+    if not plan.fits(light_budget, group_budget):
+        lines.append("Over budget: frames will be merged or dropped.")
+    for offset, payload in plan.timeline:
+        lines.append(f"  {offset:7.3f}s  {json.dumps(payload, sort_keys=True)}")
+    return "\n".join(lines)
+
+
+def _sos() -> Effect:
+    # Morse timing in units: dot 1, dash 3, gap 1, letter gap 3, word gap 7.
+    on, off = {**RED_ALERT, "bri": 254}, {"bri": 1}
+    marks = [(1, 1), (1, 1), (1, 3), (3, 1), (3, 1), (3, 3), (1, 1), (1, 1), (1, 7)]
+    unit = 0.25
+    keyframes = []
+    at = 0
+    for length, gap in marks:
+        keyframes.append(Keyframe(at * unit, on, "step"))
+        keyframes.append(Keyframe((at + length) * unit, off, "step"))
+        at += length + gap
+    return Effect("sos", duration=at * unit, keyframes=keyframes)
+
+
+EFFECTS = {
+    "breathe": Effect(
+        "breathe",
+        duration=4.0,
+        keyframes=[
+            Keyframe(0.0, {**RED_ALERT, "bri": 254}),
+            Keyframe(2.0, {"bri": 30}),
+        ],
+    ),
+    "pulse": Effect(
+        "pulse",
+        duration=0.5,
+        keyframes=[Keyframe(0.0, RED_ALERT), Keyframe(0.25, {"bri": 80})],
+    ),
+    "strobe": Effect(
+        "strobe",
+        duration=0.2,
+        keyframes=[
+            Keyframe(0.0, {**RED_ALERT, "bri": 254}, "step"),
+            Keyframe(0.1, {"bri": 1}, "step"),
+        ],
+    ),
+    "chase": Effect(
+        "chase",
+        duration=3.0,
+        keyframes=[
+            Keyframe(0.0, {**RED_ALERT, "bri": 254}, "step"),
+            Keyframe(1.0, {"bri": 10}, "ease-out"),
+        ],
+        stagger=None,
+    ),
+    "sos": _sos(),
+}
+
+
+def effect_from_dict(data: dict) -> Effect:
+    try:
+        keyframes = [
+            Keyframe(
+                at=float(item["at"]),
+                state=dict(item["state"]),
+                ease=str(item.get("ease", "linear")),
+            )
+            for item in data["keyframes"]
+        ]
+        stagger = data.get("stagger", 0.0)
+        return Effect(
+            name=str(data.get("name", "custom")),
+            duration=float(data["duration"]),
+            keyframes=keyframes,
+            loops=None if data.get("loops") is None else int(data["loops"]),
+            stagger=None if stagger is None else float(stagger),
+        )
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f"Invalid effect definition: {exc}") from exc
+
+
+def load_effect(name_or_path: str) -> Effect:
+    """Return a built-in effect by name, or load one from a JSON file."""
+    if name_or_path in EFFECTS:
+        return EFFECTS[name_or_path]
+    path = Path(name_or_path)
+    if not path.exists():
+        raise ValueError(
+            f"Unknown effect {name_or_path!r}; built-ins are "
+            f"{', '.join(sorted(EFFECTS))}."
+        )
+    return effect_from_dict(json.loads(path.read_text()))
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import colorsys
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .effects import EASINGS, Effect, _blend
+
+
+HEADER = b"HueStream"
+PROTOCOL_VERSION = (1, 0)
+COLOR_SPACE_RGB = 0x00
+COLOR_SPACE_XY = 0x01
+DEFAULT_STREAM_PORT = 2100
+DEFAULT_FRAME_RATE = 25.0
+MAX_FRAME_RATE = 50.0
+_HEADER_FORMAT = ">9sBBBHB"  # protocol, major, minor, sequence, reserved, space
+_LIGHT_FORMAT = ">BHHHH"  # device type, light id, three 16-bit channels
+_HEADER_SIZE = struct.calcsize(_HEADER_FORMAT) + 1  # one more reserved byte
+_LIGHT_SIZE = struct.calcsize(_LIGHT_FORMAT)
+
+Color = tuple[float, float, float]  # Channels in 0..1
+Renderer = Callable[[float], dict[str, Color]]
+
+
+def _channel(value: float) -> int:
+    return max(0, min(0xFFFF, round(value * 0xFFFF)))
+
+
+def pack_frame(
+    colors: dict[str, Color], sequence: int = 0, color_space: int = COLOR_SPACE_RGB
+) -> bytes:
+    """Encode one Entertainment API v1 message carrying every light's color."""
+    major, minor = PROTOCOL_VERSION
+    parts = [
+        struct.pack(
+            _HEADER_FORMAT, HEADER, major, minor, sequence & 0xFF, 0, color_space
+        ),
+        b"\x00",
+    ]
+    for light_id, channels in colors.items():
+        parts.append(
+            struct.pack(_LIGHT_FORMAT, 0, int(light_id), *map(_channel, channels))
+        )
+    return b"".join(parts)
+
+
+def unpack_frame(data: bytes) -> tuple[int, int, dict[str, Color]]:
+    """Decode a frame into (sequence, color space, colors)."""
+    if len(data) < _HEADER_SIZE or not data.startswith(HEADER):
+        raise ValueError("not a HueStream frame.")
+    _, _major, _minor, sequence, _, color_space = struct.unpack_from(
+        _HEADER_FORMAT, data
+    )
+    body = data[_HEADER_SIZE:]
+    if len(body) % _LIGHT_SIZE:
+        raise ValueError("truncated HueStream frame.")
+    colors = {}
+    for offset in range(0, len(body), _LIGHT_SIZE):
+        _, light_id, *channels = struct.unpack_from(_LIGHT_FORMAT, body, offset)
+        colors[str(light_id)] = tuple(channel / 0xFFFF for channel in channels)
+    return sequence, color_space, colors
+
+
+def state_color(state: dict) -> Color:
+    """RGB for a v1 light state (on/bri/hue/sat)."""
+    if state.get("on") is False:
+        return (0.0, 0.0, 0.0)
+    return colorsys.hsv_to_rgb(
+        state.get("hue", 0) / 65535,
+        state.get("sat", 0) / 254,
+        state.get("bri", 254) / 254,
+    )
+
+
+def _state_at(effect: Effect, position: float) -> dict:
+    keyframes = effect.keyframes
+    states = []
+    state: dict = {}
+    for keyframe in keyframes:
+        state = {**state, **keyframe.state}
+        states.append(state)
+    # The keyframe reached next and the one before it, wrapping around the cycle.
+    upcoming = next(
+        (idx for idx, keyframe in enumerate(keyframes) if keyframe.at > position), 0
+    )
+    target, previous = keyframes[upcoming], keyframes[upcoming - 1]
+    ease = EASINGS[target.ease]
+    if ease is None or len(keyframes) == 1:
+        return states[upcoming - 1]
+    gap = (target.at - previous.at) % effect.duration or effect.duration
+    fraction = ease(((position - previous.at) % effect.duration) / gap)
+    return _blend(states[upcoming - 1], states[upcoming], fraction)
+
+
+def effect_length(effect: Effect, light_ids: list[str]) -> float | None:
+    """Seconds until the last (staggered) light finishes; None if it loops forever."""
+    if effect.loops is None:
+        return None
+    stagger = 1 / len(light_ids) if effect.stagger is None else effect.stagger
+    return (effect.loops + (len(light_ids) - 1) * stagger) * effect.duration
+
+
+def effect_renderer(effect: Effect, light_ids: list[str]) -> Renderer:
+    """Sample an effect per frame on the host, instead of via transitiontime."""
+    stagger = 1 / len(light_ids) if effect.stagger is None else effect.stagger
+    end = None if effect.loops is None else effect.loops * effect.duration
+
+    def render(elapsed: float) -> dict[str, Color]:
+        colors = {}
+        for idx, light_id in enumerate(light_ids):
+            local = elapsed - idx * stagger * effect.duration
+            if end is not None:
+                local = min(local, end - 1e-9)
+            colors[light_id] = state_color(
+                _state_at(effect, max(0.0, local) % effect.duration)
+            )
+        return colors
+
+    return render
+
+
+class UdpTransport:
+    """Plain UDP to a receiver.
+
+    A real bridge only accepts the stream inside a DTLS-PSK session keyed by
+    the client key from registration. Any object with send() and close()
+    that wraps such a session can stand in for this class.
+    """
+
+    def __init__(self, host: str, port: int = DEFAULT_STREAM_PORT) -> None:
+        self.address = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, data: bytes) -> None:
+        self._sock.sendto(data, self.address)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+@dataclass
+class StreamStats:
+    frames: int = 0
+    skipped: int = 0
+    errors: int = 0
+    max_lateness: float = 0.0
+    last_error: BaseException | None = field(default=None, repr=False)
+
+
+class EntertainmentStream:
+    """Send every light's color in one frame at a fixed rate.
+
+    Frames are due on absolute monotonic deadlines, as in PulseScheduler; if
+    the loop falls behind it skips to the newest frame instead of bursting
+    to catch up.
+    """
+
+    def __init__(
+        self,
+        transport: UdpTransport,
+        light_ids: list[str],
+        frame_rate: float = DEFAULT_FRAME_RATE,
+        color_space: int = COLOR_SPACE_RGB,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not light_ids:
+            raise ValueError("at least one light is required.")
+        if not 0 < frame_rate <= MAX_FRAME_RATE:
+            raise ValueError(f"frame_rate must be in (0, {MAX_FRAME_RATE:g}].")
+        self.transport = transport
+        self.frame_rate = frame_rate
+        self.color_space = color_space
+        self.clock = clock
+        self.stats = StreamStats()
+        self._colors: dict[str, Color] = {
+            light_id: (0.0, 0.0, 0.0) for light_id in light_ids
+        }
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def set_color(self, light_id: str, color: Color) -> None:
+        with self._lock:
+            if light_id not in self._colors:
+                raise KeyError(f"Light {light_id} is not in the stream.")
+            self._colors[light_id] = color
+
+    def send_frame(self, colors: dict[str, Color] | None = None) -> None:
+        with self._lock:
+            if colors:
+                self._colors.update(
+                    {key: value for key, value in colors.items() if key in self._colors}
+                )
+            frame = pack_frame(self._colors, self._sequence, self.color_space)
+            self._sequence = (self._sequence + 1) & 0xFF
+        try:
+            self.transport.send(frame)
+        except OSError as exc:
+            # UDP has no retries to wait for; the next frame replaces this one.
+            self.stats.errors += 1
+            self.stats.last_error = exc
+        else:
+            self.stats.frames += 1
+
+    def run(
+        self,
+        render: Renderer | None = None,
+        stop: threading.Event | None = None,
+        duration: float | None = None,
+    ) -> StreamStats:
+        stop = stop or threading.Event()
+        interval = 1 / self.frame_rate
+        frames = None if duration is None else round(duration * self.frame_rate)
+        start = self.clock()
+        index = 0
+        while not stop.is_set() and (frames is None or index < frames):
+            due = start + index * interval
+            wait = due - self.clock()
+            if wait > 0 and stop.wait(wait):
+                break
+            now = self.clock()
+            behind = int((now - due) // interval)
+            if frames is not None:
+                behind = min(behind, frames - 1 - index)
+            if behind > 0:
+                index += behind
+                self.stats.skipped += behind
+                due = start + index * interval
+            self.stats.max_lateness = max(self.stats.max_lateness, now - due)
+            self.send_frame(render(due - start) if render else None)
+            index += 1
+        return self.stats
+
+    def close(self) -> None:
+        self.transport.close()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from .alert import (
+    capture_states,
+    delete_scenes,
+    pulse_tracks,
+    restore_payloads,
+    restore_scene,
+    run_native,
+    run_pulse,
+    snapshot_scene,
+)
+from .config import (
+    MAIN_BRIDGE,
+    BridgeConfig,
+    Config,
+    StateStore,
+    bridge_state_path,
+    last_state_path,
+)
+from .delta import StateTracker
+from .dispatch import (
+    BRIDGE_GROUP_RATE,
+    BRIDGE_LIGHT_RATE,
+    BridgeBudget,
+    DispatchStats,
+    send_all,
+)
+from .hue import HueClient
+from .metrics import Metrics
+from .scheduler import EdgeHook
+
+T = TypeVar("T")
+
+
+@dataclass
+class FleetMember:
+    """One bridge's share of a light set, with its own pool, store and limits.
+
+    Every command to the bridge, pulses and one-off writes alike, goes
+    through `budget`, so together they stay within the bridge's rate.
+    """
+
+    name: str
+    client: HueClient
+    light_ids: list[str]
+    store: StateStore
+    sender: StateTracker
+    budget: BridgeBudget = field(default_factory=BridgeBudget)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def fleet_members(
+    config_path: Path,
+    cfg: Config,
+    light_set: str,
+    metrics: Metrics | None = None,
+    light_rate: float = BRIDGE_LIGHT_RATE,
+    group_rate: float = BRIDGE_GROUP_RATE,
+) -> list[FleetMember]:
+    """Every configured bridge, the main one included, with lights in `light_set`.
+
+    The main bridge shares last_state.json with the single-bridge commands,
+    so a fleet alert and a plain one on the same lights unwind in order.
+    """
+    bridges = {
+        MAIN_BRIDGE: BridgeConfig(cfg.bridge_ip, cfg.username, cfg.light_sets),
+        **cfg.bridges,
+    }
+    members = []
+    for name, bridge in sorted(bridges.items()):
+        light_ids = bridge.light_sets.get(light_set)
+        if not light_ids:
+            continue
+        client = HueClient(
+            bridge.bridge_ip, bridge.username, metrics=metrics, transport=cfg.transport
+        )
+        if name == MAIN_BRIDGE:
+            state_path = last_state_path(config_path)
+        else:
+            state_path = bridge_state_path(config_path, name)
+        members.append(
+            FleetMember(
+                name=name,
+                client=client,
+                light_ids=list(light_ids),
+                store=StateStore(state_path),
+                sender=StateTracker(client),
+                budget=BridgeBudget(light_rate, group_rate),
+            )
+        )
+    if not members:
+        raise ValueError(f"No bridge has a light set named {light_set!r}.")
+    return members
+
+
+def fan_out(
+    members: list[FleetMember],
+    func: Callable[[FleetMember], T],
+    stop: threading.Event | None = None,
+) -> dict[str, T | Exception]:
+    """Run func on every bridge at once and wait for all of them.
+
+    Each bridge maps to its return value or to the exception it raised, so
+    one unreachable bridge does not hide how the others did. If the wait is
+    interrupted, `stop` is set and the workers are joined before the
+    interrupt propagates, so nothing is still sending during a restore.
+    """
+    if not members:
+        return {}
+    pool = ThreadPoolExecutor(max_workers=len(members), thread_name_prefix="bridge")
+    futures = {pool.submit(func, member): member.name for member in members}
+    try:
+        wait(futures)
+    except BaseException:
+        if stop is not None:
+            stop.set()
+        raise
+    finally:
+        pool.shutdown(wait=True)
+    return {
+        name: future.exception() or future.result() for future, name in futures.items()
+    }
+
+
+def capture(member: FleetMember, snapshot: str = "file") -> int:
+    """Push the member's current light states; returns the store frame."""
+    states = capture_states(member.client, member.light_ids)
+    member.sender.remember(states)
+    scene_id = None
+    if snapshot == "scene":
+        scene_id = snapshot_scene(member.client, member.light_ids)
+    return member.store.push(states, scene_id)
+
+
+def pulse(
+    member: FleetMember,
+    period: float,
+    low_bri: int,
+    stop: threading.Event | None = None,
+    mode: str = "pulse",
+    on_edge: EdgeHook | None = None,
+    adaptive: bool = False,
+    per_light_rate: float | None = None,
+) -> DispatchStats:
+    # Each bridge pulses under its own budget rather than a share of one.
+    if mode == "native":
+        return run_native(
+            member.sender,
+            member.light_ids,
+            period,
+            low_bri,
+            stop=stop,
+            budget=member.budget,
+            on_edge=on_edge,
+            adaptive=adaptive,
+            per_light_rate=per_light_rate,
+        )
+    return run_pulse(
+        member.sender,
+        pulse_tracks(member.light_ids, period, low_bri),
+        stop=stop,
+        budget=member.budget,
+        on_edge=on_edge,
+        adaptive=adaptive,
+        per_light_rate=per_light_rate,
+    )
+
+
+def set_state(member: FleetMember, payload: dict) -> list[str]:
+    send_all(
+        member.sender.send,
+        {light_id: payload for light_id in member.light_ids},
+        budget=member.budget,
+    )
+    return list(member.light_ids)
+
+
+def restore(member: FleetMember, frame: int | None = None) -> list[str]:
+    """Unwind one frame of the member's store; returns the lights restored."""
+    last_state = member.store.pop(frame)
+    delete_scenes(member.client, last_state.orphaned_scenes)
+    if not last_state.lights:
+        return []
+    payloads = restore_payloads(last_state)
+    if last_state.scene_id and restore_scene(member.client, last_state.scene_id):
+        member.sender.forget()
+    else:
+        # The light may have been changed by hand; send the whole snapshot.
+        member.sender.forget(list(payloads))
+        send_all(member.sender.send, payloads, budget=member.budget)
+    return sorted(payloads)
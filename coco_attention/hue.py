@@ -1,48 +1,362 @@
 from __future__ import annotations
 
-import requests
+import functools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
 
 from .config import LightState
+from .metrics import Metrics
 
 
 DISCOVERY_URL = "https://discovery.meethue.com/"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 5.0
+GROUP_PREFIX = "group:"
+GROUP_TYPES = ("Room", "Zone")
+# "requests" is the default; "http" uses the stdlib http.client and skips
+# importing requests and urllib3, which dominates start-up on small boards.
+TRANSPORTS = ("requests", "http")
+
+
+def __getattr__(name: str):
+    # requests is only imported once a session is opened, so commands that
+    # never reach the bridge, or use the http transport, start faster.
+    if name == "requests":
+        import requests
+
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    opened: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.opened)
+
+
+@functools.lru_cache(maxsize=None)
+def _counting_adapter() -> type:
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class CountingAdapter(HTTPAdapter):
+        """HTTPAdapter whose pools report every new TCP connection they open."""
+
+        def __init__(self, stats: ConnectionStats, lock: threading.Lock, **kwargs):
+            self._stats = stats
+            self._lock = lock
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            stats, lock = self._stats, self._lock
+
+            def counting(base: type) -> type:
+                class CountingPool(base):
+                    def _new_conn(self):
+                        with lock:
+                            stats.opened += 1
+                        return super()._new_conn()
+
+                return CountingPool
+
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": counting(HTTPConnectionPool),
+                "https": counting(HTTPSConnectionPool),
+            }
+
+    return CountingAdapter
 
 
 class HueClient:
-    def __init__(self, bridge_ip: str, username: str) -> None:
+    def __init__(
+        self,
+        bridge_ip: str,
+        username: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        metrics: Metrics | None = None,
+        transport: str = "requests",
+    ) -> None:
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport}")
         self.bridge_ip = bridge_ip
         self.username = username
+        self.timeout = timeout
+        self.metrics = metrics
+        self.pool_size = pool_size
+        self.transport = transport
+        self.stats = ConnectionStats()
+        self._stats_lock = threading.Lock()
+        self._session = None
+        self._timeouts: tuple[type, ...] = (TimeoutError,)
+
+    @property
+    def session(self):
+        """The HTTP session, opened on first use."""
+        if self._session is None:
+            with self._stats_lock:
+                if self._session is None:
+                    self._session = self._open_session()
+        return self._session
+
+    def _open_session(self):
+        if self.transport == "http":
+            from .transport import HttpSession
+
+            return HttpSession(self.pool_size, on_connect=self._count_connect)
+        import requests
+
+        session = requests.Session()
+        adapter = _counting_adapter()(
+            self.stats,
+            self._stats_lock,
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self._timeouts = (requests.Timeout, TimeoutError)
+        return session
+
+    def _count_connect(self) -> None:
+        with self._stats_lock:
+            self.stats.opened += 1
+
+    def __enter__(self) -> HueClient:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._stats_lock:
+            session, self._session = self._session, None
+        # The next request opens a fresh session instead of using a closed one.
+        if session is not None:
+            session.close()
 
     def _url(self, path: str) -> str:
         return f"http://{self.bridge_ip}/api/{self.username}{path}"
 
-    def get_light_state(self, light_id: str) -> LightState:
-        resp = requests.get(self._url(f"/lights/{light_id}"), timeout=5)
+    def _count_request(self) -> None:
+        with self._stats_lock:
+            self.stats.requests += 1
+
+    def _timed(self, method: str, url: str, call: Callable[[], object]):
+        self._count_request()
+        if self.metrics is None:
+            return call()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            resp = call()
+            status = str(resp.status_code)
+            return resp
+        except Exception as exc:
+            if isinstance(exc, self._timeouts):
+                status = "timeout"
+            raise
+        finally:
+            path = url.split("/api", 1)[-1]
+            if self.username and path.startswith(f"/{self.username}"):
+                path = path[len(self.username) + 1 :]
+            self.metrics.record_request(
+                self.bridge_ip, method, path, status, time.perf_counter() - start
+            )
+
+    def _timeout(self, timeout: float | None) -> float:
+        # An explicit 0 is a real value, not a request for the default.
+        return self.timeout if timeout is None else timeout
+
+    def _get(self, url: str, timeout: float | None = None):
+        return self._timed(
+            "GET", url, lambda: self.session.get(url, timeout=self._timeout(timeout))
+        )
+
+    def _put(self, url: str, payload: dict, timeout: float | None = None):
+        return self._timed(
+            "PUT",
+            url,
+            lambda: self.session.put(url, json=payload, timeout=self._timeout(timeout)),
+        )
+
+    def _post(self, url: str, payload: dict, timeout: float | None = None):
+        return self._timed(
+            "POST",
+            url,
+            lambda: self.session.post(
+                url, json=payload, timeout=self._timeout(timeout)
+            ),
+        )
+
+    def _delete(self, url: str, timeout: float | None = None):
+        return self._timed(
+            "DELETE",
+            url,
+            lambda: self.session.delete(url, timeout=self._timeout(timeout)),
+        )
+
+    def get_light_state(
+        self, light_id: str, timeout: float | None = None
+    ) -> LightState:
+        resp = self._get(self._url(f"/lights/{light_id}"), timeout=timeout)
+        resp.raise_for_status()
+        return _light_state(resp.json())
+
+    def get_all_light_states(
+        self, light_ids: list[str] | None = None, timeout: float | None = None
+    ) -> dict[str, LightState]:
+        resp = self._get(self._url("/lights"), timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
-        state = data.get("state", {})
-        return LightState(
-            on=state.get("on"),
-            bri=state.get("bri"),
-            hue=state.get("hue"),
-            sat=state.get("sat"),
-        )
+        wanted = data.keys() if light_ids is None else light_ids
+        missing = [light_id for light_id in wanted if light_id not in data]
+        if missing:
+            raise KeyError(f"Unknown light IDs: {', '.join(missing)}")
+        states = {}
+        for light_id in wanted:
+            states[light_id] = _light_state(data[light_id])
+            states[light_id].light_id = light_id
+        return states
 
-    def list_lights(self) -> dict[str, str]:
-        resp = requests.get(self._url("/lights"), timeout=5)
+    def list_lights(self, timeout: float | None = None) -> dict[str, str]:
+        resp = self._get(self._url("/lights"), timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         return {light_id: info.get("name", "") for light_id, info in data.items()}
 
-    def set_light_state(self, light_id: str, payload: dict) -> None:
-        resp = requests.put(
-            self._url(f"/lights/{light_id}/state"), json=payload, timeout=5
+    def set_light_state(
+        self, light_id: str, payload: dict, timeout: float | None = None
+    ) -> None:
+        resp = self._put(
+            self._url(f"/lights/{light_id}/state"), payload, timeout=timeout
         )
         resp.raise_for_status()
 
-    def register(self, devicetype: str = "coco_attention#cli") -> str:
-        resp = requests.post(
-            f"http://{self.bridge_ip}/api", json={"devicetype": devicetype}, timeout=5
+    def list_groups(self, timeout: float | None = None) -> dict[str, dict]:
+        resp = self._get(self._url("/groups"), timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        return {
+            group_id: {
+                "name": info.get("name", ""),
+                "type": info.get("type", ""),
+                "lights": [str(light_id) for light_id in info.get("lights", [])],
+            }
+            for group_id, info in data.items()
+            if info.get("type") in GROUP_TYPES
+        }
+
+    def get_group_lights(
+        self, group_id: str, timeout: float | None = None
+    ) -> list[str]:
+        resp = self._get(self._url(f"/groups/{group_id}"), timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        return [str(light_id) for light_id in data.get("lights", [])]
+
+    def set_group_action(
+        self, group_id: str, payload: dict, timeout: float | None = None
+    ) -> None:
+        resp = self._put(
+            self._url(f"/groups/{group_id}/action"), payload, timeout=timeout
+        )
+        resp.raise_for_status()
+
+    def create_scene(
+        self, name: str, light_ids: list[str], timeout: float | None = None
+    ) -> str:
+        """Store the lights' current state as a bridge scene and return its ID.
+
+        The scene is marked recyclable so the bridge may clean it up if it is
+        never deleted.
+        """
+        resp = self._post(
+            self._url("/scenes"),
+            {"name": name, "lights": light_ids, "recycle": True},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if not data or "error" in data[0]:
+            raise RuntimeError(f"Scene creation failed: {data}")
+        return data[0]["success"]["id"]
+
+    def recall_scene(
+        self, scene_id: str, group_id: str = "0", timeout: float | None = None
+    ) -> None:
+        """Put every light in the scene back in one group command."""
+        resp = self._put(
+            self._url(f"/groups/{group_id}/action"),
+            {"scene": scene_id},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if isinstance(data, list) and data and "error" in data[0]:
+            raise RuntimeError(f"Scene recall failed: {data}")
+
+    def delete_scene(self, scene_id: str, timeout: float | None = None) -> None:
+        resp = self._delete(self._url(f"/scenes/{scene_id}"), timeout=timeout)
+        resp.raise_for_status()
+
+    def set_stream_active(
+        self, group_id: str, active: bool, timeout: float | None = None
+    ) -> None:
+        """Hand an Entertainment group to (or take it back from) a UDP stream."""
+        resp = self._put(
+            self._url(f"/groups/{group_id}"),
+            {"stream": {"active": active}},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if isinstance(data, list) and data and "error" in data[0]:
+            raise RuntimeError(f"Streaming refused: {data}")
+
+    def send(self, target: str, payload: dict, timeout: float | None = None) -> None:
+        if is_group_target(target):
+            self.set_group_action(target[len(GROUP_PREFIX) :], payload, timeout)
+        else:
+            self.set_light_state(target, payload, timeout)
+
+    def send_checked(
+        self, target: str, payload: dict, timeout: float | None = None
+    ) -> list[str]:
+        """Send like `send`, returning the bridge's per-attribute error descriptions.
+
+        The bridge answers 200 even when it rejects an attribute, so callers
+        that need to know whether a light supports a command must look inside
+        the reply.
+        """
+        if is_group_target(target):
+            path = f"/groups/{target[len(GROUP_PREFIX) :]}/action"
+        else:
+            path = f"/lights/{target}/state"
+        resp = self._put(self._url(path), payload, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list):
+            return []
+        return [
+            item["error"].get("description", "")
+            for item in data
+            if isinstance(item, dict) and "error" in item
+        ]
+
+    def register(
+        self, devicetype: str = "coco_attention#cli", timeout: float | None = None
+    ) -> str:
+        resp = self._post(
+            f"http://{self.bridge_ip}/api", {"devicetype": devicetype}, timeout=timeout
         )
         resp.raise_for_status()
         data = resp.json()
@@ -51,7 +365,27 @@ class HueClient:
         return data[0]["success"]["username"]
 
 
+def _light_state(data: dict) -> LightState:
+    state = data.get("state", {})
+    return LightState(
+        on=state.get("on"),
+        bri=state.get("bri"),
+        hue=state.get("hue"),
+        sat=state.get("sat"),
+    )
+
+
+def group_target(group_id: str) -> str:
+    return f"{GROUP_PREFIX}{group_id}"
+
+
+def is_group_target(target: str) -> bool:
+    return target.startswith(GROUP_PREFIX)
+
+
 def discover_bridges() -> list[dict]:
+    import requests
+
     resp = requests.get(DISCOVERY_URL, timeout=5)
     resp.raise_for_status()
     data = resp.json()
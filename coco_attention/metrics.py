@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from pathlib import Path
+
+
+# Seconds; bridge requests normally take 10-100 ms on a LAN.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Seconds a pulse edge reached the dispatcher after it was due.
+LATENESS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+HELP = {
+    "coco_hue_requests_total": "Bridge HTTP requests by outcome.",
+    "coco_hue_request_seconds": "Bridge HTTP request latency.",
+    "coco_hue_retries_total": "Requests sent again after the previous one to the "
+    "same endpoint and light failed.",
+    "coco_pulse_edges_total": "Pulse edges handed to the dispatcher.",
+    "coco_pulse_edge_lateness_seconds": "Actual minus scheduled pulse edge time.",
+}
+_ID_SEGMENT = re.compile(r"^(lights|groups|scenes|sensors)/([^/]+)")
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def endpoint_labels(path: str) -> tuple[str, str]:
+    """Split an API path into a templated endpoint and the ID it names.
+
+    "/lights/3/state" gives ("/lights/{id}/state", "3"), so per-light series
+    share one endpoint label.
+    """
+    match = _ID_SEGMENT.match(path.lstrip("/"))
+    if match is None:
+        return path or "/", ""
+    collection, item = match.groups()
+    rest = path.lstrip("/")[match.end() :]
+    return f"/{collection}/{{id}}{rest}", item
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # Per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((f"{bound:g}", total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+
+class Metrics:
+    """Thread-safe counters and histograms for bridge requests and pulse edges.
+
+    Pass one to HueClient to record every request, and use record_edge as a
+    PulseScheduler on_edge hook. Read it back with snapshot() (JSON) or
+    prometheus() (text exposition format 0.0.4).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._failed: set[tuple[str, str, str]] = set()
+
+    def inc(self, name: str, labels: dict[str, str], amount: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(
+        self,
+        name: str,
+        labels: dict[str, str],
+        value: float,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def record_request(
+        self, bridge: str, method: str, path: str, status: str, seconds: float
+    ) -> None:
+        """Count one request; status is the HTTP code, "timeout" or "error"."""
+        endpoint, light = endpoint_labels(path)
+        labels = {"bridge": bridge, "method": method, "endpoint": endpoint}
+        if light:
+            labels["light"] = light
+        key = (bridge, endpoint, light)
+        # Throttling and server errors leave the command unapplied, like a timeout.
+        failed = not status.isdigit() or status == "429" or int(status) >= 500
+        with self._lock:
+            retry = key in self._failed
+            if failed:
+                self._failed.add(key)
+            else:
+                self._failed.discard(key)
+        self.inc("coco_hue_requests_total", {**labels, "status": status})
+        self.observe("coco_hue_request_seconds", labels, seconds)
+        if retry:
+            self.inc("coco_hue_retries_total", labels)
+
+    def record_edge(self, target: str, scheduled: float, fired: float) -> None:
+        labels = {"target": target}
+        self.inc("coco_pulse_edges_total", labels)
+        self.observe(
+            "coco_pulse_edge_lateness_seconds",
+            labels,
+            max(0.0, fired - scheduled),
+            LATENESS_BUCKETS,
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._counters.items())
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": histogram.count,
+                            "sum": histogram.sum,
+                            "max": histogram.max,
+                            "buckets": dict(histogram.cumulative()),
+                        }
+                        for key, histogram in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+    def write(self, path: Path) -> None:
+        path.write_text(json.dumps(self.snapshot(), indent=2) + "\n")
+
+    def prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                _header(lines, name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                _header(lines, name, "histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in histogram.cumulative():
+                        bucket_key = key + (("le", bound),)
+                        lines.append(f"{name}_bucket{_labels(bucket_key)} {count}")
+                    lines.append(f"{name}_sum{_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: list[str], name: str, kind: str) -> None:
+    if name in HELP:
+        lines.append(f"# HELP {name} {HELP[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    pairs = (f'{label}="{_escape(value)}"' for label, value in key)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import threading
+import warnings
+from dataclasses import asdict
+from typing import Callable, Iterable
+
+from .config import LightState
+from .hue import HueClient
+
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+# Called with (light_id, changed fields, new state) for every applied update.
+MirrorListener = Callable[[str, dict, LightState], None]
+
+
+def eventstream_url(bridge_ip: str) -> str:
+    return f"https://{bridge_ip}/eventstream/clip/v2"
+
+
+def parse_sse(lines: Iterable[str]) -> Iterable[str]:
+    """Yield the data payload of each server-sent event."""
+    data: list[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                yield "\n".join(data)
+            data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield "\n".join(data)
+
+
+def light_changes(resource: dict) -> dict:
+    """Translate a v2 light resource update into v1 LightState fields.
+
+    Colour arrives as xy or mirek, which has no exact hue/sat equivalent, so
+    it is reported as ``{"color": True}`` and the mirror re-reads that light.
+    """
+    changes: dict = {}
+    if "on" in resource:
+        changes["on"] = bool(resource["on"].get("on"))
+    if "dimming" in resource:
+        percent = float(resource["dimming"].get("brightness", 0))
+        changes["bri"] = max(1, min(254, round(percent * 2.54)))
+    if "color" in resource or "color_temperature" in resource:
+        changes["color"] = True
+    return changes
+
+
+class StateMirror:
+    """In-process copy of every light's state kept current by the event stream.
+
+    It can stand in for a StateCache wherever states are captured: get()
+    answers from memory, while put()/invalidate() are no-ops because the
+    bridge reports our own writes back through the stream.
+
+    The stream needs streamed HTTPS reads, so the client must use the
+    requests transport. verify is a CA bundle path (the Hue bridge CA) to
+    check the bridge's certificate with, or False to accept its self-signed
+    one unchecked.
+    """
+
+    def __init__(
+        self,
+        client: HueClient,
+        url: str | None = None,
+        verify: bool | str = False,
+    ) -> None:
+        if client.transport != "requests":
+            raise ValueError(
+                "StateMirror needs a HueClient with transport='requests'; "
+                f"the {client.transport!r} transport cannot stream HTTPS."
+            )
+        if verify is False:
+            from urllib3.exceptions import InsecureRequestWarning
+
+            # Expected for a bridge on the local network; other warnings stay.
+            warnings.filterwarnings("ignore", category=InsecureRequestWarning)
+        self.client = client
+        self.url = url or eventstream_url(client.bridge_ip)
+        self.verify = verify
+        self.connected = threading.Event()
+        self._lock = threading.Lock()
+        self._states: dict[str, LightState] = {}
+        self._names: dict[str, str] = {}
+        self._dirty: set[str] = set()
+        self._listeners: list[MirrorListener] = []
+        self._stop = threading.Event()
+        self._response = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.resync()
+        self._thread = threading.Thread(
+            target=self._run, name="hue-mirror", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            response.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def resync(self) -> None:
+        names = self.client.list_lights()
+        states = self.client.get_all_light_states()
+        with self._lock:
+            self._names = names
+            self._states = states
+            self._dirty.clear()
+
+    def subscribe(self, listener: MirrorListener) -> None:
+        self._listeners.append(listener)
+
+    def list_lights(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._names)
+
+    def get_light_state(self, light_id: str) -> LightState:
+        states = self.get([light_id])
+        if states is None:
+            raise KeyError(f"Unknown light ID: {light_id}")
+        return states[light_id]
+
+    def get(self, light_ids: list[str]) -> dict[str, LightState] | None:
+        with self._lock:
+            if any(light_id not in self._states for light_id in light_ids):
+                return None
+            dirty = [light_id for light_id in light_ids if light_id in self._dirty]
+        if dirty:
+            fresh = self.client.get_all_light_states(dirty)
+            with self._lock:
+                self._states.update(fresh)
+                self._dirty.difference_update(dirty)
+        with self._lock:
+            return {
+                light_id: LightState(**asdict(self._states[light_id]))
+                for light_id in light_ids
+            }
+
+    def put(self, states: dict[str, LightState]) -> None:
+        pass
+
+    def invalidate(self, light_ids: list[str] | None = None) -> None:
+        pass
+
+    def apply_event(self, event: dict) -> None:
+        if event.get("type") not in ("update", "add"):
+            return
+        for resource in event.get("data", []):
+            if resource.get("type") != "light":
+                continue
+            id_v1 = resource.get("id_v1", "")
+            if not id_v1.startswith("/lights/"):
+                continue
+            light_id = id_v1.rsplit("/", 1)[-1]
+            changes = light_changes(resource)
+            if not changes:
+                continue
+            with self._lock:
+                state = self._states.setdefault(light_id, LightState(light_id))
+                for key in ("on", "bri"):
+                    if key in changes:
+                        setattr(state, key, changes[key])
+                if changes.get("color"):
+                    self._dirty.add(light_id)
+                snapshot = LightState(**asdict(state))
+            for listener in self._listeners:
+                listener(light_id, changes, snapshot)
+
+    def _consume(self) -> None:
+        headers = {
+            "hue-application-key": self.client.username,
+            "Accept": "text/event-stream",
+        }
+        response = self.client.session.get(
+            self.url,
+            headers=headers,
+            stream=True,
+            verify=self.verify,
+            timeout=(self.client.timeout, None),
+        )
+        self._response = response
+        try:
+            response.raise_for_status()
+            self.connected.set()
+            for payload in parse_sse(response.iter_lines(decode_unicode=True)):
+                if self._stop.is_set():
+                    return
+                try:
+                    events = json.loads(payload)
+                except ValueError:
+                    continue
+                for event in events if isinstance(events, list) else [events]:
+                    self.apply_event(event)
+        finally:
+            self.connected.clear()
+            self._response = None
+            response.close()
+
+    def _run(self) -> None:
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                self._consume()
+                delay = RECONNECT_DELAY
+            except Exception:  # noqa: BLE001 - reconnect on any stream failure
+                if self._stop.is_set():
+                    return
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            try:
+                # Events may have been missed while disconnected.
+                self.resync()
+            except (RuntimeError, OSError, ValueError):
+                # Keep the last known copy; the next reconnect resyncs again.
+                continue
@@ -0,0 +1,485 @@
+from __future__ import annotations
+
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .dispatch import TokenBucket
+from .hue import group_target
+
+
+DEFAULT_USERNAME = "mockuser"
+STATE_FIELDS = ("on", "bri", "hue", "sat", "xy", "ct", "alert", "effect")
+# Plugs only switch; the real bridge rejects everything else on them.
+PLUG_TYPE = "On/Off plug-in unit"
+PLUG_FIELDS = ("on",)
+ENTERTAINMENT_TYPE = "Entertainment"  # Only these groups accept a UDP stream
+
+
+@dataclass
+class MockBridgeOptions:
+    latency: float = 0.0  # Seconds added to every request
+    jitter: float = 0.0  # Extra uniform random delay, 0..jitter seconds
+    light_rate: float | None = None  # Light commands/s before replying 429
+    group_rate: float | None = None  # Group commands/s before replying 429
+    drop_rate: float = 0.0  # Fraction of requests answered by closing the socket
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    seed: int | None = None
+    record: bool = False  # Keep (monotonic time, target, payload) for each command
+
+
+@dataclass
+class MockBridgeStats:
+    requests: int = 0
+    commands: int = 0
+    throttled: int = 0
+    dropped: int = 0
+    errors: int = 0
+
+
+def _error(error_type: int, address: str, description: str) -> list[dict]:
+    return [
+        {"error": {"type": error_type, "address": address, "description": description}}
+    ]
+
+
+class MockBridge:
+    """Local stand-in for the subset of the Hue v1 API that HueClient uses."""
+
+    def __init__(
+        self,
+        lights: int = 3,
+        username: str = DEFAULT_USERNAME,
+        options: MockBridgeOptions | None = None,
+        groups: dict[str, dict] | None = None,
+    ) -> None:
+        self.username = username
+        self.options = options or MockBridgeOptions()
+        self.stats = MockBridgeStats()
+        self.bridge_id = "001788FFFE00C0C0"
+        self.lock = threading.Lock()
+        self.log: list[tuple[float, str, dict]] = []
+        self.lights: dict[str, dict] = {
+            str(idx): {
+                "name": f"Mock light {idx}",
+                "type": "Extended color light",
+                "state": {
+                    "on": False,
+                    "bri": 127,
+                    "hue": 8000,
+                    "sat": 120,
+                    "alert": "none",
+                    "reachable": True,
+                },
+            }
+            for idx in range(1, lights + 1)
+        }
+        self.groups: dict[str, dict] = groups or {
+            "1": {
+                "name": "Mock room",
+                "type": "Room",
+                "lights": list(self.lights),
+                "action": {},
+            },
+            "2": {
+                "name": "Mock entertainment area",
+                "type": ENTERTAINMENT_TYPE,
+                "lights": list(self.lights),
+                "action": {},
+                "stream": {"active": False},
+            },
+        }
+        self.scenes: dict[str, dict] = {}
+        self._random = random.Random(self.options.seed)
+        self._light_bucket = (
+            TokenBucket(self.options.light_rate) if self.options.light_rate else None
+        )
+        self._group_bucket = (
+            TokenBucket(self.options.group_rate) if self.options.group_rate else None
+        )
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> MockBridge:
+        if self._server is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def address(self) -> str:
+        """host:port to pass to HueClient as its bridge_ip."""
+        if self._server is None:
+            raise RuntimeError("mock bridge is not running.")
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = _MockServer((host, port), self)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-bridge", daemon=True
+        )
+        self._thread.start()
+        return self.address
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = _MockServer((host, port), self)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Request handling, called from the HTTP handler threads.
+
+    def fault(self) -> str | None:
+        """Pick the fault (if any) to inject into the current request."""
+        options = self.options
+        delay = options.latency
+        with self.lock:
+            self.stats.requests += 1
+            if options.jitter:
+                delay += self._random.uniform(0, options.jitter)
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < options.drop_rate:
+            with self.lock:
+                self.stats.dropped += 1
+            return "drop"
+        if roll < options.drop_rate + options.error_rate:
+            with self.lock:
+                self.stats.errors += 1
+            return "error"
+        return None
+
+    def throttled(self, target: str, payload: dict, group: bool) -> bool:
+        bucket = self._group_bucket if group else self._light_bucket
+        with self.lock:
+            self.stats.commands += 1
+            if self.options.record:
+                self.log.append((time.monotonic(), target, payload))
+            if bucket is None:
+                return False
+            if bucket.delay() > 0:
+                self.stats.throttled += 1
+                return True
+            bucket.take()
+            return False
+
+    def set_light(self, light_id: str, payload: dict) -> list[dict]:
+        with self.lock:
+            light = self.lights[light_id]
+            state = light["state"]
+            fields = PLUG_FIELDS if light["type"] == PLUG_TYPE else STATE_FIELDS
+            results = []
+            for key, value in payload.items():
+                if key in fields:
+                    state[key] = value
+                    results.append(
+                        {"success": {f"/lights/{light_id}/state/{key}": value}}
+                    )
+                elif key == "transitiontime":
+                    continue
+                else:
+                    results.extend(
+                        _error(
+                            6,
+                            f"/lights/{light_id}/state/{key}",
+                            "parameter not available",
+                        )
+                    )
+            if fields is STATE_FIELDS:
+                if "xy" in payload:
+                    state["colormode"] = "xy"
+                elif "ct" in payload:
+                    state["colormode"] = "ct"
+                elif "hue" in payload or "sat" in payload:
+                    state["colormode"] = "hs"
+            return results
+
+    def create_scene(self, body: dict) -> list[dict]:
+        light_ids = [str(light_id) for light_id in body.get("lights", [])]
+        with self.lock:
+            unknown = [
+                light_id for light_id in light_ids if light_id not in self.lights
+            ]
+            if not light_ids or unknown:
+                return _error(7, "/scenes/lights", "invalid value for parameter")
+            scene_id = f"mock{len(self.scenes) + 1}"
+            while scene_id in self.scenes:
+                scene_id += "x"
+            self.scenes[scene_id] = {
+                "name": body.get("name", scene_id),
+                "lights": light_ids,
+                "recycle": bool(body.get("recycle", False)),
+                "lightstates": {
+                    light_id: {
+                        key: value
+                        for key, value in self.lights[light_id]["state"].items()
+                        if key in STATE_FIELDS
+                    }
+                    for light_id in light_ids
+                },
+            }
+        return [{"success": {"id": scene_id}}]
+
+    def delete_scene(self, scene_id: str) -> list[dict]:
+        with self.lock:
+            if self.scenes.pop(scene_id, None) is None:
+                return _error(3, f"/scenes/{scene_id}", "resource not available")
+        return [{"success": f"/scenes/{scene_id} deleted"}]
+
+    def set_group(self, group_id: str, payload: dict) -> list[dict]:
+        if "scene" in payload:
+            with self.lock:
+                scene = self.scenes.get(payload["scene"])
+            if scene is None:
+                return _error(7, f"/groups/{group_id}/action/scene", "invalid value")
+            for light_id, state in scene["lightstates"].items():
+                self.set_light(light_id, state)
+            return [{"success": {f"/groups/{group_id}/action/scene": payload["scene"]}}]
+        with self.lock:
+            members = (
+                list(self.lights)
+                if group_id == "0"
+                else self.groups[group_id]["lights"]
+            )
+            if group_id != "0":
+                self.groups[group_id]["action"].update(payload)
+        for light_id in members:
+            self.set_light(light_id, payload)
+        return [
+            {"success": {f"/groups/{group_id}/action/{key}": value}}
+            for key, value in payload.items()
+        ]
+
+    def set_stream(self, group_id: str, payload: dict) -> list[dict]:
+        active = payload.get("stream", {}).get("active")
+        with self.lock:
+            group = self.groups.get(group_id)
+            if group is None or group["type"] != ENTERTAINMENT_TYPE:
+                return _error(
+                    6, f"/groups/{group_id}/stream", "parameter not available"
+                )
+            if not isinstance(active, bool):
+                return _error(7, f"/groups/{group_id}/stream/active", "invalid value")
+            group["stream"]["active"] = active
+        return [{"success": {f"/groups/{group_id}/stream/active": active}}]
+
+    def config(self) -> dict:
+        return {
+            "name": "Mock Hue bridge",
+            "bridgeid": self.bridge_id,
+            "apiversion": "1.60.0",
+            "swversion": "1960000000",
+        }
+
+
+class MockStreamReceiver:
+    """UDP socket standing in for the bridge's Entertainment stream port.
+
+    Keeps (monotonic time, sequence, colors) for every frame it decodes.
+    """
+
+    def __init__(self) -> None:
+        self.frames: list[tuple[float, int, dict]] = []
+        self.invalid = 0
+        self._sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> MockStreamReceiver:
+        if self._sock is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def port(self) -> int:
+        if self._sock is None:
+            raise RuntimeError("stream receiver is not running.")
+        return self._sock.getsockname()[1]
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._thread = threading.Thread(
+            target=self._receive, args=(self._sock,), name="mock-stream", daemon=True
+        )
+        self._thread.start()
+        return self.port
+
+    def _receive(self, sock: socket.socket) -> None:
+        from .entertainment import unpack_frame
+
+        while True:
+            try:
+                data = sock.recv(65535)
+            except OSError:
+                return
+            if not data:
+                return
+            try:
+                sequence, _space, colors = unpack_frame(data)
+            except ValueError:
+                self.invalid += 1
+                continue
+            self.frames.append((time.monotonic(), sequence, colors))
+
+    def stop(self) -> None:
+        if self._sock is not None:
+            # An empty datagram wakes the blocking recv so the thread can exit.
+            self._sock.sendto(b"", self._sock.getsockname())
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK and every reply gains ~40 ms.
+    disable_nagle_algorithm = True
+    server: _MockServer
+
+    @property
+    def bridge(self) -> MockBridge:
+        return self.server.bridge
+
+    def _send(self, status: int, body: object) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _handle(self, method: str) -> None:
+        body = self._body() if method in ("PUT", "POST") else {}
+        fault = self.bridge.fault()
+        if fault == "drop":
+            self.close_connection = True
+            return
+        if fault == "error":
+            self._send(500, _error(901, self.path, "Internal error, 500"))
+            return
+        status, reply = self._route(method, body)
+        self._send(status, reply)
+
+    def _route(self, method: str, body: dict) -> tuple[int, object]:
+        bridge = self.bridge
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts[:1] != ["api"]:
+            return 404, _error(4, self.path, "method not available")
+        if len(parts) == 1 and method == "POST":
+            return 200, [{"success": {"username": bridge.username}}]
+        if len(parts) == 2 and parts[1] == "config" and method == "GET":
+            return 200, bridge.config()
+        if len(parts) < 2 or parts[1] != bridge.username:
+            return 200, _error(1, self.path, "unauthorized user")
+
+        resource = parts[2:]
+        with bridge.lock:
+            lights = json.loads(json.dumps(bridge.lights))
+            groups = json.loads(json.dumps(bridge.groups))
+        if method == "GET" and resource == ["lights"]:
+            return 200, lights
+        if method == "GET" and resource == ["groups"]:
+            return 200, groups
+        if resource[:1] == ["scenes"]:
+            if method == "GET" and len(resource) == 1:
+                with bridge.lock:
+                    return 200, {
+                        scene_id: {"name": scene["name"], "lights": scene["lights"]}
+                        for scene_id, scene in bridge.scenes.items()
+                    }
+            if method == "POST" and len(resource) == 1:
+                return 200, bridge.create_scene(body)
+            if method == "DELETE" and len(resource) == 2:
+                return 200, bridge.delete_scene(resource[1])
+        if len(resource) >= 2 and resource[0] == "lights":
+            light_id = resource[1]
+            if light_id not in lights:
+                return 200, _error(
+                    3, self.path, f"resource, /lights/{light_id}, not available"
+                )
+            if method == "GET" and len(resource) == 2:
+                return 200, lights[light_id]
+            if method == "PUT" and resource[2:] == ["state"]:
+                if bridge.throttled(light_id, body, group=False):
+                    return 429, _error(901, self.path, "Too many requests")
+                return 200, bridge.set_light(light_id, body)
+        if len(resource) >= 2 and resource[0] == "groups":
+            group_id = resource[1]
+            if group_id != "0" and group_id not in groups:
+                return 200, _error(
+                    3, self.path, f"resource, /groups/{group_id}, not available"
+                )
+            if method == "GET" and len(resource) == 2:
+                return 200, groups.get(
+                    group_id, {"name": "All", "lights": list(lights)}
+                )
+            if method == "PUT" and len(resource) == 2:
+                return 200, bridge.set_stream(group_id, body)
+            if method == "PUT" and resource[2:] == ["action"]:
+                if bridge.throttled(group_target(group_id), body, group=True):
+                    return 429, _error(901, self.path, "Too many requests")
+                return 200, bridge.set_group(group_id, body)
+        return 404, _error(4, self.path, "method not available")
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], bridge: MockBridge) -> None:
+        self.bridge = bridge
+        super().__init__(address, _MockHandler)
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients that time out or close early are normal under drop/latency.
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
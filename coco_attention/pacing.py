@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Callable
+
+
+RTT_SMOOTHING = 0.3  # Weight of the newest sample in the moving average
+# Keep the sender busy at most 1/HEADROOM of the time, so every edge is
+# sent before the next one is due and nothing waits on the bridge.
+HEADROOM = 1.25
+MAX_STRETCH = 4.0
+STRETCH_STEP = 0.25  # Stretch moves in steps, so small RTT wobble is ignored
+
+
+class AdaptivePacer:
+    """Slow a pulse down to what the bridge can currently answer.
+
+    Wrap the sender with send() to time every command that reaches the
+    bridge; each target keeps an exponential moving average of its
+    round-trip time. A PulseScheduler
+    given stretch as its hook asks, before each edge, how much to lengthen
+    the gap to the next one (and the fade that fills it). Commands go out
+    one at a time, so the stretch is shared by all targets and sized to the
+    sum of their round trips per gap; that also keeps alternating phases
+    aligned. It changes one step at a time and is only relaxed once the
+    load drops a full step below the current one. Changes are logged.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], bool | None],
+        headroom: float = HEADROOM,
+        max_stretch: float = MAX_STRETCH,
+        smoothing: float = RTT_SMOOTHING,
+        log: Callable[[str], None] = print,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1].")
+        if max_stretch < 1:
+            raise ValueError("max_stretch must be at least 1.")
+        self._send = send
+        self.headroom = headroom
+        self.max_stretch = max_stretch
+        self.smoothing = smoothing
+        self.log = log
+        self.clock = clock
+        self.level = 1.0
+        self._lock = threading.Lock()
+        self._rtt: dict[str, float] = {}
+        self._gaps: dict[str, float] = {}
+
+    def send(self, target: str, payload: dict) -> None:
+        started = self.clock()
+        try:
+            sent = self._send(target, payload)
+        except BaseException:
+            # Failures count too: a timeout is the slowest answer of all.
+            self._observe(target, self.clock() - started)
+            raise
+        # A StateTracker returns False for a command it skipped as a no-op;
+        # that never reached the bridge, so it says nothing about the RTT.
+        if sent is not False:
+            self._observe(target, self.clock() - started)
+
+    def _observe(self, target: str, seconds: float) -> None:
+        with self._lock:
+            previous = self._rtt.get(target)
+            if previous is None:
+                self._rtt[target] = seconds
+            else:
+                self._rtt[target] = previous + self.smoothing * (seconds - previous)
+
+    def rtt(self, target: str) -> float | None:
+        with self._lock:
+            return self._rtt.get(target)
+
+    def stretch(self, target: str, gap: float) -> float:
+        """Factor (1 or more) to lengthen `gap`, the time to target's next edge."""
+        with self._lock:
+            self._gaps[target] = gap
+            # Targets that have not asked yet are assumed to pulse like this one.
+            load = sum(
+                rtt / self._gaps.get(name, gap)
+                for name, rtt in self._rtt.items()
+                if self._gaps.get(name, gap) > 0
+            )
+            needed = STRETCH_STEP * math.ceil(self.headroom * load / STRETCH_STEP)
+            needed = min(self.max_stretch, max(1.0, needed))
+            previous = self.level
+            if needed > previous or needed < previous - STRETCH_STEP:
+                self.level = needed
+            level = self.level
+            slowest = max(self._rtt.values(), default=0.0)
+        if level > previous:
+            self.log(
+                f"Bridge is slow (round trip up to {slowest * 1000:.0f} ms); "
+                f"pulsing {level:g}x slower."
+            )
+        elif level < previous:
+            if level == 1.0:
+                self.log("Bridge caught up; pulsing at full speed.")
+            else:
+                self.log(f"Bridge is faster again; pulsing {level:g}x slower.")
+        return level
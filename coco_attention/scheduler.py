@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+MAX_CONSECUTIVE_ERRORS = 10
+
+# Called as on_edge(target, scheduled, fired) for every edge handed to send.
+EdgeHook = Callable[[str, float, float], None]
+# Called as stretch(target, gap) before each edge; returns the factor (>= 1)
+# by which the gap to that target's next edge, and its fade, are lengthened.
+StretchHook = Callable[[str, float], float]
+
+
+@dataclass
+class Track:
+    target: str
+    events: list[tuple[float, dict]]  # (offset into the cycle, payload)
+    cycle: float
+    phase: float = 0.0  # Fraction of a cycle this track lags behind the start
+    repeat: int | None = None  # Cycles to play; None loops until stopped
+
+    def __post_init__(self) -> None:
+        if self.cycle <= 0:
+            raise ValueError("cycle must be greater than 0.")
+        if not self.events:
+            raise ValueError("a track needs at least one event.")
+        if self.repeat is not None and self.repeat < 1:
+            raise ValueError("repeat must be at least 1.")
+        self.events = sorted(self.events, key=lambda event: event[0])
+
+    def finished(self, index: int) -> bool:
+        return self.repeat is not None and index >= self.repeat * len(self.events)
+
+    def due(self, start: float, index: int) -> float:
+        loops, pos = divmod(index, len(self.events))
+        return (
+            start
+            + (self.phase % 1.0) * self.cycle
+            + loops * self.cycle
+            + self.events[pos][0]
+        )
+
+    def payload(self, index: int) -> dict:
+        return self.events[index % len(self.events)][1]
+
+    def gap(self, index: int) -> float:
+        """Seconds from event `index` to the one after it."""
+        return self.due(0.0, index + 1) - self.due(0.0, index)
+
+
+@dataclass
+class SchedulerStats:
+    sent: int = 0
+    skipped: int = 0
+    errors: int = 0
+    max_lateness: float = 0.0
+    last_error: BaseException | None = field(default=None, repr=False)
+
+
+class PulseScheduler:
+    """Fire each track's events at absolute monotonic deadlines.
+
+    Every edge is computed from the common start time, so HTTP latency never
+    accumulates into drift. A blocking send (a plain HTTP request) runs on
+    one worker per track; if a track's previous command is still in flight,
+    its stale frames are skipped rather than queued. A non-blocking send,
+    such as CommandDispatcher.submit, is called inline with no pool. Frames
+    the loop woke too late for are skipped either way. A stretch hook
+    can lengthen gaps on the fly; a track's later edges then shift by the
+    added time, still without accumulating latency.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], None],
+        tracks: list[Track],
+        clock: Callable[[], float] = time.monotonic,
+        on_edge: EdgeHook | None = None,
+        stretch: StretchHook | None = None,
+        blocking: bool = True,
+    ) -> None:
+        if not tracks:
+            raise ValueError("at least one track is required.")
+        self.send = send
+        self.tracks = tracks
+        self.clock = clock
+        self.on_edge = on_edge
+        self.stretch = stretch
+        self.blocking = blocking
+        self.stats = SchedulerStats()
+        self._lock = threading.Lock()
+        self._consecutive_errors = 0
+
+    def _deliver(self, target: str, payload: dict) -> None:
+        try:
+            self.send(target, payload)
+        except Exception as exc:  # noqa: BLE001 - keep pulsing through blips
+            with self._lock:
+                self.stats.errors += 1
+                self.stats.last_error = exc
+                self._consecutive_errors += 1
+        else:
+            with self._lock:
+                self.stats.sent += 1
+                self._consecutive_errors = 0
+
+    def run(
+        self, stop: threading.Event | None = None, duration: float | None = None
+    ) -> SchedulerStats:
+        # Imported here: concurrent.futures pulls in logging, which every CLI
+        # start would pay for otherwise.
+        from concurrent.futures import ThreadPoolExecutor
+        from contextlib import nullcontext
+
+        stop = stop or threading.Event()
+        start = self.clock()
+        end = start + duration if duration is not None else None
+        in_flight: list[Future | None] = [None] * len(self.tracks)
+        shift = [0.0] * len(self.tracks)  # Time added to each track by stretching
+        heap = [(track.due(start, 0), idx, 0) for idx, track in enumerate(self.tracks)]
+        heapq.heapify(heap)
+
+        pool_context = (
+            ThreadPoolExecutor(max_workers=len(self.tracks))
+            if self.blocking
+            else nullcontext()
+        )
+        with pool_context as pool:
+            while heap and not stop.is_set():
+                due, idx, index = heap[0]
+                if end is not None and due >= end:
+                    break
+                wait = due - self.clock()
+                if wait > 0:
+                    if stop.wait(wait):
+                        break
+                    continue
+                heapq.heappop(heap)
+                track = self.tracks[idx]
+                now = self.clock()
+                while track.due(start, index + 1) + shift[idx] <= now and (
+                    not track.finished(index + 1)
+                ):
+                    index += 1
+                    self.stats.skipped += 1
+                scheduled = track.due(start, index) + shift[idx]
+                self.stats.max_lateness = max(self.stats.max_lateness, now - scheduled)
+                payload = track.payload(index)
+                if self.stretch is not None:
+                    gap = track.gap(index)
+                    factor = self.stretch(track.target, gap)
+                    shift[idx] += (factor - 1.0) * gap
+                    payload = _stretched(payload, factor)
+                pending = in_flight[idx]
+                if pending is not None and not pending.done():
+                    self.stats.skipped += 1
+                else:
+                    if pool is None:
+                        self._deliver(track.target, payload)
+                    else:
+                        in_flight[idx] = pool.submit(
+                            self._deliver, track.target, payload
+                        )
+                    if self.on_edge is not None:
+                        self.on_edge(track.target, scheduled, now)
+                if not track.finished(index + 1):
+                    next_due = track.due(start, index + 1) + shift[idx]
+                    heapq.heappush(heap, (next_due, idx, index + 1))
+                with self._lock:
+                    failing = self._consecutive_errors >= MAX_CONSECUTIVE_ERRORS
+                if failing and self.stats.last_error is not None:
+                    raise self.stats.last_error
+        return self.stats
+
+
+def _stretched(payload: dict, factor: float) -> dict:
+    if factor == 1.0 or "transitiontime" not in payload:
+        return payload
+    return {**payload, "transitiontime": round(payload["transitiontime"] * factor)}
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import http.client
+import json as jsonlib
+import socket
+import threading
+from typing import Callable
+from urllib.parse import urlsplit
+
+
+class HTTPError(OSError):
+    def __init__(self, message: str, response: Response | None = None) -> None:
+        super().__init__(message)
+        self.response = response
+
+
+class Timeout(TimeoutError):
+    pass
+
+
+class Response:
+    """The part of requests.Response that HueClient and its callers read."""
+
+    def __init__(self, status_code: int, reason: str, content: bytes, url: str):
+        self.status_code = status_code
+        self.reason = reason
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    def json(self):
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPError(
+                f"{self.status_code} {self.reason} for url: {self.url}", response=self
+            )
+
+
+class HttpSession:
+    """Keep-alive http.client connections behind a requests.Session-like API.
+
+    Only plain HTTP (the v1 bridge API) is supported. At most `pool_size`
+    requests run at once; idle connections are reused newest first. A
+    request on a reused connection that the bridge already closed is sent
+    once more on a fresh connection.
+    """
+
+    def __init__(
+        self, pool_size: int = 4, on_connect: Callable[[], None] | None = None
+    ) -> None:
+        self.on_connect = on_connect
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._idle: dict[str, list[http.client.HTTPConnection]] = {}
+
+    def __enter__(self) -> HttpSession:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(self, url: str, timeout: float | None = None) -> Response:
+        return self.request("GET", url, timeout=timeout)
+
+    def put(self, url: str, json=None, timeout: float | None = None) -> Response:
+        return self.request("PUT", url, json=json, timeout=timeout)
+
+    def post(self, url: str, json=None, timeout: float | None = None) -> Response:
+        return self.request("POST", url, json=json, timeout=timeout)
+
+    def delete(self, url: str, timeout: float | None = None) -> Response:
+        return self.request("DELETE", url, timeout=timeout)
+
+    def request(
+        self, method: str, url: str, json=None, timeout: float | None = None
+    ) -> Response:
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme!r}")
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        body = None
+        headers = {}
+        if json is not None:
+            body = jsonlib.dumps(json).encode()
+            headers["Content-Type"] = "application/json"
+        with self._slots:
+            conn, reused = self._checkout(parts.netloc, timeout)
+            try:
+                try:
+                    resp = self._send(conn, method, path, body, headers)
+                except (
+                    http.client.RemoteDisconnected,
+                    ConnectionResetError,
+                    BrokenPipeError,
+                ):
+                    if not reused:
+                        raise
+                    conn.close()
+                    conn, _ = self._checkout(parts.netloc, timeout, fresh=True)
+                    resp = self._send(conn, method, path, body, headers)
+                content = resp.read()
+            except socket.timeout as exc:
+                conn.close()
+                raise Timeout(f"{method} {url} timed out.") from exc
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.setdefault(parts.netloc, []).append(conn)
+        return Response(resp.status, resp.reason, content, url)
+
+    def _checkout(
+        self, netloc: str, timeout: float | None, fresh: bool = False
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        conn = None
+        if not fresh:
+            with self._lock:
+                idle = self._idle.get(netloc)
+                if idle:
+                    conn = idle.pop()
+        reused = conn is not None
+        if conn is None:
+            conn = http.client.HTTPConnection(netloc, timeout=timeout)
+            if self.on_connect is not None:
+                self.on_connect()
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    @staticmethod
+    def _send(
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict,
+    ) -> http.client.HTTPResponse:
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+
+from coco_attention.alert import (
+    ALERT_OFF,
+    native_tracks,
+    pulse_tracks,
+    restore_scene,
+    run_native,
+    snapshot_scene,
+)
+from coco_attention.hue import HueClient
+from coco_attention.mockbridge import PLUG_TYPE, MockBridge, MockBridgeOptions
+
+
+def test_native_tracks_refresh_after_the_first_command() -> None:
+    (track,) = native_tracks(["1"], refresh=14.0)
+
+    assert track.due(0.0, 0) == 14.0
+    assert track.due(0.0, 1) == 28.0
+    assert track.payload(0)["alert"] == "lselect"
+
+
+def test_pulse_tracks_cycle_once_per_period() -> None:
+    (track,) = pulse_tracks(["1"], period=2.0, low_bri=80)
+
+    assert track.cycle == 2.0
+    assert [at for at, _ in track.events] == [0.0, 1.0]
+    assert track.payload(0)["transitiontime"] == 10
+    assert track.payload(1)["bri"] == 80
+
+
+def test_native_alert_falls_back_to_pulsing_for_plugs() -> None:
+    with MockBridge(lights=2, options=MockBridgeOptions(record=True)) as bridge:
+        bridge.lights["2"]["type"] = PLUG_TYPE
+        stop = threading.Event()
+        timer = threading.Timer(0.5, stop.set)
+        with HueClient(bridge.address, bridge.username) as client:
+            timer.start()
+            run_native(
+                client, ["1", "2"], period=0.4, low_bri=10, stop=stop, refresh=10.0
+            )
+
+    light_1 = [payload for _, target, payload in bridge.log if target == "1"]
+    light_2 = [payload for _, target, payload in bridge.log if target == "2"]
+    # One breathe command and its cancellation; the bridge does the rest.
+    assert [payload.get("alert") for payload in light_1] == ["lselect", "none"]
+    assert light_1[-1] == ALERT_OFF
+    # The plug refused lselect, so the host pulsed it.
+    assert light_2[0]["alert"] == "lselect"
+    assert len(light_2) > 2
+    assert all("alert" not in payload for payload in light_2[1:])
+
+
+def test_failed_scene_recall_falls_back_to_the_file() -> None:
+    with MockBridge() as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            scene_id = snapshot_scene(client, ["1"])
+            assert scene_id in bridge.scenes
+            assert restore_scene(client, scene_id)
+            assert bridge.scenes == {}
+            assert not restore_scene(client, scene_id)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from coco_attention.async_hue import AsyncHueClient, get_many, set_many
+from coco_attention.config import LightState
+from coco_attention.hue import HueClient
+
+
+class FakeClient(HueClient):
+    def __init__(self) -> None:
+        super().__init__("bridge", "user")
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.sent: dict[str, dict] = {}
+
+    def _enter(self) -> None:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+
+    def get_light_state(self, light_id: str, timeout=None) -> LightState:
+        self._enter()
+        return LightState(on=True, bri=int(light_id))
+
+    def set_light_state(self, light_id: str, payload: dict, timeout=None) -> None:
+        self._enter()
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+        with self.lock:
+            self.sent[light_id] = payload
+
+
+def test_get_many_maps_ids_to_states() -> None:
+    client = FakeClient()
+
+    states = get_many(client, ["1", "2", "3"])
+
+    assert {light_id: state.bri for light_id, state in states.items()} == {
+        "1": 1,
+        "2": 2,
+        "3": 3,
+    }
+
+
+def test_set_many_bounds_concurrency() -> None:
+    client = FakeClient()
+    payloads = {str(i): {"bri": i} for i in range(10)}
+
+    set_many(client, payloads, max_concurrency=3)
+
+    assert client.sent == payloads
+    assert 1 < client.peak <= 3
+
+
+def test_set_many_finishes_all_before_raising() -> None:
+    client = FakeClient()
+
+    async def run() -> None:
+        async with AsyncHueClient(client=client, max_concurrency=2) as ac:
+            await ac.set_many({"1": {"fail": True}, "2": {"bri": 5}, "3": {"bri": 6}})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert client.sent == {"2": {"bri": 5}, "3": {"bri": 6}}
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import time
+
+from coco_attention.batch import BatchRunner
+from coco_attention.config import StateStore
+from coco_attention.hue import HueClient
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+
+
+def _run(bridge: MockBridge, tmp_path, commands: list, **kwargs) -> tuple[int, list]:
+    lines = [
+        command if isinstance(command, str) else json.dumps(command)
+        for command in commands
+    ]
+    output: list[str] = []
+    with HueClient(bridge.address, bridge.username) as client:
+        runner = BatchRunner(
+            client,
+            StateStore(tmp_path / "last_state.json"),
+            default_light_id="1",
+            write=output.append,
+            **kwargs,
+        )
+        failed = runner.run(lines)
+    return failed, [json.loads(line) for line in output]
+
+
+def test_batch_pipelines_and_reports_in_order(tmp_path) -> None:
+    options = MockBridgeOptions(latency=0.1, record=True)
+    with MockBridge(lights=4, options=options) as bridge:
+        start = time.perf_counter()
+        failed, results = _run(
+            bridge,
+            tmp_path,
+            [
+                {"cmd": "set", "light": str(idx), "state": {"bri": idx}}
+                for idx in range(1, 5)
+            ]
+            + [
+                {"cmd": "set", "light": "1", "state": {"bri": 200}, "id": "last"},
+            ],
+            light_rate=1000,
+        )
+        elapsed = time.perf_counter() - start
+
+    assert failed == 0
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5]
+    assert results[-1] == {"line": 5, "id": "last", "cmd": "set", "ok": True}
+    # Four lights in parallel, then light 1 again after its first command.
+    assert elapsed < 0.35
+    assert bridge.lights["1"]["state"]["bri"] == 200
+    light_one = [payload["bri"] for _, target, payload in bridge.log if target == "1"]
+    assert light_one == [1, 200]
+
+
+def test_batch_snapshot_restore_and_errors(tmp_path) -> None:
+    with MockBridge(lights=2) as bridge:
+        failed, results = _run(
+            bridge,
+            tmp_path,
+            [
+                {"cmd": "snapshot", "lights": ["1", "2"]},
+                {"cmd": "preset", "lights": ["1", "2"], "preset": "blue"},
+                "not json",
+                {"cmd": "dance"},
+                {"cmd": "sleep", "seconds": 0.01},
+                {"cmd": "restore"},
+                {"cmd": "restore"},
+            ],
+        )
+
+    assert failed == 3
+    assert results[0] == {"line": 1, "cmd": "snapshot", "ok": True, "frame": 1}
+    assert results[1]["ok"] and results[4]["ok"]
+    assert not results[2]["ok"] and not results[3]["ok"]
+    assert results[5] == {
+        "line": 6,
+        "cmd": "restore",
+        "restored": ["1", "2"],
+        "ok": True,
+    }
+    assert results[6]["error"] == "No saved state found."
+    assert bridge.lights["2"]["state"]["hue"] == 8000
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import json
+
+from coco_attention.bench import _arrival_lateness, run_benchmarks
+
+
+def test_arrival_lateness_matches_latest_edge() -> None:
+    scheduled = {"1": [0.0, 1.0, 2.0]}
+    log = [(0.25, "1", {}), (2.5, "1", {}), (0.5, "2", {})]
+
+    assert _arrival_lateness(scheduled, log) == [0.25, 0.5]
+
+
+def test_run_benchmarks_reports_json() -> None:
+    report = run_benchmarks(lights=2, commands=5, duration=0.3, period=0.2, cold_runs=0)
+
+    results = report["results"]
+    assert "cold_start" not in results
+    assert results["set_light_state"]["latency"]["count"] == 5
+    assert results["restore"]["lights"] == 2
+    assert results["pulse"]["edges"] > 0
+    json.dumps(report)
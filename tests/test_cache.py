@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from coco_attention.cache import StateCache
+from coco_attention.config import LightState
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fresh_entries_are_shared_through_disk(tmp_path) -> None:
+    path = tmp_path / "state_cache.json"
+    clock = FakeClock()
+    StateCache(path, ttl=2, clock=clock).put(
+        {"1": LightState(light_id="1", on=True, bri=10)}
+    )
+
+    reader = StateCache(path, ttl=2, clock=clock)
+    clock.now += 1
+
+    assert reader.get(["1"]) == {"1": LightState(light_id="1", on=True, bri=10)}
+
+
+def test_stale_or_partial_entries_miss(tmp_path) -> None:
+    clock = FakeClock()
+    cache = StateCache(tmp_path / "state_cache.json", ttl=2, clock=clock)
+    cache.put({"1": LightState(bri=10)})
+
+    assert cache.get(["1", "2"]) is None
+    clock.now += 3
+    assert cache.get(["1"]) is None
+
+
+def test_invalidate_drops_entries(tmp_path) -> None:
+    path = tmp_path / "state_cache.json"
+    cache = StateCache(path, ttl=2)
+    cache.put({"1": LightState(bri=10), "2": LightState(bri=20)})
+
+    cache.invalidate(["1"])
+
+    assert StateCache(path, ttl=2).get(["1"]) is None
+    assert StateCache(path, ttl=2).get(["2"]) is not None
+
+
+def test_corrupt_cache_file_is_ignored(tmp_path) -> None:
+    path = tmp_path / "state_cache.json"
+    path.write_text("{not json")
+
+    assert StateCache(path, ttl=2).get(["1"]) is None
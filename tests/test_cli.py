@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from coco_attention.cli import build_parser
+from coco_attention.config import (
+    Config,
+    LastState,
+    LightState,
+    last_state_path,
+    load_config,
+    save_config,
+    save_last_state,
+)
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions, MockStreamReceiver
+
+
+def _run(*argv: str) -> None:
+    args = build_parser().parse_args(list(argv))
+    args.func(args)
+
+
+def test_config_keeps_saved_settings_not_given_again(tmp_path) -> None:
+    config_path = tmp_path / "config.json"
+    base = ["--config", str(config_path), "config", "--bridge-ip", "bridge"]
+    _run(*base, "--username", "user", "--light-id", "1", "--state-ttl", "5")
+    _run(*base, "--username", "other", "--light-id", "2")
+
+    cfg = load_config(config_path)
+    assert (cfg.username, cfg.light_id, cfg.state_ttl) == ("other", "2", 5.0)
+
+
+def test_repeat_restore_sends_the_snapshot_again(tmp_path) -> None:
+    config_path = tmp_path / "config.json"
+    with MockBridge(options=MockBridgeOptions(record=True)) as bridge:
+        save_config(
+            config_path,
+            Config(bridge_ip=bridge.address, username=bridge.username, light_id="1"),
+        )
+        state = LastState(lights={"1": LightState(light_id="1", on=True, bri=50)})
+        for _ in range(2):
+            save_last_state(last_state_path(config_path), state)
+            _run("--config", str(config_path), "restore", "--non-interactive")
+
+    assert [payload for _, _, payload in bridge.log] == [{"on": True, "bri": 50}] * 2
+
+
+def test_invalid_effect_loops_exit_with_a_message(tmp_path) -> None:
+    with pytest.raises(SystemExit, match="loops must be at least 1"):
+        _run("--config", str(tmp_path / "c.json"), "effect", "pulse", "--loops", "0")
+
+
+def test_effect_streams_to_an_entertainment_group(tmp_path, capsys) -> None:
+    config_path = tmp_path / "config.json"
+    with MockBridge(lights=2) as bridge, MockStreamReceiver() as receiver:
+        save_config(
+            config_path,
+            Config(bridge_ip=bridge.address, username=bridge.username, light_id="1"),
+        )
+        before = {key: bridge.lights["1"]["state"][key] for key in ("on", "bri")}
+        _run(
+            "--config",
+            str(config_path),
+            "effect",
+            "strobe",
+            "--loops",
+            "2",
+            "--group",
+            "2",
+            "--stream",
+            "--frame-rate",
+            "50",
+            "--stream-port",
+            str(receiver.port),
+            "--non-interactive",
+        )
+        time.sleep(0.05)
+
+        assert bridge.groups["2"]["stream"]["active"] is False
+        assert {key: bridge.lights["1"]["state"][key] for key in before} == before
+    assert "Streamed" in capsys.readouterr().out
+    assert receiver.frames
+    assert all(set(colors) == {"1", "2"} for _, _, colors in receiver.frames)
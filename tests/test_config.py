@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import threading
+
 from coco_attention.config import (
+    BridgeConfig,
     Config,
+    MAX_STATE_DEPTH,
     LastState,
     LightState,
+    StateStore,
     load_config,
     load_last_state,
     save_config,
@@ -21,6 +26,34 @@ def test_save_and_load_config(tmp_path) -> None:
     assert loaded == config
 
 
+def test_config_group_id_round_trip(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    config = Config(bridge_ip="10.0.0.5", username="user", light_id="3", group_id="2")
+
+    save_config(path, config)
+
+    assert load_config(path) == config
+
+
+def test_config_bridges_round_trip(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    config = Config(
+        bridge_ip="10.0.0.5",
+        username="user",
+        light_id="3",
+        transport="http",
+        bridges={
+            "east": BridgeConfig("10.0.0.6", "east-user", {"floor": ["1", "2"]}),
+            "west": BridgeConfig("10.0.0.7", "west-user"),
+        },
+        light_sets={"floor": ["3"]},
+    )
+
+    save_config(path, config)
+
+    assert load_config(path) == config
+
+
 def test_save_and_load_last_state(tmp_path) -> None:
     path = tmp_path / "last_state.json"
     state = LastState(
@@ -36,6 +69,15 @@ def test_save_and_load_last_state(tmp_path) -> None:
     assert loaded == state
 
 
+def test_last_state_keeps_scene_id(tmp_path) -> None:
+    path = tmp_path / "last_state.json"
+    state = LastState(lights={"3": LightState(light_id="3", on=True)}, scene_id="ab12")
+
+    save_last_state(path, state)
+
+    assert load_last_state(path) == state
+
+
 def test_load_legacy_last_state(tmp_path) -> None:
     path = tmp_path / "legacy.json"
     path.write_text(
@@ -54,3 +96,84 @@ def test_load_legacy_last_state(tmp_path) -> None:
 
     assert loaded.lights["5"].light_id == "5"
     assert loaded.lights["5"].on is True
+
+
+def test_state_store_unwinds_nested_alerts(tmp_path) -> None:
+    store = StateStore(tmp_path / "last_state.json")
+    original = LightState(on=True, bri=100, hue=8000, sat=100)
+    red = LightState(on=True, bri=254, hue=0, sat=254)
+    store.push({"1": original})
+    inner = store.push({"1": red, "2": original}, scene_id="s1")
+
+    assert store.pop(inner) == LastState(
+        lights={
+            "1": LightState(light_id="1", on=True, bri=254, hue=0, sat=254),
+            "2": LightState(light_id="2", on=True, bri=100, hue=8000, sat=100),
+        },
+        scene_id="s1",
+    )
+    assert store.pop().lights["1"].bri == 100
+    assert store.pop() == LastState(lights={})
+
+
+def test_state_store_hands_outer_snapshot_to_later_alert(tmp_path) -> None:
+    path = tmp_path / "last_state.json"
+    store = StateStore(path)
+    outer = store.push({"1": LightState(on=True, bri=100)})
+    store.push({"1": LightState(on=True, bri=254)}, scene_id="red")
+
+    # The outer alert ends first: nothing to restore while the later one runs,
+    # and the later alert's scene no longer holds what it will restore.
+    assert store.pop(outer) == LastState(lights={}, orphaned_scenes=["red"])
+    assert load_last_state(path).lights["1"].bri == 100
+    last = store.pop()
+    assert last.lights["1"].bri == 100
+    assert last.scene_id is None
+
+
+def test_state_store_keeps_the_first_snapshot_past_max_depth(tmp_path) -> None:
+    store = StateStore(tmp_path / "last_state.json")
+    frames = [
+        store.push({"1": LightState(on=True, bri=bri)})
+        for bri in range(1, MAX_STATE_DEPTH + 6)
+    ]
+    assert store.depth("1") == MAX_STATE_DEPTH
+
+    restored = [store.pop(frame).lights.get("1") for frame in reversed(frames)]
+    assert restored[0].bri == MAX_STATE_DEPTH + 5
+    # The last alert to end puts back the state from before the first one.
+    assert restored[-1].bri == 1
+
+
+def test_state_store_hands_out_scenes_folded_past_max_depth(tmp_path) -> None:
+    store = StateStore(tmp_path / "last_state.json")
+    frames = [
+        store.push({"1": LightState(on=True, bri=bri)}, scene_id=f"s{bri}")
+        for bri in range(1, MAX_STATE_DEPTH + 3)
+    ]
+
+    # Folding frames 2 and 3 dropped the scenes of frames 2-4; the next pop
+    # hands them out once.
+    last = store.pop(frames[-1])
+    assert last.scene_id == f"s{MAX_STATE_DEPTH + 2}"
+    assert last.orphaned_scenes == ["s2", "s3", "s4"]
+    assert store.pop(frames[-2]).orphaned_scenes == []
+
+
+def test_state_store_reads_legacy_file_and_survives_concurrency(tmp_path) -> None:
+    path = tmp_path / "last_state.json"
+    save_last_state(path, LastState(lights={"9": LightState(light_id="9", bri=5)}))
+    store = StateStore(path)
+
+    def push_many(light_id: str) -> None:
+        for bri in range(5):
+            StateStore(path).push({light_id: LightState(bri=bri)})
+
+    threads = [threading.Thread(target=push_many, args=(str(i),)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [store.depth(str(i)) for i in range(8)] == [5] * 8
+    assert store.peek().lights["9"].bri == 5
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from coco_attention import AlertController
+from coco_attention.config import StateStore
+from coco_attention.hue import HueClient
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+
+
+def _controller(client: HueClient, tmp_path) -> AlertController:
+    return AlertController(
+        client, StateStore(tmp_path / "last_state.json"), light_rate=1000
+    )
+
+
+def test_alert_runs_in_background_and_restores(tmp_path) -> None:
+    with MockBridge(lights=2) as bridge:
+        bridge.lights["1"]["state"].update(on=True, bri=42, hue=1000, sat=10)
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = _controller(client, tmp_path)
+            handle = controller.alert(["1"], period=0.4, low_bri=10)
+            time.sleep(0.2)
+
+            assert handle.running
+            assert bridge.lights["1"]["state"]["hue"] == 0
+            assert handle.stop() == ["1"]
+            assert not handle.running
+            assert handle.stop() == []
+
+        state = bridge.lights["1"]["state"]
+        assert (state["bri"], state["hue"], state["sat"]) == (42, 1000, 10)
+        assert controller.alerts == []
+
+
+def test_concurrent_alerts_share_one_client(tmp_path) -> None:
+    with MockBridge(lights=3) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            with _controller(client, tmp_path) as controller:
+                handles = [
+                    controller.alert([light_id], period=0.4) for light_id in "123"
+                ]
+                time.sleep(0.2)
+                assert all(handle.running for handle in handles)
+                assert len(controller.alerts) == 3
+
+            assert not any(handle.running for handle in handles)
+            assert controller.alerts == []
+            assert client.stats.opened <= client.pool_size
+        assert all(light["state"]["hue"] != 0 for light in bridge.lights.values())
+
+
+def test_concurrent_alerts_share_the_bridge_rate(tmp_path) -> None:
+    with MockBridge(lights=2, options=MockBridgeOptions(record=True)) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = AlertController(
+                client, StateStore(tmp_path / "last_state.json"), light_rate=5
+            )
+            # Each alert alone would use the whole budget: 5 edges/s.
+            handles = [
+                controller.alert([light_id], period=0.4, snapshot=None)
+                for light_id in "12"
+            ]
+            time.sleep(1.0)
+            for handle in handles:
+                handle.stop(restore=False)
+
+    # One token of burst plus 5/s for the second that both alerts ran.
+    assert len(bridge.log) <= 7
+    assert {target for _, target, _ in bridge.log} == {"1", "2"}
+
+
+def test_restore_shares_the_bridge_rate(tmp_path) -> None:
+    with MockBridge(lights=4, options=MockBridgeOptions(record=True)) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = AlertController(
+                client, StateStore(tmp_path / "last_state.json"), light_rate=5
+            )
+            handle = controller.alert(list("1234"), period=10.0)
+            time.sleep(0.5)
+            assert handle.stop() == list("1234")
+
+    times = [at for at, _, _ in bridge.log]
+    # Pulse edges and the restore right after them all wait for the budget.
+    assert min(b - a for a, b in zip(times, times[1:])) > 0.15
+
+
+def test_alert_from_asyncio(tmp_path) -> None:
+    async def main(controller: AlertController) -> bool:
+        async with await controller.alert_async(["2"], period=0.4) as handle:
+            await asyncio.sleep(0.1)
+            assert handle.running
+        return handle.running
+
+    with MockBridge(lights=2) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = _controller(client, tmp_path)
+            assert asyncio.run(main(controller)) is False
+            assert controller.alerts == []
+
+
+def test_alert_rejects_bad_arguments(tmp_path) -> None:
+    with MockBridge() as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = _controller(client, tmp_path)
+            with pytest.raises(ValueError):
+                controller.alert()
+            with pytest.raises(ValueError):
+                controller.alert(["1"], mode="disco")
+
+
+def test_restore_puts_back_fields_changed_by_hand(tmp_path) -> None:
+    with MockBridge(lights=1) as bridge:
+        bridge.lights["1"]["state"].update(on=True, bri=42, hue=1000, sat=10)
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = _controller(client, tmp_path)
+            handle = controller.alert(["1"], period=10.0)
+            time.sleep(0.1)
+            # Turned off by hand; the tracker still believes it is on.
+            client.set_light_state("1", {"on": False})
+            handle.stop()
+
+        assert bridge.lights["1"]["state"]["on"] is True
+
+
+def test_overlapping_scene_snapshots_leave_no_scenes_behind(tmp_path) -> None:
+    with MockBridge(lights=1) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            controller = _controller(client, tmp_path)
+            outer = controller.alert(["1"], period=10.0, snapshot="scene")
+            inner = controller.alert(["1"], period=10.0, snapshot="scene")
+            assert len(bridge.scenes) == 2
+
+            # The outer alert ends first, so the inner scene is now stale.
+            outer.stop()
+            inner.stop()
+
+        assert bridge.scenes == {}
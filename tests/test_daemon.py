@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from coco_attention.config import Config, LightState, last_state_path, load_last_state
+from coco_attention.daemon import AlertDaemon, daemon_info_path, send_command, serve
+from coco_attention.hue import HueClient, group_target
+
+
+class FakeClient(HueClient):
+    def __init__(self) -> None:
+        super().__init__("bridge", "user")
+        self.lock = threading.Lock()
+        self.reads: list[str] = []
+        self.sent: list[tuple[str, dict]] = []
+        self.bri = 42  # What the next read reports
+
+    def get_all_light_states(self, light_ids=None, timeout=None):
+        with self.lock:
+            self.reads.extend(light_ids)
+        return {
+            light_id: LightState(on=True, bri=self.bri, hue=1000, sat=10)
+            for light_id in light_ids
+        }
+
+    def get_group_lights(self, group_id: str, timeout=None) -> list[str]:
+        return ["1", "2"]
+
+    def set_light_state(self, light_id: str, payload: dict, timeout=None) -> None:
+        with self.lock:
+            self.sent.append((light_id, payload))
+
+    def set_group_action(self, group_id: str, payload: dict, timeout=None) -> None:
+        with self.lock:
+            self.sent.append((group_target(group_id), payload))
+
+
+@pytest.fixture
+def running(tmp_path):
+    config_path = tmp_path / "config.json"
+    client = FakeClient()
+    daemon = AlertDaemon(
+        config_path,
+        Config(bridge_ip="bridge", username="user", light_id="1"),
+        client=client,
+        light_rate=1000,
+    )
+    server = serve(daemon, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield config_path, client
+    server.shutdown()
+    server.server_close()
+    daemon.close(restore=False)
+
+
+def test_send_command_without_daemon_returns_none(tmp_path) -> None:
+    assert send_command(tmp_path / "config.json", "restore") is None
+
+
+def test_send_command_counts_a_silent_daemon_as_handled(tmp_path) -> None:
+    # Accepts the request but never answers, like a daemon busy capturing.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    host, port = listener.getsockname()
+    config_path = tmp_path / "config.json"
+    daemon_info_path(config_path).write_text(json.dumps({"host": host, "port": port}))
+    try:
+        result = send_command(config_path, "alert", timeout=0.2)
+    finally:
+        listener.close()
+
+    assert result == {"ok": True, "pending": True}
+
+
+def test_alert_then_restore_over_socket(running) -> None:
+    config_path, client = running
+    assert daemon_info_path(config_path).exists()
+
+    result = send_command(config_path, "alert", {"period": 0.4, "low_bri": 10})
+    assert result == {"ok": True, "targets": ["1"], "merged": 0}
+    time.sleep(0.2)
+    assert any(payload.get("hue") == 0 for _, payload in client.sent)
+    assert load_last_state(last_state_path(config_path)).lights["1"].bri == 42
+
+    # A second alert keeps the pre-alert snapshot instead of re-reading red.
+    send_command(config_path, "alert", {"period": 0.4})
+    assert client.reads == ["1"]
+
+    assert send_command(config_path, "restore") == {"ok": True, "restored": ["1"]}
+    # The whole snapshot goes back, in case the light was changed by hand.
+    assert client.sent[-1] == ("1", {"on": True, "bri": 42, "hue": 1000, "sat": 10})
+
+
+def test_daemon_only_listens_on_loopback(tmp_path) -> None:
+    daemon, _ = _daemon(tmp_path)
+    try:
+        with pytest.raises(ValueError, match="loopback"):
+            serve(daemon, host="0.0.0.0", port=0)
+        assert not daemon_info_path(daemon.config_path).exists()
+    finally:
+        daemon.close(restore=False)
+
+
+def test_errors_are_reported_to_the_client(running) -> None:
+    config_path, _ = running
+
+    with pytest.raises(RuntimeError, match="No state provided"):
+        send_command(config_path, "set", {"payload": {}})
+
+
+def test_metrics_endpoint_reports_pulse_edges(running) -> None:
+    config_path, _ = running
+    send_command(config_path, "alert", {"period": 0.4})
+    time.sleep(0.2)
+
+    info = json.loads(daemon_info_path(config_path).read_text())
+    url = f"http://{info['host']}:{info['port']}/metrics"
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        content_type = resp.headers["Content-Type"]
+        text = resp.read().decode()
+
+    assert content_type.startswith("text/plain")
+    assert "# TYPE coco_pulse_edge_lateness_seconds histogram" in text
+    assert 'coco_pulse_edges_total{target="1"}' in text
+
+
+def _daemon(tmp_path, debounce: float = 0.0) -> tuple[AlertDaemon, FakeClient]:
+    client = FakeClient()
+    daemon = AlertDaemon(
+        tmp_path / "config.json",
+        Config(bridge_ip="bridge", username="user", light_id="1", state_ttl=0),
+        client=client,
+        light_rate=1000,
+        debounce=debounce,
+    )
+    return daemon, client
+
+
+def test_alert_storm_is_merged_into_one_pulse(tmp_path) -> None:
+    daemon, client = _daemon(tmp_path, debounce=0.1)
+    try:
+        results = [daemon.alert({"period": 0.4}) for _ in range(100)]
+        daemon.alert({"period": 0.4, "priority": 3})  # Same alert, more urgent
+        time.sleep(0.2)
+
+        assert results[-1]["merged"] == 99
+        status = daemon.status()
+        assert status["targets"] == ["1"]
+        assert [(r["priority"], r["count"]) for r in status["requests"]] == [(3, 101)]
+        assert client.reads == ["1"]
+    finally:
+        daemon.close(restore=False)
+
+
+def test_highest_priority_owns_the_light(tmp_path) -> None:
+    daemon, client = _daemon(tmp_path)
+    try:
+        daemon.alert({"key": "disk", "light_id": "2", "period": 0.4, "low_bri": 10})
+        daemon.alert(
+            {
+                "key": "outage",
+                "light_id": "2",
+                "priority": 5,
+                "period": 0.4,
+                "low_bri": 200,
+            }
+        )
+        daemon.alert({"key": "build", "period": 0.4})
+        mark = len(client.sent)
+        time.sleep(0.4)
+
+        status = daemon.status()
+        assert [r["key"] for r in status["requests"]] == ["outage", "disk", "build"]
+        assert status["targets"] == ["1", "2"]
+        # Only the outage pulse (low_bri 200) drives light 2 now.
+        levels = {
+            payload["bri"]
+            for light_id, payload in client.sent[mark:]
+            if light_id == "2" and "bri" in payload
+        }
+        assert 200 in levels and 10 not in levels
+
+        # The waiting request takes the light over; nothing is restored yet.
+        assert daemon.restore({"key": "outage"}) == {"ok": True, "restored": []}
+        assert daemon.restore({"key": "build"}) == {"ok": True, "restored": ["1"]}
+        assert daemon.status()["targets"] == ["2"]
+        assert daemon.restore({"key": "disk"}) == {"ok": True, "restored": ["2"]}
+        assert not daemon.status()["alerting"]
+        with pytest.raises(ValueError, match="No alert"):
+            daemon.restore({"key": "disk"})
+    finally:
+        daemon.close(restore=False)
+
+
+def test_member_light_is_arbitrated_against_its_group(tmp_path) -> None:
+    daemon, client = _daemon(tmp_path)
+    try:
+        daemon.alert({"key": "room", "group": "1", "period": 0.4, "low_bri": 10})
+        daemon.alert(
+            {
+                "key": "page",
+                "light_id": "2",
+                "priority": 5,
+                "period": 0.4,
+                "low_bri": 200,
+            }
+        )
+        mark = len(client.sent)
+        time.sleep(0.4)
+
+        # The room keeps light 1; the more urgent page alone drives light 2.
+        assert daemon.status()["targets"] == ["1", "2"]
+        sent = client.sent[mark:]
+        assert all(target != group_target("1") for target, _ in sent)
+        levels = {payload["bri"] for target, payload in sent if target == "2"}
+        assert 200 in levels and 10 not in levels
+
+        # Once the page ends, the room pulses as one group again.
+        daemon.restore({"key": "page"})
+        assert daemon.status()["targets"] == [group_target("1")]
+    finally:
+        daemon.close(restore=False)
+
+
+def test_restore_uses_the_newest_capture_of_a_light(tmp_path) -> None:
+    daemon, client = _daemon(tmp_path)
+    try:
+        daemon.alert({"key": "a", "light_id": "2", "period": 0.4})
+        daemon.alert({"key": "b", "light_id": "1", "period": 0.4})
+        daemon.restore({"key": "a"})  # Releases light 2 at bri 42
+        client.bri = 99  # Then someone dims it
+        daemon.alert({"key": "c", "light_id": "2", "period": 0.4})
+        time.sleep(0.5)  # Light 2 pulses half a period behind light 1
+
+        assert daemon.restore() == {"ok": True, "restored": ["1", "2"]}
+        light_2 = [payload for target, payload in client.sent if target == "2"]
+        assert light_2[-1]["bri"] == 99
+    finally:
+        daemon.close(restore=False)
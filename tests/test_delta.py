@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+
+from coco_attention.config import LightState
+from coco_attention.delta import StateTracker
+from coco_attention.hue import group_target
+
+
+class Recorder:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.sent: list[tuple[str, dict]] = []
+
+    def send(self, target: str, payload: dict, timeout=None) -> None:
+        if self.fail:
+            raise RuntimeError("bridge down")
+        self.sent.append((target, payload))
+
+
+def test_pulse_edges_carry_only_brightness() -> None:
+    client = Recorder()
+    tracker = StateTracker(client)
+    high = {"on": True, "bri": 254, "hue": 0, "sat": 254, "transitiontime": 2}
+    low = {**high, "bri": 80}
+
+    for payload in (high, low, high):
+        tracker.send("1", payload)
+
+    assert client.sent == [
+        ("1", high),
+        ("1", {"bri": 80, "transitiontime": 2}),
+        ("1", {"bri": 254, "transitiontime": 2}),
+    ]
+    assert tracker.stats.fields_saved == 6
+
+
+def test_unchanged_state_skips_the_request() -> None:
+    client = Recorder()
+    tracker = StateTracker(client, {"1": LightState(on=True, bri=42)})
+
+    assert tracker.send("1", {"on": True, "bri": 42, "transitiontime": 4}) is False
+    assert tracker.send("1", {"alert": "lselect", "bri": 42}) is True
+
+    assert client.sent == [("1", {"alert": "lselect"})]
+    assert tracker.stats.skipped == 1
+
+
+def test_group_commands_invalidate_member_lights() -> None:
+    client = Recorder()
+    tracker = StateTracker(client, {"1": LightState(on=True, bri=42)})
+
+    tracker.set_group_action("2", {"bri": 10})
+    tracker.set_light_state("1", {"on": True, "bri": 42})
+    tracker.set_group_action("2", {"bri": 10})
+
+    assert client.sent == [
+        (group_target("2"), {"bri": 10}),
+        ("1", {"on": True, "bri": 42}),
+        (group_target("2"), {"bri": 10}),
+    ]
+
+
+def test_failed_send_forgets_the_target() -> None:
+    client = Recorder(fail=True)
+    tracker = StateTracker(client, {"1": LightState(on=True)})
+
+    with pytest.raises(RuntimeError):
+        tracker.send("1", {"bri": 1})
+    client.fail = False
+    tracker.send("1", {"on": True})
+
+    assert client.sent == [("1", {"on": True})]
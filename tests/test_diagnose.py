@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from coco_attention.diagnose import format_summary, sample_bridge
+from coco_attention.hue import TRANSPORTS
+
+
+class _BridgeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    commands: list[tuple[str, dict]] = []
+
+    def _reply(self, body: bytes = b'[{"success": {}}]') -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/api/user/lights/"):
+            self._reply(
+                json.dumps({"state": {"on": True, "alert": "lselect"}}).encode()
+            )
+        else:
+            self._reply()
+
+    def do_PUT(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.commands.append((self.path, json.loads(body)))
+        self._reply()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_sample_bridge_reports_percentiles(transport: str) -> None:
+    _BridgeHandler.commands = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BridgeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        results = sample_bridge(
+            host, 5, username="user", light_id="2", port=port, transport=transport
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert set(results) == {"tcp", "http", "command"}
+    for summary in results.values():
+        assert summary["count"] == 5
+        assert summary["failures"] == 0
+        assert summary["p50"] <= summary["p99"]
+    # Re-sending the current `on` leaves a running breathe alone.
+    assert _BridgeHandler.commands == [("/api/user/lights/2/state", {"on": True})] * 5
+    assert "p95" in format_summary("tcp", results["tcp"])
+
+
+def test_sample_bridge_counts_failures() -> None:
+    results = sample_bridge("127.0.0.1", 2, port=1, timeout=0.2)
+
+    assert results["tcp"] == {"count": 0, "failures": 2}
+    assert "no successful samples" in format_summary("tcp", results["tcp"])
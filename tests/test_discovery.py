@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from coco_attention import discovery
+from coco_attention.discovery import (
+    discover,
+    discovery_cache_path,
+    mdns_query,
+    parse_ssdp,
+    probe_hosts,
+    save_discovery_cache,
+    subnet_hosts,
+)
+
+
+class _ConfigHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = json.dumps({"name": "Hue", "bridgeid": "ABC123"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_mdns_query_asks_for_hue_ptr() -> None:
+    packet = mdns_query()
+
+    assert packet[4:6] == b"\x00\x01"
+    assert b"\x04_hue\x04_tcp\x05local\x00" in packet
+    assert packet.endswith(b"\x00\x0c\x00\x01")
+
+
+def test_parse_ssdp_accepts_only_bridges() -> None:
+    bridge = (
+        b"HTTP/1.1 200 OK\r\nSERVER: Linux/3.14 UPnP/1.0 IpBridge/1.60\r\n"
+        b"hue-bridgeid: 001788FFFE000000\r\n\r\n"
+    )
+    other = b"HTTP/1.1 200 OK\r\nSERVER: SomeTV/1.0\r\n\r\n"
+
+    assert parse_ssdp(bridge, "10.0.0.2") == {
+        "id": "001788FFFE000000",
+        "internalipaddress": "10.0.0.2",
+    }
+    assert parse_ssdp(other, "10.0.0.3") is None
+
+
+def test_subnet_hosts_skip_own_address() -> None:
+    hosts = subnet_hosts("192.168.1.20")
+
+    assert len(hosts) == 253
+    assert "192.168.1.20" not in hosts
+    assert hosts[0] == "192.168.1.1"
+
+
+def test_probe_hosts_finds_bridge_config() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ConfigHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        port = server.server_address[1]
+        bridges = probe_hosts(["127.0.0.1"], port=port)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert bridges == [{"id": "ABC123", "internalipaddress": "127.0.0.1"}]
+
+
+def test_discover_prefers_cache_then_saves_fresh_results(tmp_path, monkeypatch) -> None:
+    config_path = tmp_path / "config.json"
+    calls = []
+
+    def fake_local():
+        calls.append("local")
+        return [{"id": "B1", "internalipaddress": "10.0.0.9"}]
+
+    monkeypatch.setattr(discovery, "discover_local", fake_local)
+
+    first = discover(config_path, cloud=False)
+    second = discover(config_path, cloud=False)
+
+    assert first == second == [{"id": "B1", "internalipaddress": "10.0.0.9"}]
+    assert calls == ["local"]
+    assert discovery_cache_path(config_path).exists()
+
+    discover(config_path, cloud=False, refresh=True)
+    assert calls == ["local", "local"]
+
+
+def test_expired_cache_is_ignored(tmp_path, monkeypatch) -> None:
+    config_path = tmp_path / "config.json"
+    save_discovery_cache(
+        discovery_cache_path(config_path),
+        [{"id": "OLD", "internalipaddress": "10.0.0.1"}],
+    )
+    monkeypatch.setattr(discovery, "discover_local", lambda: [])
+
+    assert discover(config_path, ttl=-1, cloud=False) == []
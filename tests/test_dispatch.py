@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from coco_attention.dispatch import (
+    BridgeBudget,
+    CommandDispatcher,
+    TokenBucket,
+    send_all,
+)
+from coco_attention.hue import group_target
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Sink:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.sent: list[tuple[float, str, dict]] = []
+
+    def __call__(self, target: str, payload: dict) -> None:
+        if self.fail:
+            raise RuntimeError("bridge down")
+        with self.lock:
+            self.sent.append((time.monotonic(), target, payload))
+
+
+def test_token_bucket_spaces_tokens() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, clock=clock)
+
+    assert bucket.delay() == 0
+    bucket.take()
+    assert bucket.delay() == pytest.approx(0.1)
+    clock.now = 0.05
+    assert bucket.delay() == pytest.approx(0.05)
+    clock.now = 0.1
+    assert bucket.delay() == 0
+
+
+def test_pending_commands_for_a_light_are_merged() -> None:
+    sink = Sink()
+    gate = threading.Event()
+
+    def slow_send(target: str, payload: dict) -> None:
+        gate.wait(1)
+        sink(target, payload)
+
+    dispatcher = CommandDispatcher(slow_send, light_rate=1000)
+    dispatcher.submit("1", {"on": True, "bri": 254})
+    time.sleep(0.02)  # first command is now in flight
+    dispatcher.submit("1", {"bri": 200, "hue": 0})
+    dispatcher.submit("1", {"bri": 80})
+    gate.set()
+    dispatcher.close()
+
+    assert [payload for _, _, payload in sink.sent] == [
+        {"on": True, "bri": 254},
+        {"bri": 80, "hue": 0},
+    ]
+    assert dispatcher.stats.merged == 1
+    assert dispatcher.stats.sent == 2
+
+
+def test_bridge_rate_is_respected() -> None:
+    sink = Sink()
+    dispatcher = CommandDispatcher(sink, light_rate=50)
+    for light_id in range(6):
+        dispatcher.submit(str(light_id), {"bri": light_id})
+    dispatcher.close()
+
+    times = [at for at, _, _ in sink.sent]
+    assert len(times) == 6
+    assert times[-1] - times[0] >= 5 / 50 - 0.01
+
+
+def test_group_commands_use_group_budget() -> None:
+    sink = Sink()
+    dispatcher = CommandDispatcher(sink, light_rate=1000, group_rate=1)
+    dispatcher.submit(group_target("1"), {"bri": 1})
+    time.sleep(0.05)
+    dispatcher.submit(group_target("2"), {"bri": 2})
+    dispatcher.submit("7", {"bri": 3})
+    time.sleep(0.1)
+
+    assert [target for _, target, _ in sink.sent] == [group_target("1"), "7"]
+    dispatcher.close(flush=False)
+    assert dispatcher.stats.dropped == 1
+
+
+def test_per_light_rate_holds_back_only_the_busy_light() -> None:
+    sink = Sink()
+    dispatcher = CommandDispatcher(sink, light_rate=1000, per_light_rate=5)
+    dispatcher.submit("1", {"bri": 1})
+    time.sleep(0.05)
+    dispatcher.submit("1", {"bri": 2})
+    dispatcher.submit("2", {"bri": 3})
+    time.sleep(0.05)
+
+    assert [target for _, target, _ in sink.sent] == ["1", "2"]
+    dispatcher.close()
+    times = [at for at, target, _ in sink.sent if target == "1"]
+    assert times[1] - times[0] >= 1 / 5 - 0.01
+
+
+def test_repeated_failures_surface_on_submit() -> None:
+    dispatcher = CommandDispatcher(Sink(fail=True), light_rate=1000)
+    with pytest.raises(RuntimeError, match="bridge down"):
+        for _ in range(100):
+            dispatcher.submit("1", {"bri": 1})
+            dispatcher.flush()
+    dispatcher.close()
+    assert dispatcher.stats.errors >= 10
+
+
+def test_send_all_shares_the_budget_a_pulse_used() -> None:
+    budget = BridgeBudget(light_rate=20)
+    pulse = Sink()
+    with CommandDispatcher(pulse, budget=budget) as dispatcher:
+        dispatcher.submit("1", {"bri": 1})
+    started = time.monotonic()
+
+    restore = Sink()
+    send_all(
+        restore, {str(light_id): {"bri": 9} for light_id in range(4)}, budget=budget
+    )
+
+    # The pulse spent the one token there was, so each restore waits its turn.
+    assert len(restore.sent) == 4
+    assert restore.sent[-1][0] - started >= 4 / 20 - 0.01
+
+    with pytest.raises(RuntimeError, match="bridge down"):
+        send_all(Sink(fail=True), {"1": {"bri": 1}, "2": {"bri": 2}})
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+
+from coco_attention.alert import run_pulse
+from coco_attention.effects import (
+    EFFECTS,
+    Effect,
+    Keyframe,
+    compile_effect,
+    compile_timeline,
+    effect_from_dict,
+)
+from coco_attention.hue import group_target
+
+
+def test_linear_fades_are_left_to_the_bridge() -> None:
+    timeline = compile_timeline(EFFECTS["breathe"])
+
+    assert [(offset, payload["bri"]) for offset, payload in timeline] == [
+        (0.0, 30),
+        (2.0, 254),
+    ]
+    assert all(payload["transitiontime"] == 20 for _, payload in timeline)
+
+
+def test_curved_easing_is_split_into_linear_segments() -> None:
+    effect = Effect(
+        "fade",
+        duration=4.0,
+        keyframes=[
+            Keyframe(0.0, {"bri": 0}, "step"),
+            Keyframe(3.1, {"bri": 90}, "ease-in"),
+        ],
+    )
+
+    timeline = compile_timeline(effect)
+
+    assert [offset for offset, _ in timeline] == [0.0, 0.1, 1.1, 2.1]
+    assert [payload["bri"] for _, payload in timeline] == [0, 10, 40, 90]
+    assert timeline[0][1]["transitiontime"] == 0
+    assert {payload["transitiontime"] for _, payload in timeline[1:]} == {10}
+
+
+def test_plan_reports_rate_and_spreads_chase() -> None:
+    plan = compile_effect(EFFECTS["chase"], ["1", "2", "3", group_target("1")])
+
+    assert [track.phase for track in plan.tracks] == [0.0, 0.25, 0.5, 0.75]
+    assert plan.light_rate == pytest.approx(3 * 4 / 3.0)
+    assert plan.group_rate == pytest.approx(4 / 3.0)
+    assert not plan.fits(group_budget=1.0)
+
+
+def test_effect_from_dict_validates() -> None:
+    effect = effect_from_dict(
+        {
+            "name": "blink",
+            "duration": 1,
+            "loops": 2,
+            "keyframes": [{"at": 0, "state": {"on": True}, "ease": "step"}],
+        }
+    )
+    assert effect.loops == 2
+
+    with pytest.raises(ValueError):
+        effect_from_dict({"duration": 1})
+    with pytest.raises(ValueError):
+        effect_from_dict({"duration": 1, "keyframes": [{"at": 2, "state": {}}]})
+
+
+def test_finite_effect_ends_on_its_last_frame() -> None:
+    sent = []
+
+    class Client:
+        def send(self, target: str, payload: dict) -> None:
+            sent.append((target, payload["bri"]))
+
+    effect = Effect(
+        "blink",
+        duration=0.1,
+        keyframes=[
+            Keyframe(0.0, {"bri": 1}, "step"),
+            Keyframe(0.05, {"bri": 2}, "step"),
+        ],
+        loops=2,
+    )
+    run_pulse(Client(), compile_effect(effect, ["1"]).tracks, light_rate=1000)
+
+    assert sent == [("1", 1), ("1", 2), ("1", 1), ("1", 2)]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from coco_attention.effects import EFFECTS
+from coco_attention.entertainment import (
+    EntertainmentStream,
+    UdpTransport,
+    effect_renderer,
+    pack_frame,
+    unpack_frame,
+)
+from coco_attention.mockbridge import MockStreamReceiver
+
+
+def test_frame_layout_round_trips() -> None:
+    frame = pack_frame({"1": (1.0, 0.0, 0.5), "12": (0.0, 0.0, 0.0)}, sequence=7)
+
+    assert frame[:9] == b"HueStream"
+    assert frame[9:11] == b"\x01\x00"
+    assert len(frame) == 16 + 2 * 9
+    sequence, _space, colors = unpack_frame(frame)
+    assert sequence == 7
+    assert colors["1"] == pytest.approx((1.0, 0.0, 0.5), abs=1e-4)
+    assert set(colors) == {"1", "12"}
+
+    with pytest.raises(ValueError):
+        unpack_frame(b"nope")
+
+
+def test_strobe_renders_alternating_frames() -> None:
+    render = effect_renderer(EFFECTS["strobe"], ["1"])
+
+    assert render(0.05)["1"][0] == pytest.approx(1.0)
+    assert render(0.15)["1"][0] < 0.01
+
+
+def test_stream_sends_frames_at_a_fixed_rate() -> None:
+    with MockStreamReceiver() as receiver:
+        stream = EntertainmentStream(
+            UdpTransport("127.0.0.1", receiver.port), ["1", "2"], frame_rate=50
+        )
+        stats = stream.run(effect_renderer(EFFECTS["chase"], ["1", "2"]), duration=0.3)
+        stream.close()
+        time.sleep(0.05)
+
+    assert stats.frames + stats.skipped == 15
+    assert len(receiver.frames) == stats.frames
+    assert [sequence for _, sequence, _ in receiver.frames] == list(range(stats.frames))
+    assert set(receiver.frames[0][2]) == {"1", "2"}
+
+
+def test_stream_rejects_unsupported_rates() -> None:
+    with pytest.raises(ValueError):
+        EntertainmentStream(UdpTransport("127.0.0.1"), ["1"], frame_rate=120)
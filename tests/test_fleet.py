@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from coco_attention import fleet
+from coco_attention.config import BridgeConfig, Config, StateStore
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+
+
+def _config(bridges: dict[str, MockBridge]) -> Config:
+    return Config(
+        bridge_ip="unused",
+        username="unused",
+        light_id="1",
+        bridges={
+            name: BridgeConfig(
+                bridge.address, bridge.username, {"floor": list(bridge.lights)}
+            )
+            for name, bridge in bridges.items()
+        },
+    )
+
+
+def test_fan_out_costs_the_slowest_bridge_not_the_sum(tmp_path) -> None:
+    options = MockBridgeOptions(latency=0.2)
+    with (
+        MockBridge(lights=2, options=options) as east,
+        MockBridge(lights=2, options=options) as west,
+    ):
+        members = fleet.fleet_members(
+            tmp_path / "config.json", _config({"east": east, "west": west}), "floor"
+        )
+        try:
+            start = time.perf_counter()
+            frames = fleet.fan_out(members, fleet.capture)
+            elapsed = time.perf_counter() - start
+            fleet.fan_out(members, lambda member: fleet.set_state(member, {"bri": 10}))
+            restored = fleet.fan_out(
+                members, lambda member: fleet.restore(member, frames[member.name])
+            )
+        finally:
+            for member in members:
+                member.close()
+
+    # One capture is a single GET per bridge; serially it would take 0.4 s.
+    assert elapsed < 0.35
+    assert frames == {"east": 1, "west": 1}
+    assert restored == {"east": ["1", "2"], "west": ["1", "2"]}
+    assert east.lights["1"]["state"]["bri"] == 127
+    assert (tmp_path / "last_state.west.json").exists()
+
+
+def test_fan_out_reports_each_bridge_separately(tmp_path) -> None:
+    with MockBridge(lights=1) as east:
+        cfg = _config({"east": east})
+        cfg.bridges["gone"] = BridgeConfig("127.0.0.1:9", "user", {"floor": ["1"]})
+        members = fleet.fleet_members(tmp_path / "config.json", cfg, "floor")
+        try:
+            results = fleet.fan_out(members, fleet.capture)
+        finally:
+            for member in members:
+                member.close()
+
+    assert results["east"] == 1
+    assert isinstance(results["gone"], Exception)
+
+
+def test_pulse_stops_every_bridge(tmp_path) -> None:
+    with MockBridge(lights=1) as east, MockBridge(lights=1) as west:
+        members = fleet.fleet_members(
+            tmp_path / "config.json", _config({"east": east, "west": west}), "floor"
+        )
+        stop = threading.Event()
+        threading.Timer(0.3, stop.set).start()
+        try:
+            results = fleet.fan_out(
+                members,
+                lambda member: fleet.pulse(member, 0.2, 80, stop=stop),
+                stop=stop,
+            )
+        finally:
+            for member in members:
+                member.close()
+
+    assert all(stats.sent > 0 for stats in results.values())
+
+
+def test_main_bridge_joins_the_light_set(tmp_path) -> None:
+    with MockBridge(lights=2) as main, MockBridge(lights=1) as east:
+        cfg = _config({"east": east})
+        cfg.bridge_ip, cfg.username = main.address, main.username
+        cfg.light_sets = {"floor": ["2"]}
+        members = fleet.fleet_members(tmp_path / "config.json", cfg, "floor")
+        try:
+            frames = fleet.fan_out(members, fleet.capture)
+        finally:
+            for member in members:
+                member.close()
+
+    assert frames == {"east": 1, "main": 1}
+    # The main bridge unwinds alongside plain alerts, in last_state.json.
+    assert StateStore(tmp_path / "last_state.json").depth("2") == 1
+
+
+def test_set_and_restore_stay_within_the_bridge_rate(tmp_path) -> None:
+    with MockBridge(lights=4, options=MockBridgeOptions(record=True)) as east:
+        (member,) = fleet.fleet_members(
+            tmp_path / "config.json", _config({"east": east}), "floor"
+        )
+        try:
+            frame = fleet.capture(member)
+            fleet.set_state(member, {"bri": 10})
+            fleet.restore(member, frame)
+        finally:
+            member.close()
+
+    times = [at for at, _, _ in east.log]
+    assert len(times) == 8
+    # One shared budget: no two writes closer than the default 10/s allows.
+    assert min(b - a for a, b in zip(times, times[1:])) > 0.08
+
+
+def test_unknown_light_set_is_rejected(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        fleet.fleet_members(tmp_path / "config.json", _config({}), "floor")
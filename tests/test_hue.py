@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 
-from coco_attention.hue import HueClient, discover_bridges
+from coco_attention.hue import HueClient, discover_bridges, group_target
 
 
 class DummyResponse:
@@ -23,8 +27,8 @@ def test_list_lights(monkeypatch) -> None:
         assert url == "http://bridge/api/user/lights"
         return DummyResponse({"1": {"name": "Desk"}, "2": {"name": "Hall"}})
 
-    monkeypatch.setattr("coco_attention.hue.requests.get", fake_get)
     client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "get", fake_get)
 
     assert client.list_lights() == {"1": "Desk", "2": "Hall"}
 
@@ -36,8 +40,8 @@ def test_get_light_state(monkeypatch) -> None:
             {"state": {"on": True, "bri": 120, "hue": 500, "sat": 200}}
         )
 
-    monkeypatch.setattr("coco_attention.hue.requests.get", fake_get)
     client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "get", fake_get)
 
     state = client.get_light_state("9")
     assert state.on is True
@@ -46,6 +50,33 @@ def test_get_light_state(monkeypatch) -> None:
     assert state.sat == 200
 
 
+def test_get_all_light_states_uses_one_request(monkeypatch) -> None:
+    calls = []
+
+    def fake_get(url, timeout=5):
+        calls.append(url)
+        return DummyResponse(
+            {
+                "1": {"state": {"on": True, "bri": 1, "hue": 2, "sat": 3}},
+                "2": {"state": {"on": False, "bri": 4}},
+                "3": {"state": {"on": True}},
+            }
+        )
+
+    client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    states = client.get_all_light_states(["1", "2"])
+
+    assert calls == ["http://bridge/api/user/lights"]
+    assert sorted(states) == ["1", "2"]
+    assert states["1"].light_id == "1"
+    assert states["1"].sat == 3
+    assert states["2"].on is False
+    with pytest.raises(KeyError):
+        client.get_all_light_states(["9"])
+
+
 def test_set_light_state(monkeypatch) -> None:
     captured = {}
 
@@ -54,8 +85,8 @@ def test_set_light_state(monkeypatch) -> None:
         captured["json"] = json
         return DummyResponse({})
 
-    monkeypatch.setattr("coco_attention.hue.requests.put", fake_put)
     client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "put", fake_put)
 
     client.set_light_state("4", {"on": True})
 
@@ -63,14 +94,86 @@ def test_set_light_state(monkeypatch) -> None:
     assert captured["json"] == {"on": True}
 
 
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps([{"success": {}}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_connections_are_reused() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        with HueClient(f"{host}:{port}", "user", pool_size=2, timeout=2) as client:
+            for _ in range(5):
+                client.set_light_state("1", {"bri": 10})
+            assert client.stats.requests == 5
+            assert client.stats.opened == 1
+            assert client.stats.reused == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_list_groups_keeps_rooms_and_zones(monkeypatch) -> None:
+    def fake_get(url, timeout=5):
+        assert url == "http://bridge/api/user/groups"
+        return DummyResponse(
+            {
+                "1": {"name": "Office", "type": "Room", "lights": ["1", "3"]},
+                "2": {"name": "Desk", "type": "Zone", "lights": [4]},
+                "3": {"name": "TV", "type": "Entertainment", "lights": ["1"]},
+            }
+        )
+
+    client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    assert client.list_groups() == {
+        "1": {"name": "Office", "type": "Room", "lights": ["1", "3"]},
+        "2": {"name": "Desk", "type": "Zone", "lights": ["4"]},
+    }
+
+
+def test_send_routes_group_targets(monkeypatch) -> None:
+    captured = []
+
+    def fake_put(url, json, timeout=5):
+        captured.append((url, json))
+        return DummyResponse({})
+
+    client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "put", fake_put)
+
+    client.send(group_target("2"), {"bri": 10})
+    client.send("5", {"bri": 20})
+
+    assert captured == [
+        ("http://bridge/api/user/groups/2/action", {"bri": 10}),
+        ("http://bridge/api/user/lights/5/state", {"bri": 20}),
+    ]
+
+
 def test_register(monkeypatch) -> None:
     def fake_post(url, json, timeout=5):
         assert url == "http://bridge/api"
         assert json["devicetype"] == "coco_attention#cli"
         return DummyResponse([{"success": {"username": "abc123"}}])
 
-    monkeypatch.setattr("coco_attention.hue.requests.post", fake_post)
     client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     assert client.register() == "abc123"
 
@@ -79,8 +182,8 @@ def test_register_error(monkeypatch) -> None:
     def fake_post(url, json, timeout=5):
         return DummyResponse([{"error": {"type": 101}}])
 
-    monkeypatch.setattr("coco_attention.hue.requests.post", fake_post)
     client = HueClient("bridge", "user")
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     with pytest.raises(RuntimeError):
         client.register()
@@ -103,3 +206,37 @@ def test_discover_bridges_invalid(monkeypatch) -> None:
 
     with pytest.raises(RuntimeError):
         discover_bridges()
+
+
+def test_client_reopens_session_after_close() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        client = HueClient(f"{host}:{port}", "user", timeout=2)
+        client.set_light_state("1", {"bri": 10})
+        client.close()
+        client.set_light_state("1", {"bri": 20})
+        client.close()
+
+        assert client.stats.requests == 2
+        assert client.stats.opened == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_explicit_zero_timeout_is_kept(monkeypatch) -> None:
+    seen = []
+
+    def fake_get(url, timeout=None):
+        seen.append(timeout)
+        return DummyResponse({"state": {"on": True}})
+
+    client = HueClient("bridge", "user", timeout=5)
+    monkeypatch.setattr(client.session, "get", fake_get)
+    client.get_light_state("1")
+    client.get_light_state("1", timeout=0)
+
+    assert seen == [5, 0]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+import requests
+
+from coco_attention.hue import HueClient
+from coco_attention.metrics import Metrics, endpoint_labels
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+
+
+def test_endpoint_labels_template_ids() -> None:
+    assert endpoint_labels("/lights/3/state") == ("/lights/{id}/state", "3")
+    assert endpoint_labels("/groups/0/action") == ("/groups/{id}/action", "0")
+    assert endpoint_labels("/lights") == ("/lights", "")
+
+
+def test_client_records_requests_by_endpoint_light_and_status() -> None:
+    metrics = Metrics()
+    options = MockBridgeOptions(light_rate=1)
+    with MockBridge(lights=2, options=options) as bridge:
+        with HueClient(bridge.address, bridge.username, metrics=metrics) as client:
+            client.get_all_light_states()
+            client.set_light_state("1", {"bri": 10})
+            with pytest.raises(requests.HTTPError):
+                client.set_light_state("1", {"bri": 20})  # throttled: 429
+
+    counters = metrics.snapshot()["counters"]
+    outcomes = {
+        (row["labels"]["endpoint"], row["labels"].get("light"), row["labels"]["status"])
+        for row in counters["coco_hue_requests_total"]
+    }
+    assert outcomes == {
+        ("/lights", None, "200"),
+        ("/lights/{id}/state", "1", "200"),
+        ("/lights/{id}/state", "1", "429"),
+    }
+    latency = metrics.snapshot()["histograms"]["coco_hue_request_seconds"]
+    assert sum(row["count"] for row in latency) == 3
+
+
+def test_retries_timeouts_and_prometheus_text() -> None:
+    metrics = Metrics()
+    with MockBridge(lights=1, options=MockBridgeOptions(latency=0.3)) as bridge:
+        address = bridge.address
+        client = HueClient(
+            bridge.address, bridge.username, timeout=0.1, metrics=metrics
+        )
+        with pytest.raises(requests.Timeout):
+            client.set_light_state("1", {"bri": 10})
+        client.timeout = 5.0
+        client.set_light_state("1", {"bri": 10})
+        client.close()
+    metrics.record_edge("1", scheduled=1.0, fired=1.02)
+
+    text = metrics.prometheus()
+    assert 'status="timeout"' in text
+    assert (
+        f'coco_hue_retries_total{{bridge="{address}",'
+        'endpoint="/lights/{id}/state",light="1",method="PUT"} 1'
+    ) in text
+    assert 'coco_pulse_edge_lateness_seconds_bucket{target="1",le="0.025"} 1' in text
+    assert 'coco_pulse_edge_lateness_seconds_bucket{target="1",le="0.01"} 0' in text
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from coco_attention.config import LightState
+from coco_attention.hue import HueClient
+from coco_attention.mirror import StateMirror, light_changes, parse_sse
+
+
+EVENTS = [
+    [
+        {
+            "type": "update",
+            "data": [
+                {"type": "light", "id_v1": "/lights/1", "on": {"on": False}},
+                {"type": "grouped_light", "id_v1": "/groups/0", "on": {"on": False}},
+            ],
+        }
+    ],
+    [
+        {
+            "type": "update",
+            "data": [
+                {
+                    "type": "light",
+                    "id_v1": "/lights/2",
+                    "dimming": {"brightness": 50.0},
+                    "color": {"xy": {"x": 0.6, "y": 0.3}},
+                }
+            ],
+        }
+    ],
+]
+
+
+class _EventStreamHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        assert self.path == "/eventstream/clip/v2"
+        assert self.headers["hue-application-key"] == "user"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(b": hi\n\n")
+        for idx, events in enumerate(EVENTS):
+            self.wfile.write(f"id: {idx}\ndata: {json.dumps(events)}\n\n".encode())
+            self.wfile.flush()
+        # Hold the stream open like a real bridge.
+        time.sleep(0.5)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class FakeClient(HueClient):
+    def __init__(self, bridge_ip: str) -> None:
+        super().__init__(bridge_ip, "user")
+        self.reads = 0
+
+    def list_lights(self, timeout=None) -> dict[str, str]:
+        return {"1": "Desk", "2": "Hall"}
+
+    def get_all_light_states(self, light_ids=None, timeout=None):
+        self.reads += 1
+        states = {
+            "1": LightState(light_id="1", on=True, bri=200, hue=10, sat=20),
+            "2": LightState(light_id="2", on=True, bri=100, hue=30, sat=40),
+        }
+        return {key: states[key] for key in (light_ids or states)}
+
+
+def test_parse_sse_joins_data_lines() -> None:
+    lines = [": comment", "id: 1", "data: [1,", "data: 2]", "", "data: 3", ""]
+
+    assert list(parse_sse(lines)) == ["[1,\n2]", "3"]
+
+
+def test_light_changes_maps_v2_fields() -> None:
+    assert light_changes({"on": {"on": True}, "dimming": {"brightness": 100.0}}) == {
+        "on": True,
+        "bri": 254,
+    }
+    assert light_changes({"color_temperature": {"mirek": 300}}) == {"color": True}
+
+
+def test_mirror_follows_the_event_stream() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EventStreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    client = FakeClient(f"{host}:{port}")
+    mirror = StateMirror(client, url=f"http://{host}:{port}/eventstream/clip/v2")
+    seen = []
+    mirror.subscribe(lambda light_id, changes, state: seen.append(light_id))
+    try:
+        mirror.start()
+        deadline = time.monotonic() + 2
+        while len(seen) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert seen == ["1", "2"]
+        assert mirror.list_lights() == {"1": "Desk", "2": "Hall"}
+        assert client.reads == 1
+        assert mirror.get_light_state("1").on is False
+        # Colour arrives as xy, so that light is re-read once for hue/sat.
+        assert mirror.get(["2"])["2"].hue == 30
+        assert client.reads == 2
+        mirror.get(["2"])
+        assert client.reads == 2
+        assert mirror.get(["1", "3"]) is None
+    finally:
+        mirror.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_mirror_requires_the_requests_transport() -> None:
+    with pytest.raises(ValueError, match="transport='requests'"):
+        StateMirror(HueClient("bridge", "user", transport="http"))
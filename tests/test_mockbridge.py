@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+import requests
+
+from coco_attention.hue import HueClient, group_target
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+
+
+def test_hue_client_round_trip() -> None:
+    with MockBridge(lights=2) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            assert client.register() == bridge.username
+            assert client.list_lights() == {"1": "Mock light 1", "2": "Mock light 2"}
+
+            client.set_light_state("2", {"on": True, "bri": 200, "hue": 0})
+            state = client.get_light_state("2")
+            assert (state.on, state.bri, state.hue) == (True, 200, 0)
+
+            assert client.list_groups()["1"]["lights"] == ["1", "2"]
+            client.send(group_target("1"), {"bri": 10})
+            states = client.get_all_light_states()
+            assert {light_id: s.bri for light_id, s in states.items()} == {
+                "1": 10,
+                "2": 10,
+            }
+            assert client.stats.opened == 1
+
+
+def test_unknown_user_gets_hue_error() -> None:
+    with MockBridge() as bridge:
+        resp = requests.get(f"http://{bridge.address}/api/nobody/lights", timeout=2)
+
+    assert resp.json()[0]["error"]["type"] == 1
+
+
+def test_light_commands_are_throttled() -> None:
+    options = MockBridgeOptions(light_rate=5)
+    with MockBridge(options=options) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            client.set_light_state("1", {"bri": 1})
+            with pytest.raises(requests.HTTPError):
+                client.set_light_state("1", {"bri": 2})
+
+    assert bridge.stats.throttled == 1
+
+
+def test_faults_are_injected() -> None:
+    with MockBridge(options=MockBridgeOptions(error_rate=1.0)) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            with pytest.raises(requests.HTTPError):
+                client.list_lights()
+
+    with MockBridge(options=MockBridgeOptions(drop_rate=1.0)) as bridge:
+        with HueClient(bridge.address, bridge.username, timeout=1) as client:
+            with pytest.raises(requests.ConnectionError):
+                client.list_lights()
+    assert bridge.stats.dropped >= 1
+
+
+def test_latency_is_added() -> None:
+    options = MockBridgeOptions(latency=0.05)
+    with MockBridge(options=options) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            resp_time = client.session.get(
+                f"http://{bridge.address}/api/config", timeout=2
+            ).elapsed.total_seconds()
+
+    assert resp_time >= 0.05
+
+
+def test_scene_snapshot_restores_every_color_mode() -> None:
+    with MockBridge(lights=2) as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            client.set_light_state("1", {"on": True, "xy": [0.3, 0.3], "bri": 90})
+            client.set_light_state("2", {"on": True, "ct": 366})
+            scene_id = client.create_scene("snapshot", ["1", "2"])
+
+            client.send(group_target("0"), {"hue": 0, "sat": 254, "bri": 254})
+            client.recall_scene(scene_id)
+            client.delete_scene(scene_id)
+
+        light_1 = bridge.lights["1"]["state"]
+        assert (light_1["xy"], light_1["bri"], light_1["colormode"]) == (
+            [0.3, 0.3],
+            90,
+            "xy",
+        )
+        assert bridge.lights["2"]["state"]["colormode"] == "ct"
+        assert bridge.scenes == {}
+
+
+def test_clients_that_give_up_are_not_reported(capfd) -> None:
+    with MockBridge(options=MockBridgeOptions(latency=0.2)) as bridge:
+        with HueClient(bridge.address, bridge.username, timeout=0.05) as client:
+            with pytest.raises(requests.Timeout):
+                client.list_lights()
+        time.sleep(0.3)
+
+    assert "Traceback" not in capfd.readouterr().err
+
+
+def test_only_entertainment_groups_accept_a_stream() -> None:
+    with MockBridge() as bridge:
+        with HueClient(bridge.address, bridge.username) as client:
+            client.set_stream_active("2", True)
+            assert bridge.groups["2"]["stream"]["active"] is True
+            client.set_stream_active("2", False)
+            assert bridge.groups["2"]["stream"]["active"] is False
+
+            with pytest.raises(RuntimeError, match="Streaming refused"):
+                client.set_stream_active("1", True)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from coco_attention.delta import StateTracker
+from coco_attention.pacing import AdaptivePacer
+
+
+class FakeBridge:
+    """Sender whose round trip advances a fake clock by `rtt` seconds."""
+
+    def __init__(self, rtt: float) -> None:
+        self.rtt = rtt
+        self.now = 0.0
+
+    def clock(self) -> float:
+        return self.now
+
+    def send(self, target: str, payload: dict, timeout=None) -> None:
+        self.now += self.rtt
+
+
+def test_round_trips_are_averaged_per_target() -> None:
+    bridge = FakeBridge(rtt=0.1)
+    pacer = AdaptivePacer(bridge.send, smoothing=0.5, clock=bridge.clock)
+
+    pacer.send("1", {})
+    bridge.rtt = 0.3
+    pacer.send("1", {})
+    pacer.send("2", {})
+
+    assert pacer.rtt("1") == pytest.approx(0.2)
+    assert pacer.rtt("2") == pytest.approx(0.3)
+    assert pacer.rtt("3") is None
+
+
+def test_skipped_commands_are_not_timed() -> None:
+    bridge = FakeBridge(rtt=0.2)
+    tracker = StateTracker(bridge)
+    pacer = AdaptivePacer(tracker.send, clock=bridge.clock)
+
+    pacer.send("1", {"bri": 254})
+    # Nothing changes, so the tracker makes no request and takes no time.
+    for _ in range(5):
+        pacer.send("1", {"bri": 254})
+
+    assert tracker.stats.skipped == 5
+    assert pacer.rtt("1") == pytest.approx(0.2)
+
+
+def test_pulse_slows_down_and_recovers() -> None:
+    bridge = FakeBridge(rtt=0.02)
+    messages: list[str] = []
+    pacer = AdaptivePacer(
+        bridge.send, smoothing=1.0, log=messages.append, clock=bridge.clock
+    )
+
+    for target in ("1", "2"):
+        pacer.send(target, {})
+    assert pacer.stretch("1", 0.25) == 1.0
+
+    # Two lights at 150 ms each cannot fit in a 250 ms gap.
+    bridge.rtt = 0.15
+    for target in ("1", "2"):
+        pacer.send(target, {})
+    assert pacer.stretch("1", 0.25) == 1.5
+    assert pacer.stretch("2", 0.25) == 1.5
+
+    # Within one step of the current level: no flapping.
+    bridge.rtt = 0.11
+    for target in ("1", "2"):
+        pacer.send(target, {})
+    assert pacer.stretch("1", 0.25) == 1.5
+
+    bridge.rtt = 0.02
+    for target in ("1", "2"):
+        pacer.send(target, {})
+    assert pacer.stretch("1", 0.25) == 1.0
+    assert messages == [
+        "Bridge is slow (round trip up to 150 ms); pulsing 1.5x slower.",
+        "Bridge caught up; pulsing at full speed.",
+    ]
+
+
+def test_stretch_is_capped() -> None:
+    bridge = FakeBridge(rtt=5.0)
+    pacer = AdaptivePacer(
+        bridge.send, max_stretch=3.0, log=lambda _: None, clock=bridge.clock
+    )
+
+    pacer.send("1", {})
+
+    assert pacer.stretch("1", 0.25) == 3.0
+    with pytest.raises(ValueError):
+        AdaptivePacer(bridge.send, smoothing=0)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from coco_attention.scheduler import PulseScheduler, Track
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.calls: list[tuple[float, str, dict]] = []
+
+    def __call__(self, target: str, payload: dict) -> None:
+        with self.lock:
+            self.calls.append((time.monotonic(), target, payload))
+        time.sleep(self.delay)
+
+    def times(self, target: str) -> list[float]:
+        return [at for at, name, _ in self.calls if name == target]
+
+
+def test_track_due_applies_phase_and_cycle() -> None:
+    track = Track("1", [(0.0, {"bri": 1}), (0.5, {"bri": 2})], cycle=1.0, phase=0.5)
+
+    assert track.due(10.0, 0) == 10.5
+    assert track.due(10.0, 1) == 11.0
+    assert track.due(10.0, 2) == 11.5
+    assert track.payload(3) == {"bri": 2}
+
+
+def test_track_rejects_bad_cycle() -> None:
+    with pytest.raises(ValueError):
+        Track("1", [(0.0, {})], cycle=0)
+
+
+def test_lights_stay_in_phase_despite_slow_sends() -> None:
+    send = Recorder(delay=0.03)
+    tracks = [
+        Track(light_id, [(0.0, {"bri": 254}), (0.05, {"bri": 80})], cycle=0.1)
+        for light_id in ("1", "2")
+    ]
+
+    PulseScheduler(send, tracks).run(duration=0.5)
+
+    first, second = send.times("1"), send.times("2")
+    assert len(first) >= 8 and len(second) >= 8
+    for a, b in zip(first, second):
+        assert abs(a - b) < 0.02
+    # Edges are anchored to the start time, so the last one has not drifted.
+    assert first[-1] - first[0] == pytest.approx(0.05 * (len(first) - 1), abs=0.03)
+
+
+def test_frames_are_skipped_while_a_send_is_in_flight() -> None:
+    send = Recorder(delay=0.12)
+    track = Track("1", [(0.0, {"bri": 254}), (0.025, {"bri": 80})], cycle=0.05)
+
+    stats = PulseScheduler(send, [track]).run(duration=0.5)
+
+    assert stats.sent == len(send.calls)
+    assert stats.sent <= 5
+    assert stats.skipped >= 10
+
+
+def test_non_blocking_send_runs_inline() -> None:
+    threads = []
+
+    def send(target: str, payload: dict) -> None:
+        threads.append(threading.current_thread())
+
+    track = Track("1", [(0.0, {"bri": 1}), (0.02, {"bri": 2})], cycle=0.04, repeat=2)
+    stats = PulseScheduler(send, [track], blocking=False).run()
+
+    assert stats.sent == 4
+    assert set(threads) == {threading.current_thread()}
+
+
+def test_stop_event_ends_the_run() -> None:
+    stop = threading.Event()
+    send = Recorder()
+    track = Track("1", [(0.0, {"bri": 254})], cycle=10.0)
+    threading.Timer(0.05, stop.set).start()
+
+    started = time.monotonic()
+    PulseScheduler(send, [track]).run(stop=stop)
+
+    assert time.monotonic() - started < 1.0
+    assert len(send.calls) == 1
+
+
+def test_finite_tracks_end_the_run() -> None:
+    recorder = Recorder()
+    track = Track("1", [(0.0, {"bri": 1}), (0.02, {"bri": 2})], cycle=0.04, repeat=2)
+
+    stats = PulseScheduler(recorder, [track]).run()
+
+    assert [payload["bri"] for _, _, payload in recorder.calls] == [1, 2, 1, 2]
+    assert stats.sent == 4
+
+
+def test_stretch_hook_lengthens_gaps_and_fades() -> None:
+    send = Recorder()
+    track = Track(
+        "1",
+        [(0.0, {"bri": 254, "transitiontime": 1}), (0.05, {"bri": 80})],
+        cycle=0.1,
+        repeat=2,
+    )
+    gaps = []
+
+    def stretch(target: str, gap: float) -> float:
+        gaps.append(gap)
+        return 2.0
+
+    PulseScheduler(send, [track], stretch=stretch).run()
+
+    times = send.times("1")
+    assert gaps == pytest.approx([0.05] * 4)
+    assert times[-1] - times[0] == pytest.approx(0.3, abs=0.03)
+    assert [payload.get("transitiontime") for _, _, payload in send.calls] == [
+        2,
+        None,
+        2,
+        None,
+    ]
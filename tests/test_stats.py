@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pytest
+
+from coco_attention.stats import percentile, summarize
+
+
+def test_percentile_interpolates() -> None:
+    values = [4.0, 1.0, 3.0, 2.0]
+
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_percentile_rejects_empty() -> None:
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+
+def test_summarize() -> None:
+    summary = summarize([float(i) for i in range(1, 101)])
+
+    assert summary["count"] == 100
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p99"] == pytest.approx(99.01)
+    assert summarize([]) == {"count": 0}
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+
+import pytest
+
+from coco_attention.hue import HueClient, group_target
+from coco_attention.mockbridge import MockBridge, MockBridgeOptions
+from coco_attention.transport import HTTPError, HttpSession, Timeout
+
+# Cumulative microseconds `import coco_attention.cli` may take. Measured at
+# about 60 ms; the slack is for slow CI runners, not for new imports.
+IMPORT_BUDGET_US = 250_000
+
+
+def test_http_transport_round_trip() -> None:
+    with MockBridge(lights=2) as bridge:
+        with HueClient(bridge.address, bridge.username, transport="http") as client:
+            assert client.list_lights() == {"1": "Mock light 1", "2": "Mock light 2"}
+            client.set_light_state("2", {"on": True, "bri": 200})
+            client.send(group_target("1"), {"hue": 0})
+            state = client.get_light_state("2")
+
+            assert (state.on, state.bri, state.hue) == (True, 200, 0)
+            assert client.stats.requests == 4
+            assert client.stats.opened == 1
+
+
+def test_http_transport_errors() -> None:
+    with MockBridge(options=MockBridgeOptions(error_rate=1.0)) as bridge:
+        with HueClient(bridge.address, bridge.username, transport="http") as client:
+            with pytest.raises(HTTPError) as excinfo:
+                client.list_lights()
+    assert excinfo.value.response.status_code >= 500
+
+    with MockBridge(options=MockBridgeOptions(latency=0.5)) as bridge:
+        with HttpSession() as session:
+            with pytest.raises(Timeout):
+                session.get(f"http://{bridge.address}/api/config", timeout=0.05)
+
+
+def test_unknown_transport() -> None:
+    with pytest.raises(ValueError):
+        HueClient("127.0.0.1", "user", transport="curl")
+
+
+def test_cli_import_stays_lean() -> None:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import coco_attention.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            cumulative[match.group(3)] = int(match.group(1))
+
+    for heavy in ("requests", "urllib3", "http.server", "http.client"):
+        assert heavy not in cumulative, f"{heavy} is imported at CLI start-up"
+    assert cumulative["coco_attention.cli"] < IMPORT_BUDGET_US